@@ -0,0 +1,174 @@
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from typing import Any, Dict, Iterable, List, Optional
+
+# --- FILE DES ALERTES EN ATTENTE DE TRIAGE ---
+# Deux implémentations de la même interface :
+# - MemoryAlertStore : liste en mémoire du processus (comportement historique de l'API) ;
+# - SQLiteAlertStore : base SQLite (mode WAL) partagée entre processus — workers de l'API
+#   et consommateurs en continu (api/stream_worker.py).
+# FRAUD_API_ALERT_DB=<chemin> sélectionne la version SQLite.
+
+ALERT_DB_PATH = os.environ.get("FRAUD_API_ALERT_DB")
+
+Alert = Dict[str, Any]
+
+
+def make_alert(transaction: Dict[str, Any], probability: float, alert_id: Optional[str] = None) -> Alert:
+    """Construit une alerte à partir d'une transaction prédite frauduleuse."""
+    alert = dict(transaction)
+    alert['alert_id'] = alert_id or uuid.uuid4().hex[:12]
+    alert['model_prediction'] = 1
+    alert['prediction_score'] = float(probability)
+    return alert
+
+
+class MemoryAlertStore:
+    """File d'alertes en mémoire (un seul processus)."""
+
+    def __init__(self):
+        self._alerts: List[Alert] = []
+        self._ids = set()
+        self._lock = threading.Lock()
+
+    def add(self, alerts: Iterable[Alert]) -> int:
+        added = 0
+        with self._lock:
+            for alert in alerts:
+                if alert['alert_id'] not in self._ids:
+                    self._ids.add(alert['alert_id'])
+                    self._alerts.append(alert)
+                    added += 1
+        return added
+
+    def list(self) -> List[Alert]:
+        return list(self._alerts)
+
+    def count(self) -> int:
+        return len(self._alerts)
+
+    def get(self, alert_ids: Iterable[str]) -> List[Alert]:
+        ids = set(alert_ids) & self._ids
+        return [a for a in self._alerts if a['alert_id'] in ids] if ids else []
+
+    def _remove_where(self, predicate) -> List[Alert]:
+        removed, kept = [], []
+        for alert in self._alerts:
+            (removed if predicate(alert) else kept).append(alert)
+        if removed:
+            self._alerts = kept
+            self._ids.difference_update(a['alert_id'] for a in removed)
+        return removed
+
+    def remove(self, alert_ids: Iterable[str]) -> int:
+        ids = set(alert_ids)
+        with self._lock:
+            return len(self._remove_where(lambda a: a['alert_id'] in ids))
+
+    def remove_matching(self, tx_time: float, tx_amount: float) -> List[Alert]:
+        """Retire les alertes d'une transaction identifiée par (Time, Amount) ; retourne les alertes retirées."""
+        with self._lock:
+            return self._remove_where(lambda a: a.get('Time') == tx_time and a.get('Amount') == tx_amount)
+
+    def clear(self):
+        with self._lock:
+            self._alerts = []
+            self._ids = set()
+
+
+class SQLiteAlertStore:
+    """
+    File d'alertes dans une base SQLite partagée entre processus.
+    Une connexion par processus et par thread, ouverte à la première utilisation : une connexion
+    SQLite ne doit pas franchir un fork (maître gunicorn avec preload_app -> workers).
+    L'identifiant d'alerte est la clé primaire (INSERT OR IGNORE), ce qui rend l'ajout idempotent
+    pour les consommateurs qui rejouent un lot après un crash.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        # Schéma créé avec une connexion temporaire, fermée avant un éventuel fork
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS alerts ("
+                    " alert_id TEXT PRIMARY KEY,"
+                    " tx_time REAL,"
+                    " tx_amount REAL,"
+                    " payload TEXT NOT NULL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS alerts_tx ON alerts (tx_time, tx_amount)")
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _connection(self) -> sqlite3.Connection:
+        # Après un fork, le thread du processus fils hérite du stockage local du parent :
+        # la connexion héritée n'est ni réutilisée ni fermée (elle appartient au parent)
+        if getattr(self._local, "pid", None) != os.getpid():
+            self._local.conn = self._connect()
+            self._local.pid = os.getpid()
+        return self._local.conn
+
+    def add(self, alerts: Iterable[Alert]) -> int:
+        rows = [(a['alert_id'], a.get('Time'), a.get('Amount'), json.dumps(a)) for a in alerts]
+        if not rows:
+            return 0
+        conn = self._connection()
+        with conn:
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO alerts VALUES (?, ?, ?, ?)", rows)
+            return conn.total_changes - before
+
+    def list(self) -> List[Alert]:
+        cursor = self._connection().execute("SELECT payload FROM alerts ORDER BY rowid")
+        return [json.loads(payload) for (payload,) in cursor]
+
+    def count(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM alerts").fetchone()[0]
+
+    def get(self, alert_ids: Iterable[str]) -> List[Alert]:
+        ids = list(alert_ids)
+        alerts = []
+        for i in range(0, len(ids), 500):  # Limite du nombre de paramètres SQLite
+            chunk = ids[i:i + 500]
+            cursor = self._connection().execute(
+                f"SELECT payload FROM alerts WHERE alert_id IN ({','.join('?' * len(chunk))}) ORDER BY rowid", chunk)
+            alerts.extend(json.loads(payload) for (payload,) in cursor)
+        return alerts
+
+    def remove(self, alert_ids: Iterable[str]) -> int:
+        conn = self._connection()
+        with conn:
+            before = conn.total_changes
+            conn.executemany("DELETE FROM alerts WHERE alert_id = ?", [(i,) for i in alert_ids])
+            return conn.total_changes - before
+
+    def remove_matching(self, tx_time: float, tx_amount: float) -> List[Alert]:
+        conn = self._connection()
+        with conn:
+            cursor = conn.execute("SELECT payload FROM alerts WHERE tx_time = ? AND tx_amount = ?", (tx_time, tx_amount))
+            matched = [json.loads(payload) for (payload,) in cursor]
+            if matched:
+                conn.execute("DELETE FROM alerts WHERE tx_time = ? AND tx_amount = ?", (tx_time, tx_amount))
+        return matched
+
+    def clear(self):
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM alerts")
+
+
+def create_alert_store(path: Optional[str] = ALERT_DB_PATH):
+    """File SQLite si un chemin est configuré, sinon file en mémoire."""
+    return SQLiteAlertStore(path) if path else MemoryAlertStore()
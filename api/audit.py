@@ -0,0 +1,255 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from api.metrics import REGISTRY
+
+# --- JOURNAL D'AUDIT DES PRÉDICTIONS ---
+# Chaque requête de scoring dépose UN élément dans une file bornée (put_nowait : jamais bloquant).
+# Un thread d'arrière-plan calcule les empreintes, sérialise en JSON Lines et écrit par lots
+# dans des segments gzip numérotés, renouvelés au-delà d'une taille ou d'une durée.
+# Les fraudes prédites sont toujours journalisées ; les transactions légitimes sont échantillonnées
+# (champ 'weight' = 1 / taux, pour repondérer lors des analyses).
+# Si la file est pleine, les enregistrements sont abandonnés et comptés dans /metrics :
+# l'audit ne ralentit jamais la réponse.
+# Rétention : à l'ouverture d'un segment, les segments du répertoire plus vieux que
+# AUDIT_RETENTION_DAYS jours, puis les plus anciens au-delà de AUDIT_MAX_SEGMENTS, sont supprimés
+# (0 désactive la limite correspondante). Le segment courant n'est jamais supprimé.
+
+logger = logging.getLogger("fraud_api.audit")
+
+AUDIT_ENABLED = os.environ.get("FRAUD_API_AUDIT", "1") == "1"
+AUDIT_DIR = os.environ.get("FRAUD_API_AUDIT_DIR", "audit_logs")
+AUDIT_SAMPLE_RATE = float(os.environ.get("FRAUD_API_AUDIT_SAMPLE_RATE", "0.1"))
+AUDIT_QUEUE_SIZE = int(os.environ.get("FRAUD_API_AUDIT_QUEUE_SIZE", "10000"))
+AUDIT_FLUSH_INTERVAL = float(os.environ.get("FRAUD_API_AUDIT_FLUSH_INTERVAL", "1.0"))
+AUDIT_BATCH_RECORDS = 5000
+AUDIT_SEGMENT_BYTES = int(os.environ.get("FRAUD_API_AUDIT_SEGMENT_MB", "64")) * 1024 * 1024
+AUDIT_SEGMENT_SECONDS = int(os.environ.get("FRAUD_API_AUDIT_SEGMENT_SECONDS", "3600"))
+AUDIT_MAX_SEGMENTS = int(os.environ.get("FRAUD_API_AUDIT_MAX_SEGMENTS", "720"))
+AUDIT_RETENTION_DAYS = float(os.environ.get("FRAUD_API_AUDIT_RETENTION_DAYS", "30"))
+AUDIT_SEGMENT_PREFIX = "audit-"
+AUDIT_SEGMENT_SUFFIX = ".jsonl.gz"
+
+# Marqueurs internes du thread d'écriture (arrêt demandé / délai de flush écoulé)
+_STOP = object()
+_TICK = object()
+
+AUDIT_RECORDS = REGISTRY.counter(
+    "fraud_api_audit_records_total", "Enregistrements d'audit écrits ou abandonnés (file pleine).", ("result",))
+AUDIT_QUEUE_LENGTH = REGISTRY.gauge(
+    "fraud_api_audit_queue_length", "Requêtes en attente d'écriture dans le journal d'audit.")
+AUDIT_SEGMENTS_DELETED = REGISTRY.counter(
+    "fraud_api_audit_segments_deleted_total", "Segments d'audit supprimés par la rétention.")
+
+
+class AuditBatch:
+    """Décisions d'une requête de scoring (lignes déjà échantillonnées)."""
+    __slots__ = ("timestamp", "endpoint", "features", "scores", "predictions", "weights",
+                 "threshold", "model_version", "latency")
+
+    def __init__(self, timestamp, endpoint, features, scores, predictions, weights,
+                 threshold, model_version, latency):
+        self.timestamp = timestamp
+        self.endpoint = endpoint
+        self.features = features
+        self.scores = scores
+        self.predictions = predictions
+        self.weights = weights
+        self.threshold = threshold
+        self.model_version = model_version
+        self.latency = latency
+
+
+def feature_hash(row: np.ndarray) -> str:
+    """Empreinte (BLAKE2b, 128 bits) du vecteur de variables soumis au modèle."""
+    return hashlib.blake2b(np.ascontiguousarray(row, dtype=np.float64).tobytes(), digest_size=16).hexdigest()
+
+
+class AuditLogger:
+    """File non bloquante + thread d'écriture par lots dans des segments gzip renouvelés."""
+
+    def __init__(self, directory: str = AUDIT_DIR, sample_rate: float = AUDIT_SAMPLE_RATE,
+                 queue_size: int = AUDIT_QUEUE_SIZE, flush_interval: float = AUDIT_FLUSH_INTERVAL,
+                 segment_bytes: int = AUDIT_SEGMENT_BYTES, segment_seconds: int = AUDIT_SEGMENT_SECONDS,
+                 max_segments: int = AUDIT_MAX_SEGMENTS, retention_days: float = AUDIT_RETENTION_DAYS):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.flush_interval = flush_interval
+        self.segment_bytes = segment_bytes
+        self.segment_seconds = segment_seconds
+        self.max_segments = max_segments
+        self.retention_days = retention_days
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        # Générateur créé dans start(), après le fork des workers : sinon tous les workers
+        # hériteraient du même état et tireraient les mêmes échantillons
+        self._rng: Optional[np.random.Generator] = None
+        self._segment_path: Optional[str] = None
+        self._segment_size = 0
+        self._segment_opened = 0.0
+        self._segment_index = 0
+        AUDIT_QUEUE_LENGTH.set_function(self._queue.qsize)
+
+    # --- Chemin de la requête ---
+
+    def submit(self, endpoint: str, features: np.ndarray, scores: np.ndarray, predictions: np.ndarray,
+               threshold: float, model_version: Optional[str], latency: float):
+        """Échantillonne les décisions et les dépose dans la file, sans jamais bloquer."""
+        if self._thread is None:
+            return
+        predictions = np.asarray(predictions)
+        keep = predictions == 1
+        if self.sample_rate >= 1.0:
+            keep[:] = True
+        elif self.sample_rate > 0:
+            keep |= self._rng.random(len(predictions)) < self.sample_rate
+        if not keep.any():
+            return
+
+        kept_predictions = predictions[keep]
+        legit_weight = 1.0 / self.sample_rate if 0 < self.sample_rate < 1.0 else 1.0
+        batch = AuditBatch(
+            timestamp=time.time(),
+            endpoint=endpoint,
+            features=np.asarray(features)[keep],
+            scores=np.asarray(scores)[keep],
+            predictions=kept_predictions,
+            weights=np.where(kept_predictions == 1, 1.0, legit_weight),
+            threshold=threshold,
+            model_version=model_version,
+            latency=latency,
+        )
+        try:
+            self._queue.put_nowait(batch)
+        except queue.Full:
+            AUDIT_RECORDS.inc(len(kept_predictions), result="dropped")
+
+    # --- Cycle de vie ---
+
+    def start(self):
+        if self._thread is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._rng = np.random.default_rng()
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+        logger.info(f"📝 Journal d'audit actif ({self.directory}, échantillonnage légitimes {self.sample_rate:.0%}).")
+
+    def stop(self, timeout: float = 10.0):
+        """Vide la file puis arrête le thread d'écriture."""
+        if self._thread is None:
+            return
+        thread, self._thread = self._thread, None
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    # --- Thread d'écriture ---
+
+    def _run(self):
+        pending: List[AuditBatch] = []
+        n_pending = 0
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = _TICK
+            if item is _STOP:
+                self._flush(pending)
+                return
+            if item is not _TICK:
+                pending.append(item)
+                n_pending += len(item.predictions)
+            if n_pending >= AUDIT_BATCH_RECORDS or time.monotonic() >= deadline:
+                self._flush(pending)
+                pending, n_pending = [], 0
+                deadline = time.monotonic() + self.flush_interval
+
+    def _serialize(self, batches: List[AuditBatch]) -> bytes:
+        lines = []
+        for batch in batches:
+            timestamp = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(batch.timestamp))
+            timestamp += f".{int(batch.timestamp % 1 * 1000):03d}Z"
+            latency_ms = round(batch.latency * 1000, 3)
+            for row, score, prediction, weight in zip(batch.features, batch.scores.tolist(),
+                                                      batch.predictions.tolist(), batch.weights.tolist()):
+                lines.append(json.dumps({
+                    "ts": timestamp,
+                    "endpoint": batch.endpoint,
+                    "feature_hash": feature_hash(row),
+                    "score": score,
+                    "prediction": prediction,
+                    "threshold": batch.threshold,
+                    "model_version": batch.model_version,
+                    "latency_ms": latency_ms,
+                    "weight": weight,
+                }, separators=(",", ":")))
+        return ("\n".join(lines) + "\n").encode("utf-8") if lines else b""
+
+    def _segment(self) -> str:
+        """Segment courant ; un nouveau est ouvert au-delà de la taille ou de l'âge maximal."""
+        now = time.time()
+        if (self._segment_path is None or self._segment_size >= self.segment_bytes
+                or now - self._segment_opened >= self.segment_seconds):
+            self._segment_index += 1
+            stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime(now))
+            # PID dans le nom : plusieurs workers peuvent partager le même répertoire
+            self._segment_path = os.path.join(
+                self.directory,
+                f"{AUDIT_SEGMENT_PREFIX}{stamp}-{os.getpid()}-{self._segment_index:04d}{AUDIT_SEGMENT_SUFFIX}")
+            self._segment_size = 0
+            self._segment_opened = now
+            self._enforce_retention(now)
+        return self._segment_path
+
+    def _enforce_retention(self, now: float):
+        """Supprime les segments trop anciens, puis les plus anciens au-delà de max_segments."""
+        try:
+            segments = [entry for entry in os.scandir(self.directory)
+                        if entry.is_file() and entry.name.startswith(AUDIT_SEGMENT_PREFIX)
+                        and entry.name.endswith(AUDIT_SEGMENT_SUFFIX) and entry.path != self._segment_path]
+        except OSError as e:
+            logger.error(f"❌ Rétention du journal d'audit impossible : {e}")
+            return
+        segments.sort(key=lambda entry: entry.stat().st_mtime)
+        expired = []
+        if self.retention_days > 0:
+            cutoff = now - self.retention_days * 86400
+            expired = [entry for entry in segments if entry.stat().st_mtime < cutoff]
+        if self.max_segments > 0:
+            # Le segment courant compte dans la limite
+            excess = len(segments) + 1 - self.max_segments
+            expired = segments[:max(excess, len(expired))]
+        for entry in expired:
+            try:
+                os.remove(entry.path)
+                AUDIT_SEGMENTS_DELETED.inc()
+            except OSError:
+                pass
+
+    def _flush(self, batches: List[AuditBatch]):
+        if not batches:
+            return
+        try:
+            payload = self._serialize(batches)
+            path = self._segment()
+            # Un membre gzip par écriture : un segment interrompu reste lisible jusqu'au dernier lot
+            with gzip.open(path, "ab", compresslevel=6) as f:
+                f.write(payload)
+            self._segment_size += len(payload)
+            AUDIT_RECORDS.inc(sum(len(b.predictions) for b in batches), result="written")
+        except Exception as e:
+            logger.error(f"❌ Échec d'écriture du journal d'audit : {e}")
+            AUDIT_RECORDS.inc(sum(len(b.predictions) for b in batches), result="dropped")
+
+
+AUDIT_LOGGER = AuditLogger()
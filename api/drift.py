@@ -0,0 +1,221 @@
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from api.scoring import FEATURE_COLUMNS
+
+# --- SURVEILLANCE DE LA DÉRIVE DES VARIABLES ET DE LA DISTRIBUTION DES SCORES ---
+# Référence : histogrammes à bins fixes (déciles de creditcard_cleaned.csv) précalculés par :
+#     python -m api.drift --data app/data/creditcard_cleaned.csv --output app/models/drift_baseline.json
+# En production, chaque transaction scorée incrémente un compteur par variable dans le bucket
+# temporel courant (un searchsorted par variable : O(variables) par transaction, aucune donnée brute
+# conservée). Les buckets forment un anneau : la fenêtre glissante est la somme des buckets récents,
+# comparée à la référence par PSI et par KS calculé sur les bins.
+
+logger = logging.getLogger("fraud_api.drift")
+
+DRIFT_BASELINE_FILE = os.environ.get("FRAUD_API_DRIFT_BASELINE", os.path.join("app", "models", "drift_baseline.json"))
+DRIFT_BUCKET_SECONDS = int(os.environ.get("FRAUD_API_DRIFT_BUCKET_SECONDS", "300"))
+DRIFT_N_BUCKETS = int(os.environ.get("FRAUD_API_DRIFT_N_BUCKETS", "288"))  # 24 h de buckets de 5 min
+DRIFT_MIN_OBSERVATIONS = 200
+N_BASELINE_BINS = 10
+SCORE_COLUMN = "score"
+
+# Seuils usuels du PSI : < 0.1 stable, 0.1 - 0.25 dérive modérée, > 0.25 dérive significative
+PSI_WARNING = 0.1
+PSI_DRIFT = 0.25
+# Lissage des proportions nulles (évite log(0) dans le PSI)
+EPSILON = 1e-4
+
+
+def quantile_edges(values: np.ndarray, n_bins: int = N_BASELINE_BINS) -> np.ndarray:
+    """Bornes internes (quantiles) d'un histogramme à n_bins, dédoublonnées pour les variables discrètes."""
+    quantiles = np.quantile(values, np.linspace(0, 1, n_bins + 1)[1:-1])
+    return np.unique(quantiles)
+
+
+def population_stability_index(expected: np.ndarray, actual: np.ndarray) -> float:
+    """PSI entre deux distributions exprimées en proportions par bin."""
+    expected = np.clip(expected, EPSILON, None)
+    actual = np.clip(actual, EPSILON, None)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def binned_ks(expected: np.ndarray, actual: np.ndarray) -> float:
+    """Statistique de Kolmogorov-Smirnov approchée sur les bins (écart max des fonctions de répartition)."""
+    return float(np.max(np.abs(np.cumsum(expected) - np.cumsum(actual))))
+
+
+def drift_status(psi: float) -> str:
+    return "drift" if psi > PSI_DRIFT else ("warning" if psi > PSI_WARNING else "ok")
+
+
+class DriftMonitor:
+    """
+    Histogrammes glissants par variable (+ score), en mémoire constante.
+
+    counts[b, j, k] : nombre d'observations de la variable j dans le bin k, pour le bucket temporel b.
+    Les variables ont des nombres de bins différents ; le tableau est dimensionné au maximum
+    et les bins inutilisés restent à zéro des deux côtés (contribution nulle au PSI).
+    """
+
+    def __init__(self, baseline: Dict, bucket_seconds: int = DRIFT_BUCKET_SECONDS, n_buckets: int = DRIFT_N_BUCKETS):
+        self.columns: List[str] = list(baseline["features"])
+        self.version = baseline.get("version")
+        self.edges = [np.asarray(baseline["features"][c]["edges"], dtype=np.float64) for c in self.columns]
+        max_bins = max(len(e) + 1 for e in self.edges)
+        self.expected = np.zeros((len(self.columns), max_bins))
+        for j, column in enumerate(self.columns):
+            proportions = baseline["features"][column]["proportions"]
+            self.expected[j, :len(proportions)] = proportions
+
+        self.feature_index = [j for j, c in enumerate(self.columns) if c != SCORE_COLUMN]
+        self.feature_positions = [FEATURE_COLUMNS.index(self.columns[j]) for j in self.feature_index]
+        self.score_index = self.columns.index(SCORE_COLUMN) if SCORE_COLUMN in self.columns else None
+
+        # Bornes des variables en une matrice (complétée par +inf) : un lot entier est classé
+        # en quelques opérations vectorisées, toutes variables confondues.
+        self._feature_edges = np.full((len(self.feature_index), max_bins - 1), np.inf)
+        for row, j in enumerate(self.feature_index):
+            self._feature_edges[row, :len(self.edges[j])] = self.edges[j]
+        self._flat_offsets = np.asarray(self.feature_index) * max_bins
+
+        self.bucket_seconds = bucket_seconds
+        self.n_buckets = n_buckets
+        self._counts = np.zeros((n_buckets, len(self.columns), max_bins), dtype=np.int64)
+        self._epochs = np.full(n_buckets, -1, dtype=np.int64)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: str = DRIFT_BASELINE_FILE, **kwargs) -> Optional["DriftMonitor"]:
+        """Charge la référence ; None si le fichier est absent (surveillance désactivée)."""
+        if not os.path.exists(path):
+            logger.warning(f"⚠️ Référence de dérive absente ({path}) : surveillance désactivée.")
+            return None
+        with open(path) as f:
+            return cls(json.load(f), **kwargs)
+
+    def _bucket(self, now: float) -> np.ndarray:
+        """Bucket temporel courant (remis à zéro s'il contenait une période plus ancienne)."""
+        epoch = int(now // self.bucket_seconds)
+        slot = epoch % self.n_buckets
+        if self._epochs[slot] != epoch:
+            self._counts[slot] = 0
+            self._epochs[slot] = epoch
+        return self._counts[slot]
+
+    def observe(self, features: np.ndarray, now: Optional[float] = None):
+        """Ajoute un lot de transactions (matrice n x 30 dans l'ordre FEATURE_COLUMNS, valeurs brutes)."""
+        values = np.asarray(features, dtype=np.float64)[:, self.feature_positions]
+        # Indice du bin = nombre de bornes <= valeur (équivalent à searchsorted(side='right'))
+        bins = (self._feature_edges[None, :, :] <= values[:, :, None]).sum(axis=2)
+        flat = np.bincount((bins + self._flat_offsets).ravel(), minlength=self._counts[0].size)
+        with self._lock:
+            bucket = self._bucket(time.time() if now is None else now)
+            bucket += flat.reshape(bucket.shape)
+
+    def observe_scores(self, scores: np.ndarray, now: Optional[float] = None):
+        """Ajoute les probabilités de fraude du lot."""
+        if self.score_index is None:
+            return
+        bins = np.searchsorted(self.edges[self.score_index], np.asarray(scores, dtype=np.float64), side="right")
+        counts = np.bincount(bins, minlength=self._counts.shape[2])
+        with self._lock:
+            bucket = self._bucket(time.time() if now is None else now)
+            bucket[self.score_index] += counts
+
+    def window_counts(self, window_seconds: Optional[int] = None, now: Optional[float] = None) -> np.ndarray:
+        """Somme des buckets couvrant les window_seconds dernières secondes."""
+        now = time.time() if now is None else now
+        n = self.n_buckets if window_seconds is None else max(1, min(self.n_buckets, -(-window_seconds // self.bucket_seconds)))
+        current = int(now // self.bucket_seconds)
+        with self._lock:
+            valid = (self._epochs > current - n) & (self._epochs <= current)
+            return self._counts[valid].sum(axis=0)
+
+    def report(self, window_seconds: Optional[int] = None, now: Optional[float] = None) -> Dict:
+        """PSI et KS par variable (et pour le score) sur la fenêtre glissante."""
+        counts = self.window_counts(window_seconds, now)
+        totals = counts.sum(axis=1)
+        n_observations = int(totals[self.feature_index[0]]) if self.feature_index else 0
+
+        metrics = {}
+        for j, column in enumerate(self.columns):
+            if totals[j] == 0:
+                continue
+            actual = counts[j] / totals[j]
+            psi = population_stability_index(self.expected[j], actual)
+            metrics[column] = {
+                "psi": round(psi, 4),
+                "ks": round(binned_ks(self.expected[j], actual), 4),
+                "status": drift_status(psi),
+                "n": int(totals[j]),
+            }
+
+        score = metrics.pop(SCORE_COLUMN, None)
+        return {
+            "baseline_version": self.version,
+            "window_seconds": window_seconds or self.n_buckets * self.bucket_seconds,
+            "n_observations": n_observations,
+            "sufficient_data": n_observations >= DRIFT_MIN_OBSERVATIONS,
+            "features": metrics,
+            "score": score,
+            "drifting_features": sorted(c for c, m in metrics.items() if m["status"] == "drift"),
+        }
+
+
+# --- CONSTRUCTION DE LA RÉFÉRENCE (CLI) ---
+
+def build_baseline(features: np.ndarray, scores: Optional[np.ndarray] = None,
+                   n_bins: int = N_BASELINE_BINS, version: Optional[str] = None) -> Dict:
+    """Histogrammes de référence : bornes des quantiles et proportions par bin, pour chaque variable."""
+    columns = {name: features[:, i] for i, name in enumerate(FEATURE_COLUMNS)}
+    if scores is not None:
+        columns[SCORE_COLUMN] = scores
+
+    baseline = {"version": version, "n_rows": int(len(features)), "n_bins": n_bins, "features": {}}
+    for name, values in columns.items():
+        edges = quantile_edges(values, n_bins)
+        counts = np.bincount(np.searchsorted(edges, values, side="right"), minlength=len(edges) + 1)
+        baseline["features"][name] = {
+            "edges": edges.tolist(),
+            "proportions": (counts / counts.sum()).tolist(),
+        }
+    return baseline
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Construit la référence de dérive à partir du jeu de données nettoyé.")
+    parser.add_argument("--data", default=os.path.join("app", "data", "creditcard_cleaned.csv"))
+    parser.add_argument("--output", default=DRIFT_BASELINE_FILE)
+    parser.add_argument("--bins", type=int, default=N_BASELINE_BINS)
+    parser.add_argument("--no-scores", action="store_true", help="Ne pas scorer le jeu de données (pas de référence du score).")
+    args = parser.parse_args()
+
+    import pandas as pd
+    from api.scoring import load_artifacts, scale_features, predict_scores
+
+    df = pd.read_csv(args.data, usecols=FEATURE_COLUMNS)[FEATURE_COLUMNS]
+    features = df.to_numpy(dtype=np.float64)
+
+    scores = None
+    if not args.no_scores:
+        model, scaler = load_artifacts(os.path.join("app", "models", "xgb_fraud_detection_model.pkl"),
+                                       os.path.join("app", "models", "scaler.pkl"))
+        _, scores = predict_scores(scale_features(df, scaler), model)
+
+    stat = os.stat(args.data)
+    baseline = build_baseline(features, scores, args.bins, version=f"{stat.st_size}-{int(stat.st_mtime)}")
+    with open(args.output, "w") as f:
+        json.dump(baseline, f)
+    print(f"Référence écrite dans {args.output} ({len(features)} lignes, {len(baseline['features'])} distributions).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import os
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from api.metrics import REGISTRY
+
+# --- MAGASIN DE VARIABLES DE VÉLOCITÉ PAR ENTITÉ (CARTE, CLIENT...) ---
+# Pour chaque entité : un anneau de buckets temporels par fenêtre (1 min, 1 h, 24 h) avec
+# nombre, somme et maximum des montants, et des totaux courants mis à jour à l'entrée/sortie
+# des buckets. Mise à jour et lecture en temps constant (borné par le nombre de buckets).
+# Les entités inactives depuis plus de la plus longue fenêtre sont évincées (TTL) et le nombre
+# d'entités est plafonné (éviction LRU), ce qui borne la mémoire.
+
+# (nom, largeur d'un bucket en secondes, nombre de buckets)
+WINDOWS: Tuple[Tuple[str, int, int], ...] = (
+    ("1m", 5, 12),
+    ("1h", 60, 60),
+    ("24h", 3600, 24),
+)
+FEATURE_STORE_MAX_ENTITIES = int(os.environ.get("FRAUD_API_FEATURE_STORE_MAX_ENTITIES", "50000"))
+FEATURE_STORE_TTL = max(width * n for _, width, n in WINDOWS)
+
+FEATURE_STORE_ENTITIES = REGISTRY.gauge(
+    "fraud_api_feature_store_entities", "Entités suivies par le magasin de variables de vélocité.")
+FEATURE_STORE_EVICTIONS = REGISTRY.counter(
+    "fraud_api_feature_store_evictions_total", "Entités évincées du magasin de variables.", ("reason",))
+
+
+class _Ring:
+    """Buckets (nombre, somme, max) d'une fenêtre glissante, avec totaux courants."""
+    __slots__ = ("width", "size", "epoch", "counts", "sums", "maxs", "total_count", "total_sum")
+
+    def __init__(self, width: int, size: int):
+        self.width = width
+        self.size = size
+        self.epoch = -1
+        self.counts = array("q", bytes(8 * size))
+        self.sums = array("d", bytes(8 * size))
+        self.maxs = array("d", bytes(8 * size))
+        self.total_count = 0
+        self.total_sum = 0.0
+
+    def _advance(self, now: float):
+        """Vide les buckets sortis de la fenêtre depuis la dernière mise à jour."""
+        epoch = int(now // self.width)
+        if epoch <= self.epoch:
+            return
+        if epoch - self.epoch >= self.size:
+            for i in range(self.size):
+                self.counts[i] = 0
+                self.sums[i] = 0.0
+                self.maxs[i] = 0.0
+            self.total_count = 0
+            self.total_sum = 0.0
+        else:
+            for e in range(self.epoch + 1, epoch + 1):
+                slot = e % self.size
+                self.total_count -= self.counts[slot]
+                self.total_sum -= self.sums[slot]
+                self.counts[slot] = 0
+                self.sums[slot] = 0.0
+                self.maxs[slot] = 0.0
+        self.epoch = epoch
+
+    def add(self, amount: float, now: float):
+        self._advance(now)
+        slot = self.epoch % self.size
+        self.counts[slot] += 1
+        self.sums[slot] += amount
+        if amount > self.maxs[slot]:
+            self.maxs[slot] = amount
+        self.total_count += 1
+        self.total_sum += amount
+
+    def read(self, now: float) -> Tuple[int, float, float]:
+        self._advance(now)
+        return self.total_count, round(self.total_sum, 2), max(self.maxs)
+
+
+class _EntityState:
+    __slots__ = ("last_seen", "rings")
+
+    def __init__(self):
+        self.last_seen = 0.0
+        self.rings = [_Ring(width, size) for _, width, size in WINDOWS]
+
+
+class FeatureStore:
+    """Agrégats glissants (nombre, somme, max des montants) par entité, en mémoire bornée."""
+
+    def __init__(self, max_entities: int = FEATURE_STORE_MAX_ENTITIES, ttl: float = FEATURE_STORE_TTL):
+        self.max_entities = max_entities
+        self.ttl = ttl
+        self._entities: "OrderedDict[str, _EntityState]" = OrderedDict()
+        self._lock = threading.Lock()
+        FEATURE_STORE_ENTITIES.set_function(lambda: len(self._entities))
+
+    def _evict(self, now: float):
+        """Entités les moins récemment vues en tête : éviction TTL puis LRU, en temps amorti constant."""
+        while self._entities:
+            entity_id, state = next(iter(self._entities.items()))
+            if now - state.last_seen > self.ttl:
+                reason = "ttl"
+            elif len(self._entities) > self.max_entities:
+                reason = "capacity"
+            else:
+                break
+            del self._entities[entity_id]
+            FEATURE_STORE_EVICTIONS.inc(reason=reason)
+
+    @staticmethod
+    def _features(state: _EntityState, now: float) -> Dict[str, float]:
+        features = {}
+        for (name, _, _), ring in zip(WINDOWS, state.rings):
+            count, total, maximum = ring.read(now)
+            features[f"tx_count_{name}"] = count
+            features[f"amount_sum_{name}"] = total
+            features[f"amount_max_{name}"] = maximum
+        return features
+
+    def update(self, entity_id: str, amount: float, now: Optional[float] = None) -> Dict[str, float]:
+        """Enregistre une transaction et retourne les agrégats de l'entité (transaction incluse)."""
+        now = time.time() if now is None else now
+        with self._lock:
+            state = self._entities.get(entity_id)
+            if state is None:
+                state = self._entities[entity_id] = _EntityState()
+            else:
+                self._entities.move_to_end(entity_id)
+            state.last_seen = now
+            for ring in state.rings:
+                ring.add(amount, now)
+            self._evict(now)
+            return self._features(state, now)
+
+    def lookup(self, entity_id: str, now: Optional[float] = None) -> Optional[Dict[str, float]]:
+        """Agrégats courants d'une entité, sans enregistrer de transaction (None si inconnue)."""
+        now = time.time() if now is None else now
+        with self._lock:
+            state = self._entities.get(entity_id)
+            if state is None or now - state.last_seen > self.ttl:
+                return None
+            return self._features(state, now)
+
+    def __len__(self):
+        return len(self._entities)
+
+
+FEATURE_STORE = FeatureStore()
@@ -0,0 +1,146 @@
+import asyncio
+import contextvars
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from fastapi import HTTPException
+
+from api.metrics import REGISTRY
+
+# --- VOIES D'ORDONNANCEMENT : SCORING INTERACTIF ET SCORING EN MASSE ---
+# Les calculs de scoring ne s'exécutent plus dans la boucle d'événements mais dans deux voies,
+# chacune avec ses threads dédiés et sa limite d'admission :
+# - "interactive" : /predict (une transaction, analyste en attente) ;
+# - "bulk" : /predict_batch (lots du Dashboard) : validation du corps JSON et construction du
+#   DataFrame, puis inférence découpée en tranches de BULK_CHUNK_ROWS lignes.
+# Une tâche en masse soumet ses tranches une par une ; avant chaque tranche, elle cède la place
+# tant que la voie interactive a des requêtes en cours (au plus BULK_MAX_DEFER secondes par
+# tranche, pour ne pas être affamée). Une requête interactive n'attend donc jamais plus d'une
+# tranche, quelle que soit la taille du lot. XGBoost et numpy libèrent le GIL pendant le calcul.
+#
+# Une voie pleine (requêtes en cours + en attente >= limite) refuse la requête : 503 avec
+# Retry-After, code que les clients rejouent (requête non traitée). Par voie : latence de bout en
+# bout, attente avant exécution, requêtes dans/hors objectif de latence (SLO), refus.
+# Les voies sont propres à chaque worker ; leurs threads sont créés à la première requête,
+# après le fork des workers gunicorn.
+
+INTERACTIVE_WORKERS = int(os.environ.get("FRAUD_API_INTERACTIVE_WORKERS", "2"))
+INTERACTIVE_QUEUE = int(os.environ.get("FRAUD_API_INTERACTIVE_QUEUE", "64"))
+INTERACTIVE_SLO = float(os.environ.get("FRAUD_API_INTERACTIVE_SLO_MS", "50")) / 1000
+BULK_WORKERS = int(os.environ.get("FRAUD_API_BULK_WORKERS", "1"))
+BULK_QUEUE = int(os.environ.get("FRAUD_API_BULK_QUEUE", "4"))
+BULK_SLO = float(os.environ.get("FRAUD_API_BULK_SLO_MS", "5000")) / 1000
+BULK_CHUNK_ROWS = int(os.environ.get("FRAUD_API_BULK_CHUNK_ROWS", "2000"))
+BULK_MAX_DEFER = float(os.environ.get("FRAUD_API_BULK_MAX_DEFER_MS", "250")) / 1000
+DEFER_POLL_INTERVAL = 0.002
+
+LANE_LATENCY = REGISTRY.histogram(
+    "fraud_api_lane_duration_seconds", "Durée des tâches de scoring par voie (admission -> résultat).", ("lane",))
+LANE_QUEUE_WAIT = REGISTRY.histogram(
+    "fraud_api_lane_queue_seconds", "Attente avant exécution (par tranche pour la voie bulk).", ("lane",))
+LANE_SLO = REGISTRY.counter(
+    "fraud_api_lane_slo_total", "Tâches terminées dans (met) ou hors (missed) de l'objectif de latence.",
+    ("lane", "result"))
+LANE_SLO_TARGET = REGISTRY.gauge(
+    "fraud_api_lane_slo_seconds", "Objectif de latence de la voie.", ("lane",))
+LANE_REJECTED = REGISTRY.counter(
+    "fraud_api_lane_rejected_total", "Tâches refusées, voie pleine.", ("lane",))
+LANE_IN_FLIGHT = REGISTRY.gauge(
+    "fraud_api_lane_in_flight", "Tâches en cours ou en attente dans la voie.", ("lane",))
+LANE_DEFERRALS = REGISTRY.counter(
+    "fraud_api_lane_deferrals_total", "Tranches en masse retardées au profit de la voie interactive.", ("lane",))
+
+
+class Lane:
+    """Voie de scoring : pool de threads dédié, limite d'admission et métriques de latence."""
+
+    def __init__(self, name: str, workers: int, max_queue: int, slo_seconds: float):
+        self.name = name
+        self.max_queue = max_queue
+        self.slo_seconds = slo_seconds
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"lane-{name}")
+        # Modifié uniquement depuis la boucle d'événements : pas de verrou
+        self.active = 0
+        LANE_SLO_TARGET.set(slo_seconds, lane=name)
+
+    def _admit(self):
+        if self.active >= self.max_queue:
+            LANE_REJECTED.inc(lane=self.name)
+            raise HTTPException(status_code=503, detail=f"Voie de scoring '{self.name}' saturée, réessayez.",
+                                headers={"Retry-After": str(max(1, math.ceil(self.slo_seconds)))})
+        self.active += 1
+        LANE_IN_FLIGHT.set(self.active, lane=self.name)
+
+    def _release(self, admitted: float):
+        self.active -= 1
+        LANE_IN_FLIGHT.set(self.active, lane=self.name)
+        duration = time.perf_counter() - admitted
+        LANE_LATENCY.observe(duration, lane=self.name)
+        LANE_SLO.inc(lane=self.name, result="met" if duration <= self.slo_seconds else "missed")
+
+    @contextmanager
+    def admission(self):
+        """
+        Compte une tâche dans la voie le temps du bloc (latence et objectif mesurés sur le bloc).
+        Lève HTTPException 503 si la voie est pleine.
+        """
+        self._admit()
+        admitted = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._release(admitted)
+
+    async def submit(self, fn: Callable, *args):
+        """Exécute fn(*args) dans un thread de la voie (à appeler dans un bloc admission())."""
+        submitted = time.perf_counter()
+        # Contexte copié : les étapes mesurées dans le thread arrivent dans l'en-tête Server-Timing
+        context = contextvars.copy_context()
+
+        def call():
+            LANE_QUEUE_WAIT.observe(time.perf_counter() - submitted, lane=self.name)
+            return context.run(fn, *args)
+
+        return await asyncio.wrap_future(self.executor.submit(call))
+
+    async def run(self, fn: Callable, *args):
+        """Tâche d'une seule étape : fn(*args) dans la voie. Lève HTTPException 503 si la voie est pleine."""
+        with self.admission():
+            return await self.submit(fn, *args)
+
+    async def map_chunks(self, fn: Callable[[pd.DataFrame], Tuple[np.ndarray, ...]], df: pd.DataFrame,
+                         chunk_rows: Optional[int] = None, yield_to: Optional["Lane"] = None):
+        """
+        Applique fn aux tranches de chunk_rows lignes (BULK_CHUNK_ROWS par défaut) de df, qui
+        contient au moins une ligne, et concatène les tableaux retournés. Avant chaque tranche,
+        attend que `yield_to` soit inoccupée (au plus BULK_MAX_DEFER secondes).
+        """
+        chunk_rows = chunk_rows or BULK_CHUNK_ROWS
+        results = []
+        for start in range(0, len(df), chunk_rows):
+            if yield_to is not None and yield_to.active:
+                LANE_DEFERRALS.inc(lane=self.name)
+                deadline = time.perf_counter() + BULK_MAX_DEFER
+                while yield_to.active and time.perf_counter() < deadline:
+                    await asyncio.sleep(DEFER_POLL_INTERVAL)
+            results.append(await self.submit(fn, df.iloc[start:start + chunk_rows]))
+        return tuple(np.concatenate(parts) for parts in zip(*results))
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+
+INTERACTIVE_LANE = Lane("interactive", INTERACTIVE_WORKERS, INTERACTIVE_QUEUE, INTERACTIVE_SLO)
+BULK_LANE = Lane("bulk", BULK_WORKERS, BULK_QUEUE, BULK_SLO)
+
+
+def shutdown_lanes():
+    """Attend la fin des tâches en cours dans les deux voies (arrêt du worker)."""
+    for lane in (INTERACTIVE_LANE, BULK_LANE):
+        lane.shutdown()
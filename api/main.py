@@ -1,11 +1,38 @@
-import joblib
 import pandas as pd
-from pydantic import BaseModel
-from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel, ValidationError
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 import os
+import time
+import logging
+import threading
 import numpy as np
-from typing import List, Dict, Any
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional
+
+from api.metrics import (
+    REGISTRY, CONTENT_TYPE_LATEST, REQUESTS, REQUEST_LATENCY, BATCH_SIZE, PREDICTIONS,
+    ALERT_QUEUE_LENGTH, FEEDBACK_BACKLOG, CACHE_REQUESTS, stage_timer, METRICS_DIR, SnapshotWriter
+)
+from api.scoring import (
+    load_artifacts, records_to_frame, scale_features, predict_scores, confidence_label, DECISION_THRESHOLD,
+    FEATURE_COLUMNS, compute_model_version
+)
+from api.profiling import profile_request
+from api.security import RateLimitMiddleware, charge_rows, check_body_size
+from api.lanes import INTERACTIVE_LANE, BULK_LANE, shutdown_lanes
+from api.audit import AUDIT_LOGGER, AUDIT_ENABLED
+from api.drift import DriftMonitor
+from api.performance import PERFORMANCE_TRACKER, file_lock
+from api.feature_store import FEATURE_STORE
+from api.alert_store import create_alert_store, make_alert
+from api.responses import (
+    FastJSONResponse, CompressionMiddleware, Orient, frame_payload, records_payload, table_response
+)
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+logger = logging.getLogger("fraud_api")
 
 # --- MODÈLES DE DONNÉES (SCHEMAS) ---
 
@@ -40,6 +67,8 @@ class Transaction(BaseModel):
     V27: float
     V28: float
     Amount: float
+    # Identifiant de carte/client (optionnel) : active les variables de vélocité de /predict
+    entity_id: Optional[str] = None
 
 class AlertIn(BaseModel):
     transaction: Transaction
@@ -49,145 +78,402 @@ class AlertIn(BaseModel):
 class BatchTransactions(BaseModel):
     transactions: List[Transaction] # Requis par Dashbord.py
 
+class AlertLabel(BaseModel):
+    alert_id: str
+    user_feedback: int
+
+class BulkFeedbackIn(BaseModel):
+    labels: List[AlertLabel] # Requis par le triage en masse (page Alertes)
+
 # --- INITIALISATION ET CONFIGURATION ---
 
-app = FastAPI(title="Fraud Detection API")
+app = FastAPI(title="Fraud Detection API", default_response_class=FastJSONResponse)
 
-# Configuration CORS pour Streamlit
+# Clé d'API et limitation de débit par client (voir api/security.py)
+app.add_middleware(RateLimitMiddleware)
+
+# Configuration CORS pour Streamlit (origines autorisées : FRAUD_API_CORS_ORIGINS, séparées par des virgules).
+# Ajoutée après le middleware de clé d'API : les réponses 401/429 portent aussi les en-têtes CORS.
+CORS_ORIGINS = [origin.strip() for origin in os.environ.get("FRAUD_API_CORS_ORIGINS", "*").split(",") if origin.strip()]
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
+    allow_origins=CORS_ORIGINS,
+    # Cookies et en-têtes d'authentification du navigateur seulement pour des origines explicites
+    allow_credentials="*" not in CORS_ORIGINS,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["RateLimit", "RateLimit-Policy", "Retry-After"],
 )
 
+# Compression gzip/brotli des réponses volumineuses (voir api/responses.py)
+app.add_middleware(CompressionMiddleware)
+
+HTTP_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Mesure la latence et compte les requêtes par endpoint et code de statut."""
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        # Étiquettes bornées : modèle de chemin de la route, "unmatched" pour toute requête sans
+        # route (404, 405...), et méthode hors de la liste HTTP standard regroupée sous "OTHER".
+        # Un chemin brut créerait une série par URL sondée.
+        endpoint = route.path if route is not None else "unmatched"
+        method = request.method if request.method in HTTP_METHODS else "OTHER"
+        REQUEST_LATENCY.observe(time.perf_counter() - start, endpoint=endpoint, method=method)
+        REQUESTS.inc(endpoint=endpoint, method=method, status=str(status))
+
+@app.middleware("http")
+async def profiling_hooks(request: Request, call_next):
+    """Profilage à la demande et en-tête Server-Timing (voir api/profiling.py)."""
+    return await profile_request(request, call_next)
+
 # --- VARIABLES GLOBALES ET DONNÉES ---
 model = None
 scaler = None
-FEEDBACK_FILE = "feedback_data.csv"
-PENDING_ALERTS_DB: List[Dict[str, Any]] = []
+MODEL_VERSION = None
+FEEDBACK_FILE = os.environ.get("FEEDBACK_FILE", "feedback_data.csv")
+# Jeu de données historique (résolu depuis l'emplacement du module, indépendamment du répertoire courant)
+HISTORICAL_DATA_FILE = os.environ.get(
+    "FRAUD_API_HISTORICAL_DATA",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app", "data", "creditcard_cleaned.csv"))
+HISTORICAL_SAMPLE_ROWS = 10000
+# File des alertes en attente (mémoire, ou SQLite partagée si FRAUD_API_ALERT_DB est défini)
+ALERT_STORE = create_alert_store()
+# Verrou protégeant l'écriture du fichier de feedback
+FEEDBACK_LOCK = threading.Lock()
+# Colonnes du fichier de feedback (sans entity_id : le schéma du fichier reste inchangé)
+TRANSACTION_FIELDS = list(FEATURE_COLUMNS)
+# Cache de l'échantillon historique (tirage déterministe, random_state=42)
+HISTORICAL_DF = None
+# Surveillance de la dérive (None si la référence est absente)
+DRIFT_MONITOR = None
+# Publication des métriques du worker (mode multi-workers, FRAUD_API_METRICS_DIR)
+METRICS_WRITER = None
+
+ALERT_QUEUE_LENGTH.set_function(ALERT_STORE.count)
+
+@contextmanager
+def feedback_transaction():
+    """
+    Section critique d'écriture du feedback ; les écrivains en attente sont exposés dans /metrics.
+    Le verrou de fichier sérialise aussi les workers gunicorn qui ajoutent au même CSV.
+    """
+    FEEDBACK_BACKLOG.inc()
+    try:
+        with FEEDBACK_LOCK, file_lock(FEEDBACK_FILE):
+            yield
+    finally:
+        FEEDBACK_BACKLOG.dec()
 
 # --- FONCTIONS DE CHARGEMENT ---
 
 @app.on_event("startup")
 def load_model():
-    """Charge le modèle et le scaler au démarrage de l'API."""
-    global model, scaler
+    """Charge le modèle et le scaler au démarrage de l'API (sans effet s'ils ont été préchargés)."""
+    global model, scaler, MODEL_VERSION
+    if model is not None and scaler is not None:
+        return
     try:
         model_filename = os.path.join('app', 'models', 'xgb_fraud_detection_model.pkl')
         scaler_filename = os.path.join('app', 'models', 'scaler.pkl')
 
-        model = joblib.load(model_filename)
-        scaler = joblib.load(scaler_filename)
-        print("✅ Modèle et Scaler chargés.")
+        model, scaler = load_artifacts(model_filename, scaler_filename)
+        MODEL_VERSION = compute_model_version(model_filename, scaler_filename)
+        logger.info(f"✅ Modèle et Scaler chargés (version {MODEL_VERSION}).")
     except Exception as e:
-        print(f"❌ Erreur lors du chargement des fichiers: {e}")
+        logger.error(f"❌ Erreur lors du chargement des fichiers: {e}")
         model = None
         scaler = None
+        MODEL_VERSION = None
+
+@app.on_event("startup")
+def load_drift_monitor():
+    """Charge la référence de dérive (api/drift.py) si elle a été construite."""
+    global DRIFT_MONITOR
+    if DRIFT_MONITOR is not None:
+        return
+    try:
+        DRIFT_MONITOR = DriftMonitor.from_file()
+    except Exception as e:
+        logger.error(f"❌ Référence de dérive invalide : {e}")
+        DRIFT_MONITOR = None
+
+@app.on_event("startup")
+def load_performance_snapshot():
+    """Recharge les indicateurs de performance calculés à partir du feedback."""
+    PERFORMANCE_TRACKER.load()
 
-def load_historical_data_df():
-    """Charge un échantillon du DataFrame historique."""
+@app.on_event("startup")
+def start_audit_logger():
+    """Démarre le thread d'écriture du journal d'audit."""
+    if AUDIT_ENABLED:
+        AUDIT_LOGGER.start()
+
+@app.on_event("shutdown")
+def stop_scoring_lanes():
+    """Termine les tâches de scoring en cours avant de vider l'audit et les métriques."""
+    shutdown_lanes()
+
+@app.on_event("shutdown")
+def stop_audit_logger():
+    """Vide la file d'audit sur disque avant l'arrêt."""
+    AUDIT_LOGGER.stop()
+
+@app.on_event("startup")
+def start_metrics_snapshots():
+    """En mode multi-workers, publie périodiquement les compteurs du worker pour /metrics."""
+    global METRICS_WRITER
+    if METRICS_DIR:
+        METRICS_WRITER = SnapshotWriter(REGISTRY, METRICS_DIR)
+        METRICS_WRITER.start()
+
+@app.on_event("shutdown")
+def stop_metrics_snapshots():
+    if METRICS_WRITER is not None:
+        METRICS_WRITER.stop()
+
+def load_historical_data_df(file_path: Optional[str] = None):
+    """Charge un échantillon du DataFrame historique ; DataFrame vide (erreur journalisée) en cas d'échec."""
+    file_path = file_path or HISTORICAL_DATA_FILE
     try:
-        # 🚨 ASSUREZ-VOUS QUE CE CHEMIN EST CORRECT DANS VOTRE DÉPÔT GITHUB
-        file_path = "data/creditcard_cleaned.csv" 
-        df = pd.read_csv(file_path).sample(n=10000, random_state=42)
+        # Types compacts (comme côté Streamlit) : réponses JSON et binaires plus petites
+        dtypes = {**{col: 'float32' for col in FEATURE_COLUMNS}, 'Class': 'uint8'}
+        df = pd.read_csv(file_path, dtype=dtypes, usecols=lambda col: col in dtypes)
+        missing = [col for col in FEATURE_COLUMNS if col not in df.columns]
+        if missing:
+            raise ValueError(f"colonnes manquantes : {', '.join(missing)}")
+        df = df.sample(n=min(HISTORICAL_SAMPLE_ROWS, len(df)), random_state=42)
         if 'Class' not in df.columns:
              df['Class'] = 0 # Fallback si Class est manquante
         return df
     except FileNotFoundError:
-        print(f"❌ Fichier historique non trouvé : {file_path}")
-        return pd.DataFrame()
+        logger.error(f"❌ Fichier historique non trouvé : {file_path}")
+    except Exception as e:
+        logger.error(f"❌ Fichier historique illisible ({file_path}) : {e}")
+    return pd.DataFrame()
+
+def get_historical_df():
+    """Retourne l'échantillon historique, chargé une seule fois puis servi depuis le cache."""
+    global HISTORICAL_DF
+    if HISTORICAL_DF is not None:
+        CACHE_REQUESTS.inc(cache="historical_data", result="hit")
+        return HISTORICAL_DF
+
+    CACHE_REQUESTS.inc(cache="historical_data", result="miss")
+    df = load_historical_data_df()
+    if not df.empty:
+        HISTORICAL_DF = df
+    return df
+
+def preload_shared_state():
+    """
+    Charge le modèle, la référence de dérive et l'échantillon historique dans le processus maître
+    de gunicorn (gunicorn.conf.py, preload_app) : les workers forkés partagent ces objets en
+    lecture seule (copy-on-write) au lieu de les recharger chacun.
+    Retourne la liste des éléments qui n'ont pas pu être préchargés (vide si tout est chargé).
+    """
+    load_model()
+    load_drift_monitor()
+    missing = []
+    if model is None or scaler is None:
+        missing.append("modèle")
+    if DRIFT_MONITOR is None:
+        missing.append("référence de dérive")
+    if get_historical_df().empty:
+        missing.append(f"échantillon historique ({HISTORICAL_DATA_FILE})")
+    return missing
 
 # --- ENDPOINTS D'ÉTAT ET DE DONNÉES ---
 
 @app.get("/health")
 async def get_health():
     """Vérification de l'état de l'API."""
-    return {"status": "ok", "message": "API de détection de fraude en cours d'exécution."}
+    return {
+        "status": "ok",
+        "message": "API de détection de fraude en cours d'exécution.",
+        "model_version": MODEL_VERSION
+    }
+
+@app.get("/metrics")
+def get_metrics():
+    """Expose les métriques de l'API au format texte Prometheus."""
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE_LATEST)
 
 @app.get("/historical_data")
-async def get_historical_data():
-    """Fournit des données historiques pour la visualisation Streamlit (Dashbord et Alertes)."""
-    df = load_historical_data_df()
+async def get_historical_data(request: Request, orient: Orient = "records"):
+    """
+    Fournit des données historiques pour la visualisation Streamlit (Dashbord et Alertes).
+    JSON par défaut ; Arrow ou Parquet selon l'en-tête Accept.
+    """
+    df = get_historical_df()
     if df.empty:
         raise HTTPException(status_code=500, detail="Impossible de charger les données historiques côté API.")
-        
-    return {"data": df.to_dict(orient="records")}
+
+    with stage_timer("/historical_data", "serialize"):
+        return table_response(request, lambda: df, lambda: frame_payload(df, orient))
+
+@app.get("/drift")
+def get_drift(window_seconds: Optional[int] = None):
+    """Dérive des variables et du score (PSI / KS) sur la fenêtre glissante, par rapport à la référence."""
+    if DRIFT_MONITOR is None:
+        raise HTTPException(status_code=503, detail="Référence de dérive absente : lancer 'python -m api.drift'.")
+    return DRIFT_MONITOR.report(window_seconds)
+
+@app.get("/feedback_metrics")
+def get_feedback_metrics():
+    """Précision, taux de faux positifs et calibration issus du feedback (cumul, jours, semaines)."""
+    return PERFORMANCE_TRACKER.summary()
 
 @app.get("/alerts")
-def get_alerts():
-    """Récupère la liste des alertes de fraude non résolues (queue en mémoire)."""
-    return {"alerts": PENDING_ALERTS_DB}
+def get_alerts(request: Request, orient: Orient = "records"):
+    """Récupère la liste des alertes de fraude non résolues (JSON, Arrow ou Parquet selon Accept)."""
+    alerts = ALERT_STORE.list()
+    return table_response(request, lambda: pd.DataFrame(alerts), lambda: records_payload(alerts, orient, key="alerts"))
 
 # --- ENDPOINTS DE PRÉDICTION ---
 
 @app.post("/predict")
-async def predict_transaction(transaction: Transaction):
+async def predict_transaction(transaction: Transaction, request: Request):
     """Prédit une seule transaction (utilisé par Detection.py)."""
-    global model, scaler, PENDING_ALERTS_DB
+    global model, scaler
 
+    charge_rows(request, 1)
     if model is None or scaler is None:
         raise HTTPException(status_code=503, detail="Modèle non chargé.")
 
     try:
-        df = pd.DataFrame([transaction.model_dump()])
-        scaled_features = ['Time', 'Amount']
-        df[scaled_features] = scaler.transform(df[scaled_features])
+        started = time.perf_counter()
+        with stage_timer("/predict", "parse"):
+            df = records_to_frame([transaction.model_dump()])
+        if DRIFT_MONITOR is not None:
+            DRIFT_MONITOR.observe(df.to_numpy())  # Valeurs brutes, avant normalisation
+        # Variables de vélocité de l'entité (informatives : le modèle n'utilise que les 30 variables)
+        velocity = None
+        if transaction.entity_id is not None:
+            with stage_timer("/predict", "enrich"):
+                velocity = FEATURE_STORE.update(transaction.entity_id, transaction.Amount)
+        with stage_timer("/predict", "scale"):
+            scale_features(df, scaler)
+        # Voie interactive : threads dédiés, jamais derrière un lot complet (voir api/lanes.py)
+        with stage_timer("/predict", "inference"):
+            predictions, probabilities = await INTERACTIVE_LANE.run(predict_scores, df, model)
+        AUDIT_LOGGER.submit("/predict", df.to_numpy(), probabilities, predictions,
+                            DECISION_THRESHOLD, MODEL_VERSION, time.perf_counter() - started)
+        if DRIFT_MONITOR is not None:
+            DRIFT_MONITOR.observe_scores(probabilities)
 
-        prediction = model.predict(df)[0]
-        prediction_proba = model.predict_proba(df)[0][1]
-        confidence = "Haute" if prediction_proba > 0.8 else ("Moyenne" if prediction_proba > 0.5 else "Basse")
+        prediction = int(predictions[0])
+        prediction_proba = float(probabilities[0])
+        confidence = confidence_label(prediction_proba)
+        BATCH_SIZE.observe(1, endpoint="/predict")
+        PREDICTIONS.inc(endpoint="/predict", prediction=str(prediction))
 
         # LOGIQUE D'ALERTE : Ajouter à la file d'attente si fraude
         if prediction == 1:
-            alert_entry = transaction.model_dump()
-            alert_entry['model_prediction'] = int(prediction)
-            alert_entry['prediction_score'] = float(prediction_proba)
-            PENDING_ALERTS_DB.append(alert_entry)
-
-        return {
-            "prediction": int(prediction),
-            "probability": float(prediction_proba),
-            "confidence": confidence
-        }
+            ALERT_STORE.add([make_alert(transaction.model_dump(), prediction_proba)])
+
+        with stage_timer("/predict", "serialize"):
+            response = {
+                "prediction": prediction,
+                "probability": prediction_proba,
+                "confidence": confidence
+            }
+            if velocity is not None:
+                response["velocity"] = velocity
+            return response
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur interne lors de la prédiction: {e}")
 
-@app.post("/predict_batch")
-async def predict_batch(batch_data: BatchTransactions):
+# Schéma du corps de /predict_batch pour la documentation OpenAPI : le corps est validé dans la
+# voie bulk (parse_batch_body) et non par FastAPI, dont la validation bloquerait la boucle d'événements
+BATCH_REQUEST_BODY = {
+    "required": True,
+    "content": {"application/json": {"schema": {
+        "type": "object",
+        "required": ["transactions"],
+        "properties": {"transactions": {"type": "array", "items": {"$ref": "#/components/schemas/Transaction"}}},
+    }}},
+}
+
+def parse_batch_body(body: bytes) -> pd.DataFrame:
+    """Valide le corps JSON (schéma BatchTransactions) et construit le DataFrame ; erreurs en 422 comme FastAPI."""
+    with stage_timer("/predict_batch", "parse"):
+        try:
+            batch_data = BatchTransactions.model_validate_json(body)
+        except ValidationError as e:
+            raise RequestValidationError(
+                [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)])
+        return records_to_frame(t.model_dump() for t in batch_data.transactions)
+
+@app.post("/predict_batch", openapi_extra={"requestBody": BATCH_REQUEST_BODY})
+async def predict_batch(request: Request):
     """Prédit un lot de transactions (utilisé par Dashbord.py)."""
-    global model, scaler, PENDING_ALERTS_DB
-    
-    # 1. Préparer les données en DataFrame
-    df = pd.DataFrame([t.model_dump() for t in batch_data.transactions])
-    
-    if model is None or scaler is None:
-        raise HTTPException(status_code=503, detail="Modèle non chargé.")
+    global model, scaler
+    check_body_size(request)  # Lot trop volumineux rejeté avant lecture et analyse du corps
+    body = await request.body()
 
-    try:
-        # 2. Normaliser les variables 'Time' et 'Amount'
-        scaled_features = ['Time', 'Amount']
-        df[scaled_features] = scaler.transform(df[scaled_features])
-
-        # 3. Faire la prédiction par lot
-        predictions = model.predict(df)
-        prediction_probas = model.predict_proba(df)[:, 1]
-        
-        # 4. Gérer les Alertes : Ajouter à la file d'attente (logique simplifiée)
-        for i, (pred, proba) in enumerate(zip(predictions, prediction_probas)):
-            if pred == 1:
-                # 🚨 N'ajoutez que les nouvelles transactions à la file,
-                # mais dans le contexte du Dashboard, on se contente de la prédiction.
-                # L'ajout en masse ici peut être lourd. Si vous voulez un comportement
-                # plus précis, il faudrait un mécanisme de vérification d'unicité.
-                pass 
-                
-        # 5. Retourner la liste des prédictions
-        return {"predictions": [int(p) for p in predictions]}
-    
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erreur interne lors de la prédiction par lot: {e}")
+    # Toute la tâche compte dans la voie bulk (limite d'admission, latence, objectif)
+    with BULK_LANE.admission():
+        # 1. Préparer les données en DataFrame (validation hors de la boucle d'événements)
+        started = time.perf_counter()
+        df = await BULK_LANE.submit(parse_batch_body, body)
+        charge_rows(request, len(df))
+        BATCH_SIZE.observe(len(df), endpoint="/predict_batch")
+
+        if model is None or scaler is None:
+            raise HTTPException(status_code=503, detail="Modèle non chargé.")
+
+        # Lot vide : réponse vide (le scaler refuse un tableau sans ligne)
+        if df.empty:
+            predictions, prediction_probas = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+            return table_response(request,
+                                  lambda: pd.DataFrame({"prediction": predictions, "probability": prediction_probas}),
+                                  lambda: {"predictions": predictions, "probabilities": prediction_probas})
+
+        try:
+            if DRIFT_MONITOR is not None:
+                DRIFT_MONITOR.observe(df.to_numpy())  # Valeurs brutes, avant normalisation
+
+            # 2. Normaliser les variables 'Time' et 'Amount'
+            with stage_timer("/predict_batch", "scale"):
+                scale_features(df, scaler)
+
+            # 3. Faire la prédiction par lot, par tranches dans la voie bulk (cède la place aux /predict)
+            with stage_timer("/predict_batch", "inference"):
+                predictions, prediction_probas = await BULK_LANE.map_chunks(
+                    lambda chunk: predict_scores(chunk, model), df, yield_to=INTERACTIVE_LANE)
+            AUDIT_LOGGER.submit("/predict_batch", df.to_numpy(), prediction_probas, predictions,
+                                DECISION_THRESHOLD, MODEL_VERSION, time.perf_counter() - started)
+            if DRIFT_MONITOR is not None:
+                DRIFT_MONITOR.observe_scores(prediction_probas)
+
+            n_frauds = int(predictions.sum())
+            PREDICTIONS.inc(n_frauds, endpoint="/predict_batch", prediction="1")
+            PREDICTIONS.inc(len(predictions) - n_frauds, endpoint="/predict_batch", prediction="0")
+
+            # 4. Alertes : dans le contexte du Dashboard, on se contente de la prédiction.
+            # L'ajout en masse à la file peut être lourd ; il faudrait un mécanisme
+            # de vérification d'unicité pour n'ajouter que les nouvelles transactions.
+
+            # 5. Retourner les prédictions et les probabilités de fraude
+            with stage_timer("/predict_batch", "serialize"):
+                return table_response(request,
+                                      lambda: pd.DataFrame({"prediction": predictions, "probability": prediction_probas}),
+                                      lambda: {"predictions": predictions, "probabilities": prediction_probas})
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Erreur interne lors de la prédiction par lot: {e}")
 
 
 # --- ENDPOINT DE FEEDBACK (MLOPS) ---
@@ -195,30 +481,69 @@ async def predict_batch(batch_data: BatchTransactions):
 @app.post("/alert")
 def record_alert_feedback(alert_data: AlertIn):
     """Enregistre le feedback (MLOps) et retire l'alerte de la queue."""
-    global PENDING_ALERTS_DB
-    
-    # 1. Enregistrer les données de feedback (MLOps Log)
-    try:
-        transaction_df = pd.DataFrame([alert_data.transaction.model_dump()])
-        transaction_df['model_prediction'] = alert_data.model_prediction
-        transaction_df['user_feedback'] = alert_data.user_feedback
-        
-        header = not os.path.exists(FEEDBACK_FILE)
-        transaction_df.to_csv(FEEDBACK_FILE, mode='a', header=header, index=False)
-    
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Échec de l'enregistrement de la rétroaction MLOps : {e}")
-
-    # 2. Retirer l'alerte de la file d'attente PENDING_ALERTS_DB
-    tx_time = alert_data.transaction.Time
-    tx_amount = alert_data.transaction.Amount
-    
-    # Filtrer la file d'attente pour exclure la transaction traitée
-    new_alerts_db = [
-        alert for alert in PENDING_ALERTS_DB 
-        if not (alert.get('Time') == tx_time and alert.get('Amount') == tx_amount)
-    ]
-    
-    PENDING_ALERTS_DB = new_alerts_db
-
-    return {"status": "success", "message": "Feedback enregistré et alerte retirée de la file."}
\ No newline at end of file
+    transaction_df = pd.DataFrame([alert_data.transaction.model_dump(exclude={'entity_id'})])
+    transaction_df['model_prediction'] = alert_data.model_prediction
+    transaction_df['user_feedback'] = alert_data.user_feedback
+
+    # Écriture et retrait dans la même section critique que /alerts/feedback : la file et le
+    # fichier de feedback restent cohérents face à un triage en masse simultané
+    with feedback_transaction():
+        # 1. Enregistrer les données de feedback (MLOps Log)
+        try:
+            header = not os.path.exists(FEEDBACK_FILE)
+            transaction_df.to_csv(FEEDBACK_FILE, mode='a', header=header, index=False)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Échec de l'enregistrement de la rétroaction MLOps : {e}")
+
+        # 2. Retirer l'alerte de la file d'attente (transaction identifiée par Time et Amount)
+        matched = ALERT_STORE.remove_matching(alert_data.transaction.Time, alert_data.transaction.Amount)
+
+    # 3. Mettre à jour les indicateurs de performance (score connu si l'alerte était en file)
+    score = matched[0].get('prediction_score') if matched else None
+    PERFORMANCE_TRACKER.record([(alert_data.model_prediction, alert_data.user_feedback, score)])
+
+    return {"status": "success", "message": "Feedback enregistré et alerte retirée de la file."}
+
+
+@app.post("/alerts/feedback")
+def record_bulk_feedback(feedback: BulkFeedbackIn):
+    """
+    Enregistre le feedback d'un lot d'alertes en une seule transaction d'écriture.
+    Toutes les lignes sont ajoutées au fichier en un seul appel, puis les alertes sont
+    retirées de la file en une seule opération. Si l'écriture échoue, la file reste inchangée.
+    """
+
+    labels = {item.alert_id: item.user_feedback for item in feedback.labels}
+    if not labels:
+        return {"status": "success", "resolved": 0, "unknown_ids": []}
+
+    with feedback_transaction():
+        resolved = ALERT_STORE.get(labels)
+
+        if resolved:
+            try:
+                feedback_df = pd.DataFrame(resolved, columns=TRANSACTION_FIELDS + ['alert_id', 'model_prediction'])
+                feedback_df['user_feedback'] = feedback_df['alert_id'].map(labels).astype(int)
+                feedback_df = feedback_df.drop(columns=['alert_id'])
+
+                header = not os.path.exists(FEEDBACK_FILE)
+                feedback_df.to_csv(FEEDBACK_FILE, mode='a', header=header, index=False)
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=f"Échec de l'enregistrement de la rétroaction MLOps : {e}")
+
+        resolved_ids = {alert['alert_id'] for alert in resolved}
+        ALERT_STORE.remove(resolved_ids)
+
+    if resolved:
+        PERFORMANCE_TRACKER.record(
+            (alert['model_prediction'], labels[alert['alert_id']], alert.get('prediction_score'))
+            for alert in resolved
+        )
+
+    unknown_ids = [alert_id for alert_id in labels if alert_id not in resolved_ids]
+    return {
+        "status": "success",
+        "resolved": len(resolved_ids),
+        "unknown_ids": unknown_ids,
+        "message": f"{len(resolved_ids)} feedback(s) enregistré(s) et alerte(s) retirée(s) de la file."
+    }
\ No newline at end of file
@@ -0,0 +1,321 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# --- MÉTRIQUES AU FORMAT PROMETHEUS ---
+# Implémentation minimale et toujours active :
+# - pas de verrou : chaque série est un petit objet créé une seule fois (dict.setdefault est
+#   atomique sous le GIL) puis mis à jour par de simples incréments ;
+# - les buckets des histogrammes sont préalloués, une observation coûte un bisect + deux additions.
+# Sous très forte concurrence, un incrément peut exceptionnellement être perdu : acceptable
+# pour du monitoring, au profit d'un coût quasi nul sur le chemin de la requête.
+#
+# Mode multi-processus (plusieurs workers gunicorn) : si FRAUD_API_METRICS_DIR est défini, chaque
+# worker écrit périodiquement ses compteurs et histogrammes dans ce répertoire ; /metrics additionne
+# les fichiers de tous les workers (y compris ceux déjà arrêtés : les compteurs restent monotones).
+# Les jauges restent celles du worker qui répond.
+
+METRICS_DIR = os.environ.get("FRAUD_API_METRICS_DIR")
+SNAPSHOT_INTERVAL = 5.0
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BATCH_SIZE_BUCKETS = (1, 10, 50, 100, 500, 1000, 5000, 10000, 50000)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Compteur monotone, éventuellement étiqueté."""
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        cell = self._values.get(self._key(labels))
+        if cell is None:
+            cell = self._values.setdefault(self._key(labels), [0])
+        cell[0] += amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), [0])[0]
+
+    def dump(self) -> List:
+        return [[list(key), cell[0]] for key, cell in list(self._values.items())]
+
+    @staticmethod
+    def merge(dumps: Iterable[List]) -> Dict[LabelValues, List[float]]:
+        merged: Dict[LabelValues, List[float]] = {}
+        for dump in dumps:
+            for key, value in dump:
+                merged.setdefault(tuple(key), [0])[0] += value
+        return merged
+
+    def render(self, values: Optional[Dict[LabelValues, List[float]]] = None) -> List[str]:
+        lines = self.header()
+        for key, cell in list((self._values if values is None else values).items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(cell[0])}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Jauge : valeur fixée/incrémentée, ou calculée au moment de l'export via une fonction."""
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), callback: Optional[Callable[[], float]] = None):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, List[float]] = {}
+        self._callback = callback
+
+    def set_function(self, callback: Callable[[], float]):
+        self._callback = callback
+
+    def set(self, value: float, **labels):
+        self._values.setdefault(self._key(labels), [0])[0] = value
+
+    def inc(self, amount: float = 1, **labels):
+        self._values.setdefault(self._key(labels), [0])[0] += amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        if self._callback is not None:
+            return self._callback()
+        return self._values.get(self._key(labels), [0])[0]
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        if self._callback is not None:
+            lines.append(f"{self.name} {_format_value(self._callback())}")
+        for key, cell in list(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(cell[0])}")
+        return lines
+
+
+class _HistogramSeries:
+    __slots__ = ("counts", "sum")
+
+    def __init__(self, n_buckets: int):
+        self.counts = [0] * (n_buckets + 1)  # Dernier bucket : +Inf
+        self.sum = 0.0
+
+
+class Histogram(_Metric):
+    """Histogramme à buckets préalloués (bornes supérieures inclusives, comme Prometheus)."""
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelValues, _HistogramSeries] = {}
+
+    def _get(self, labels) -> _HistogramSeries:
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series.setdefault(key, _HistogramSeries(len(self.buckets)))
+        return series
+
+    def observe(self, value: float, **labels):
+        series = self._get(labels)
+        series.counts[bisect_left(self.buckets, value)] += 1
+        series.sum += value
+
+    def snapshot(self, **labels) -> Tuple[List[int], float]:
+        """Retourne (comptes par bucket, somme) d'une série."""
+        series = self._series.get(self._key(labels))
+        if series is None:
+            return [0] * (len(self.buckets) + 1), 0.0
+        return list(series.counts), series.sum
+
+    def dump(self) -> List:
+        return [[list(key), series.counts, series.sum] for key, series in list(self._series.items())]
+
+    def merge(self, dumps: Iterable[List]) -> Dict[LabelValues, _HistogramSeries]:
+        merged: Dict[LabelValues, _HistogramSeries] = {}
+        for dump in dumps:
+            for key, counts, total in dump:
+                series = merged.setdefault(tuple(key), _HistogramSeries(len(self.buckets)))
+                series.counts = [a + b for a, b in zip(series.counts, counts)]
+                series.sum += total
+        return merged
+
+    def render(self, series_by_key: Optional[Dict[LabelValues, _HistogramSeries]] = None) -> List[str]:
+        lines = self.header()
+        for key, series in list((self._series if series_by_key is None else series_by_key).items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series.counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series.sum)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Ensemble des métriques exportées par /metrics."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=(), callback=None) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, callback))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        if METRICS_DIR:
+            return self.render_multiprocess(METRICS_DIR)
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    # --- Mode multi-processus ---
+
+    def write_snapshot(self, directory: str):
+        """Écrit les compteurs et histogrammes de ce processus (écriture atomique)."""
+        snapshot = {
+            name: metric.dump() for name, metric in list(self._metrics.items())
+            if isinstance(metric, (Counter, Histogram))
+        }
+        path = os.path.join(directory, f"metrics-{os.getpid()}.json")
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(snapshot, f, separators=(",", ":"))
+        os.replace(f"{path}.tmp", path)
+
+    def render_multiprocess(self, directory: str) -> str:
+        """Somme des instantanés de tous les workers (celui du processus courant est rafraîchi)."""
+        self.write_snapshot(directory)
+        snapshots = []
+        for entry in os.scandir(directory):
+            if entry.name.startswith("metrics-") and entry.name.endswith(".json"):
+                try:
+                    with open(entry.path) as f:
+                        snapshots.append(json.load(f))
+                except (OSError, ValueError):
+                    continue  # Fichier en cours de remplacement : ignoré pour ce rendu
+
+        lines: List[str] = []
+        for name, metric in list(self._metrics.items()):
+            if isinstance(metric, (Counter, Histogram)):
+                lines.extend(metric.render(metric.merge(s.get(name, []) for s in snapshots)))
+            else:
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class SnapshotWriter:
+    """Thread qui écrit périodiquement l'instantané des métriques du worker (mode multi-processus)."""
+
+    def __init__(self, registry: "Registry", directory: str, interval: float = SNAPSHOT_INTERVAL):
+        self.registry = registry
+        self.directory = directory
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.registry.write_snapshot(self.directory)
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="metrics-snapshot", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self.registry.write_snapshot(self.directory)
+
+
+REGISTRY = Registry()
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+# --- MÉTRIQUES DE L'API ---
+REQUESTS = REGISTRY.counter(
+    "fraud_api_requests_total", "Nombre de requêtes HTTP traitées.", ("endpoint", "method", "status"))
+REQUEST_LATENCY = REGISTRY.histogram(
+    "fraud_api_request_duration_seconds", "Latence des requêtes HTTP par endpoint.", ("endpoint", "method"))
+STAGE_LATENCY = REGISTRY.histogram(
+    "fraud_api_stage_duration_seconds", "Latence par étape (parse, scale, inference, serialize).",
+    ("endpoint", "stage"))
+BATCH_SIZE = REGISTRY.histogram(
+    "fraud_api_batch_size", "Nombre de transactions par requête de prédiction.", ("endpoint",),
+    buckets=BATCH_SIZE_BUCKETS)
+PREDICTIONS = REGISTRY.counter(
+    "fraud_api_predictions_total", "Nombre de transactions scorées, par verdict.", ("endpoint", "prediction"))
+ALERT_QUEUE_LENGTH = REGISTRY.gauge(
+    "fraud_api_alert_queue_length", "Nombre d'alertes en attente de triage.")
+FEEDBACK_BACKLOG = REGISTRY.gauge(
+    "fraud_api_feedback_writer_backlog", "Écritures de feedback en attente ou en cours.")
+CACHE_REQUESTS = REGISTRY.counter(
+    "fraud_api_cache_requests_total", "Accès aux caches de l'API (hit/miss).", ("cache", "result"))
+PROFILED_REQUESTS = REGISTRY.counter(
+    "fraud_api_profiled_requests_total", "Requêtes profilées (mode profilage).", ("endpoint", "trigger"))
+
+# Durées des étapes de la requête en cours (liste fournie par le middleware de profilage),
+# restituées dans l'en-tête Server-Timing. None : rien n'est collecté.
+STAGE_TIMINGS: ContextVar = ContextVar("stage_timings", default=None)
+
+
+@contextmanager
+def stage_timer(endpoint: str, stage: str):
+    """Mesure la durée d'une étape de traitement et l'enregistre dans STAGE_LATENCY."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        STAGE_LATENCY.observe(duration, endpoint=endpoint, stage=stage)
+        timings = STAGE_TIMINGS.get()
+        if timings is not None:
+            timings.append((stage, duration))
@@ -0,0 +1,201 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# --- SUIVI EN LIGNE DES PERFORMANCES À PARTIR DU FEEDBACK ANALYSTE ---
+# Chaque feedback (prédiction du modèle, vraie classe confirmée, score) met à jour des compteurs
+# agrégés : matrice de confusion et bins de calibration du score, pour la période cumulée et pour
+# des fenêtres fixes journalières et hebdomadaires (UTC). Seuls les compteurs sont conservés ;
+# un instantané JSON compact est réécrit à chaque mise à jour, si bien que le Dashboard lit un
+# résumé de taille constante sans relire feedback_data.csv.
+# Avec plusieurs workers, l'instantané est l'état partagé : chaque mise à jour le relit (s'il a
+# changé) sous un verrou de fichier, applique le feedback puis le réécrit.
+
+try:
+    import fcntl
+    FCNTL_EXISTS = True
+except ImportError:  # Windows : pas de verrou inter-processus (un seul worker)
+    FCNTL_EXISTS = False
+
+logger = logging.getLogger("fraud_api.performance")
+
+PERFORMANCE_FILE = os.environ.get("FRAUD_API_PERFORMANCE_FILE", "performance_snapshot.json")
+N_CALIBRATION_BINS = 10
+MAX_DAILY_WINDOWS = 60
+MAX_WEEKLY_WINDOWS = 26
+
+
+def window_keys(timestamp: float) -> Tuple[str, str]:
+    """Clés des fenêtres journalière (AAAA-MM-JJ) et hebdomadaire ISO (AAAA-Www) d'un instant."""
+    moment = datetime.fromtimestamp(timestamp, tz=timezone.utc)
+    year, week, _ = moment.isocalendar()
+    return moment.strftime("%Y-%m-%d"), f"{year}-W{week:02d}"
+
+
+@contextmanager
+def file_lock(path: str):
+    """Verrou exclusif inter-processus sur <path>.lock."""
+    if not FCNTL_EXISTS:
+        yield
+        return
+    with open(f"{path}.lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _ratio(numerator: int, denominator: int) -> Optional[float]:
+    return round(numerator / denominator, 4) if denominator else None
+
+
+class WindowStats:
+    """Compteurs d'une fenêtre : matrice de confusion et calibration (n, somme des scores, fraudes par bin)."""
+    __slots__ = ("tp", "fp", "tn", "fn", "calibration")
+
+    def __init__(self, tp=0, fp=0, tn=0, fn=0, calibration=None):
+        self.tp, self.fp, self.tn, self.fn = tp, fp, tn, fn
+        self.calibration = calibration or [[0, 0.0, 0] for _ in range(N_CALIBRATION_BINS)]
+
+    def update(self, prediction: int, truth: int, score: Optional[float]):
+        if prediction == 1:
+            if truth == 1:
+                self.tp += 1
+            else:
+                self.fp += 1
+        elif truth == 1:
+            self.fn += 1
+        else:
+            self.tn += 1
+
+        if score is not None:
+            cell = self.calibration[min(int(score * N_CALIBRATION_BINS), N_CALIBRATION_BINS - 1)]
+            cell[0] += 1
+            cell[1] += score
+            cell[2] += truth
+
+    def summary(self) -> Dict:
+        """Indicateurs dérivés des compteurs (O(1))."""
+        # Ratios définis dès que leur dénominateur est non nul (rappel = 1.0 si tp > 0 et fn = 0).
+        # Le feedback porte surtout sur des alertes (prédictions = 1) : tant qu'aucune transaction
+        # non alertée n'est revue (reviewed_non_alerts = 0), fn = tn = 0 et le rappel comme le
+        # taux de faux positifs valent 1.0 par construction ; le Dashboard le signale.
+        return {
+            "n": self.tp + self.fp + self.tn + self.fn,
+            "tp": self.tp, "fp": self.fp, "tn": self.tn, "fn": self.fn,
+            "reviewed_non_alerts": self.tn + self.fn,
+            "precision": _ratio(self.tp, self.tp + self.fp),
+            "false_positive_rate": _ratio(self.fp, self.fp + self.tn),
+            "recall": _ratio(self.tp, self.tp + self.fn),
+            "calibration": [
+                {
+                    "bin": [i / N_CALIBRATION_BINS, (i + 1) / N_CALIBRATION_BINS],
+                    "n": n,
+                    "mean_score": _ratio(score_sum, n),
+                    "observed_fraud_rate": _ratio(frauds, n),
+                }
+                for i, (n, score_sum, frauds) in enumerate(self.calibration) if n
+            ],
+        }
+
+    def to_dict(self) -> Dict:
+        return {"tp": self.tp, "fp": self.fp, "tn": self.tn, "fn": self.fn, "calibration": self.calibration}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "WindowStats":
+        return cls(data["tp"], data["fp"], data["tn"], data["fn"], data["calibration"])
+
+
+class PerformanceTracker:
+    """Agrégats cumulés, journaliers et hebdomadaires, mis à jour à chaque feedback et persistés en JSON."""
+
+    def __init__(self, path: str = PERFORMANCE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self.all_time = WindowStats()
+        self.daily: Dict[str, WindowStats] = {}
+        self.weekly: Dict[str, WindowStats] = {}
+        self._signature = None
+
+    def _refresh(self):
+        """Relit l'instantané s'il a été modifié (par ce worker ou un autre). Appelé sous self._lock."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature == self._signature:
+            return
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            self.all_time = WindowStats.from_dict(data["all_time"])
+            self.daily = {k: WindowStats.from_dict(v) for k, v in data["daily"].items()}
+            self.weekly = {k: WindowStats.from_dict(v) for k, v in data["weekly"].items()}
+            self._signature = signature
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"❌ Instantané de performance illisible ({self.path}) : {e}")
+
+    def load(self):
+        """Recharge le dernier instantané (les compteurs survivent aux redémarrages)."""
+        with self._lock:
+            self._refresh()
+
+    def record(self, events: Iterable[Tuple[int, int, Optional[float]]], timestamp: Optional[float] = None):
+        """Ajoute des feedbacks (prédiction, vraie classe, score) et réécrit l'instantané."""
+        day, week = window_keys(time.time() if timestamp is None else timestamp)
+        with self._lock, file_lock(self.path):
+            self._refresh()
+            daily = self.daily.setdefault(day, WindowStats())
+            weekly = self.weekly.setdefault(week, WindowStats())
+            for prediction, truth, score in events:
+                for stats in (self.all_time, daily, weekly):
+                    stats.update(int(prediction), int(truth), score)
+            _trim(self.daily, MAX_DAILY_WINDOWS)
+            _trim(self.weekly, MAX_WEEKLY_WINDOWS)
+            self._persist(self._snapshot())
+
+    def _snapshot(self) -> Dict:
+        return {
+            "updated_at": time.time(),
+            "all_time": self.all_time.to_dict(),
+            "daily": {k: v.to_dict() for k, v in self.daily.items()},
+            "weekly": {k: v.to_dict() for k, v in self.weekly.items()},
+        }
+
+    def _persist(self, snapshot: Dict):
+        """Écriture atomique (fichier temporaire puis os.replace)."""
+        try:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(snapshot, f, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+            stat = os.stat(self.path)
+            self._signature = (stat.st_mtime_ns, stat.st_size)
+        except OSError as e:
+            logger.error(f"❌ Impossible d'écrire l'instantané de performance : {e}")
+
+    def summary(self, n_daily: int = 14, n_weekly: int = 8) -> Dict:
+        """Résumé des indicateurs : cumul, dernières fenêtres journalières et hebdomadaires."""
+        with self._lock:
+            self._refresh()
+            return {
+                "all_time": self.all_time.summary(),
+                "daily": [dict(window=k, **self.daily[k].summary()) for k in sorted(self.daily)[-n_daily:]],
+                "weekly": [dict(window=k, **self.weekly[k].summary()) for k in sorted(self.weekly)[-n_weekly:]],
+            }
+
+
+def _trim(windows: Dict[str, WindowStats], max_windows: int):
+    """Ne conserve que les max_windows fenêtres les plus récentes (clés triables chronologiquement)."""
+    for key in sorted(windows)[:-max_windows]:
+        del windows[key]
+
+
+PERFORMANCE_TRACKER = PerformanceTracker()
@@ -0,0 +1,162 @@
+import hmac
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from typing import List, Optional, Tuple
+
+from api.metrics import PROFILED_REQUESTS, STAGE_TIMINGS
+
+# --- PROFILAGE À LA DEMANDE DES ENDPOINTS CRITIQUES ---
+# Désactivé par défaut. Deux déclencheurs :
+# - FRAUD_API_PROFILE=1 : une fraction FRAUD_API_PROFILE_SAMPLE_RATE des requêtes est profilée ;
+# - en-tête X-Profile-Token égal à FRAUD_API_ADMIN_TOKEN : la requête est profilée.
+# Les requêtes concernées reçoivent un en-tête Server-Timing (durées des étapes, en ms) et les
+# requêtes profilées écrivent un artefact dans FRAUD_API_PROFILE_DIR (nombre de fichiers borné).
+# pyinstrument (profileur statistique, sortie HTML) est utilisé s'il est installé, sinon cProfile (.pstats).
+#
+# Un seul profil à la fois par processus (deux profileurs ne peuvent pas se superposer sur le
+# thread de la boucle d'événements) : une requête qui arrive pendant un profilage est traitée sans
+# être profilée ; pour un administrateur, Server-Timing l'indique (profile;desc="busy").
+# Seul le thread de la boucle d'événements est profilé : le calcul du modèle, exécuté dans les
+# threads des voies de scoring (api/lanes.py), n'apparaît pas dans l'artefact. Sa durée reste
+# dans Server-Timing (étape inference) et dans les métriques des voies.
+
+try:
+    from pyinstrument import Profiler as StatisticalProfiler
+    PYINSTRUMENT_EXISTS = True
+except ImportError:
+    import cProfile
+    PYINSTRUMENT_EXISTS = False
+
+logger = logging.getLogger("fraud_api.profiling")
+
+PROFILE_ENABLED = os.environ.get("FRAUD_API_PROFILE", "0") == "1"
+PROFILE_SAMPLE_RATE = float(os.environ.get("FRAUD_API_PROFILE_SAMPLE_RATE", "0.01"))
+PROFILE_DIR = os.environ.get("FRAUD_API_PROFILE_DIR", "profiles")
+PROFILE_MAX_FILES = int(os.environ.get("FRAUD_API_PROFILE_MAX_FILES", "50"))
+PROFILE_ENDPOINTS = set(os.environ.get("FRAUD_API_PROFILE_ENDPOINTS", "/predict,/predict_batch").split(","))
+ADMIN_TOKEN = os.environ.get("FRAUD_API_ADMIN_TOKEN")
+ADMIN_HEADER = "x-profile-token"
+
+# Intervalle d'échantillonnage de pyinstrument (secondes)
+SAMPLING_INTERVAL = 0.0005
+# Tenu pendant un profilage (acquisition non bloquante : jamais d'attente sur le chemin de la requête)
+PROFILE_LOCK = threading.Lock()
+
+
+def is_admin_request(request) -> bool:
+    """Vrai si la requête porte un jeton d'administration valide."""
+    token = request.headers.get(ADMIN_HEADER)
+    return bool(ADMIN_TOKEN and token and hmac.compare_digest(token, ADMIN_TOKEN))
+
+
+class RequestProfiler:
+    """
+    Profile le thread de la boucle d'événements pendant une requête et écrit l'artefact sur
+    disque. Une seule instance active à la fois (PROFILE_LOCK).
+    """
+
+    def __init__(self):
+        if PYINSTRUMENT_EXISTS:
+            # async_mode='disabled' : l'endpoint s'exécute dans une tâche fille du middleware,
+            # on échantillonne donc tout le thread de la boucle d'événements.
+            self._profiler = StatisticalProfiler(interval=SAMPLING_INTERVAL, async_mode="disabled")
+        else:
+            self._profiler = cProfile.Profile()
+
+    def start(self):
+        if PYINSTRUMENT_EXISTS:
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+
+    def stop(self):
+        if PYINSTRUMENT_EXISTS:
+            self._profiler.stop()
+        else:
+            self._profiler.disable()
+
+    def save(self, endpoint: str) -> Optional[str]:
+        """Écrit l'artefact (HTML pyinstrument ou pstats) et applique la rétention. Retourne le nom du fichier."""
+        try:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            slug = endpoint.strip("/").replace("/", "_") or "root"
+            stem = f"{time.strftime('%Y%m%dT%H%M%S')}-{slug}-{uuid.uuid4().hex[:8]}"
+            if PYINSTRUMENT_EXISTS:
+                filename = f"{stem}.html"
+                with open(os.path.join(PROFILE_DIR, filename), "w", encoding="utf-8") as f:
+                    f.write(self._profiler.output_html())
+            else:
+                filename = f"{stem}.pstats"
+                self._profiler.dump_stats(os.path.join(PROFILE_DIR, filename))
+            enforce_retention()
+            return filename
+        except OSError as e:
+            logger.error(f"❌ Impossible d'écrire le profil : {e}")
+            return None
+
+
+def enforce_retention(directory: str = PROFILE_DIR, max_files: int = PROFILE_MAX_FILES):
+    """Supprime les artefacts les plus anciens au-delà de max_files."""
+    entries = [entry for entry in os.scandir(directory) if entry.is_file()]
+    if len(entries) <= max_files:
+        return
+    entries.sort(key=lambda entry: entry.stat().st_mtime)
+    for entry in entries[:len(entries) - max_files]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def format_server_timing(timings: List[Tuple[str, float]], total: float, artifact: Optional[str] = None) -> str:
+    """Construit l'en-tête Server-Timing (durées en millisecondes)."""
+    parts = [f"{stage};dur={duration * 1000:.3f}" for stage, duration in timings]
+    parts.append(f"total;dur={total * 1000:.3f}")
+    if artifact:
+        parts.append(f'profile;desc="{artifact}"')
+    return ", ".join(parts)
+
+
+async def profile_request(request, call_next):
+    """
+    Middleware : collecte les durées d'étapes et, si la requête est échantillonnée
+    (ou demandée par un administrateur), la profile.
+    """
+    endpoint = request.url.path
+    admin = is_admin_request(request)
+    if endpoint not in PROFILE_ENDPOINTS or not (PROFILE_ENABLED or admin):
+        return await call_next(request)
+
+    profiled = admin or random.random() < PROFILE_SAMPLE_RATE
+    busy = profiled and not PROFILE_LOCK.acquire(blocking=False)
+    profiled = profiled and not busy
+    timings: List[Tuple[str, float]] = []
+    token = STAGE_TIMINGS.set(timings)
+    artifact = None
+    start = time.perf_counter()
+    try:
+        if profiled:
+            try:
+                profiler = RequestProfiler()
+                profiler.start()
+                try:
+                    response = await call_next(request)
+                finally:
+                    profiler.stop()
+                artifact = profiler.save(endpoint)
+            finally:
+                PROFILE_LOCK.release()
+            PROFILED_REQUESTS.inc(endpoint=endpoint, trigger="admin" if admin else "sample")
+        else:
+            response = await call_next(request)
+    finally:
+        STAGE_TIMINGS.reset(token)
+
+    if busy and admin:
+        artifact = "busy"
+    response.headers["Server-Timing"] = format_server_timing(timings, time.perf_counter() - start, artifact)
+    return response
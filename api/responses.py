@@ -0,0 +1,293 @@
+import gzip
+import io
+import json
+import logging
+import os
+import zlib
+from typing import Any, Callable, Dict, List, Literal, Optional
+
+import numpy as np
+import pandas as pd
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+# --- SÉRIALISATION RAPIDE DES RÉPONSES ---
+# FastJSONResponse sérialise avec orjson (tableaux NumPy compris, sans conversion en listes Python).
+# Les endpoints volumineux retournent directement une FastJSONResponse : FastAPI ne passe alors
+# pas le contenu par jsonable_encoder, qui recopie chaque dictionnaire et chaque valeur.
+# Sans orjson, repli sur json de la bibliothèque standard (mêmes sorties, plus lent).
+#
+# Forme des réponses tabulaires (paramètre `orient`) :
+# - "records" : liste d'objets {colonne: valeur} (forme historique) ;
+# - "split"   : lignes en listes de valeurs et noms de colonnes une seule fois dans "columns",
+#   comme DataFrame.to_dict(orient="split") sans l'index.
+# La clé des lignes ("data", "alerts") est la même dans les deux formes : côté client,
+# pd.DataFrame(payload[cle], columns=payload.get("columns")) lit indifféremment l'une ou l'autre.
+#
+# Négociation de contenu (en-tête Accept) pour les réponses tabulaires : Arrow IPC (flux) ou
+# Parquet si pyarrow est installé, JSON sinon. Les réponses dont le corps dépasse
+# COMPRESSION_MIN_SIZE sont compressées (brotli si disponible, sinon gzip) selon Accept-Encoding ;
+# les corps de requête envoyés avec Content-Encoding: gzip sont décodés.
+
+try:
+    import orjson
+    ORJSON_EXISTS = True
+except ImportError:
+    ORJSON_EXISTS = False
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_EXISTS = True
+except ImportError:
+    PYARROW_EXISTS = False
+
+try:
+    import brotli
+    BROTLI_EXISTS = True
+except ImportError:
+    BROTLI_EXISTS = False
+
+logger = logging.getLogger("fraud_api.responses")
+
+Orient = Literal["records", "split"]
+
+JSON_MEDIA_TYPE = "application/json"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+# Formats binaires déjà compressés (zstd interne) : pas de recompression HTTP
+PRECOMPRESSED_MEDIA_TYPES = (ARROW_MEDIA_TYPE, PARQUET_MEDIA_TYPE)
+
+COMPRESSION_MIN_SIZE = int(os.environ.get("FRAUD_API_COMPRESSION_MIN_SIZE", "1024"))
+# Niveaux rapides : la compression s'exécute sur le chemin de la requête (JSON de 3 Mo :
+# ~40 ms en brotli 1, ~70 ms en gzip 1, pour un gain de taille faible aux niveaux supérieurs)
+GZIP_LEVEL = int(os.environ.get("FRAUD_API_GZIP_LEVEL", "1"))
+BROTLI_QUALITY = int(os.environ.get("FRAUD_API_BROTLI_QUALITY", "1"))
+# Au-delà, la compression est faite dans le pool de threads pour ne pas bloquer la boucle d'événements
+THREADED_COMPRESSION_SIZE = 256 * 1024
+# Borne des corps de requête compressés une fois décodés (protection contre les archives piégées)
+MAX_DECOMPRESSED_BODY = int(os.environ.get("FRAUD_API_MAX_REQUEST_BODY_MB", "64")) * 1024 * 1024
+
+
+def _default(obj):
+    """Types NumPy pour le repli json (orjson les gère nativement)."""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Type non sérialisable en JSON : {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """Sérialise en JSON compact (UTF-8)."""
+    if ORJSON_EXISTS:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":"),
+                      default=_default).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """Réponse JSON sérialisée par orjson (classe de réponse par défaut de l'API)."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def frame_payload(df: pd.DataFrame, orient: Orient = "records", key: str = "data") -> Dict[str, Any]:
+    """Contenu JSON d'un DataFrame dans la forme demandée, sous la clé `key`."""
+    if orient == "split":
+        # Colonnes numériques : la matrice NumPy (contiguë en C, exigé par orjson) est sérialisée telle quelle
+        values = df.to_numpy()
+        return {
+            "columns": list(df.columns),
+            key: values.tolist() if values.dtype == object else np.ascontiguousarray(values),
+        }
+    return {key: df.to_dict(orient="records")}
+
+
+def records_payload(records: List[Dict[str, Any]], orient: Orient = "records", key: str = "data") -> Dict[str, Any]:
+    """Contenu JSON d'une liste de dictionnaires (colonnes : union des clés, dans l'ordre d'apparition)."""
+    if orient != "split":
+        return {key: records}
+    columns = list(dict.fromkeys(name for record in records for name in record))
+    return {"columns": columns, key: [[record.get(c) for c in columns] for record in records]}
+
+
+# --- FORMATS BINAIRES (ARROW / PARQUET) ---
+
+def _accepted(header: Optional[str]) -> List[str]:
+    """Types acceptés par ordre de préférence (paramètre q, ordre d'apparition à q égal ; q=0 exclu)."""
+    entries = []
+    for position, part in enumerate((header or "").split(",")):
+        media_type, *params = [item.strip() for item in part.split(";")]
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if media_type and quality > 0:
+            entries.append((-quality, position, media_type.lower()))
+    return [media_type for _, _, media_type in sorted(entries)]
+
+
+def negotiate_media_type(request: Request) -> str:
+    """Format de réponse tabulaire retenu d'après l'en-tête Accept (JSON par défaut)."""
+    for media_type in _accepted(request.headers.get("accept")):
+        if media_type in PRECOMPRESSED_MEDIA_TYPES and PYARROW_EXISTS:
+            return media_type
+        if media_type in (JSON_MEDIA_TYPE, "application/*", "*/*"):
+            return JSON_MEDIA_TYPE
+    return JSON_MEDIA_TYPE
+
+
+def frame_to_arrow(df: pd.DataFrame) -> bytes:
+    """Flux Arrow IPC (tampons compressés en zstd)."""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = io.BytesIO()
+    options = pa.ipc.IpcWriteOptions(compression="zstd")
+    with pa.ipc.new_stream(sink, table.schema, options=options) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def frame_to_parquet(df: pd.DataFrame) -> bytes:
+    """Fichier Parquet (zstd)."""
+    sink = io.BytesIO()
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), sink, compression="zstd")
+    return sink.getvalue()
+
+
+def table_response(request: Request, to_frame: Callable[[], pd.DataFrame], to_json: Callable[[], Any]) -> Response:
+    """
+    Réponse tabulaire négociée : Arrow ou Parquet construits par to_frame(), sinon JSON (to_json()).
+    Seule la forme retenue est construite.
+    """
+    media_type = negotiate_media_type(request)
+    headers = {"Vary": "Accept"}
+    if media_type == ARROW_MEDIA_TYPE:
+        return Response(frame_to_arrow(to_frame()), media_type=ARROW_MEDIA_TYPE, headers=headers)
+    if media_type == PARQUET_MEDIA_TYPE:
+        return Response(frame_to_parquet(to_frame()), media_type=PARQUET_MEDIA_TYPE, headers=headers)
+    return FastJSONResponse(to_json(), headers=headers)
+
+
+# --- COMPRESSION HTTP ---
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Codage retenu d'après Accept-Encoding : br si la bibliothèque brotli est installée, sinon gzip."""
+    accepted = _accepted(accept_encoding)
+    if BROTLI_EXISTS and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+def decompress(body: bytes, encoding: str) -> bytes:
+    """
+    Décode un corps de requête gzip, sans jamais produire plus de MAX_DECOMPRESSED_BODY octets.
+    ValueError si le codage n'est pas gzip ou si le résultat est trop volumineux.
+    """
+    if encoding != "gzip":
+        raise ValueError(f"Codage de requête non supporté : {encoding}")
+    data = zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(body, MAX_DECOMPRESSED_BODY + 1)
+    if len(data) > MAX_DECOMPRESSED_BODY:
+        raise ValueError("Corps de requête décompressé trop volumineux.")
+    return data
+
+
+class CompressionMiddleware:
+    """
+    Middleware ASGI : décode les corps de requête compressés et compresse les réponses d'un seul
+    tenant dont le corps atteint minimum_size. Les réponses en flux (plusieurs messages body),
+    déjà codées ou binaires précompressées sont transmises telles quelles.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_headers = Headers(scope=scope)
+
+        content_encoding = request_headers.get("content-encoding", "").strip().lower()
+        if content_encoding and content_encoding != "identity":
+            scope, receive = await self._decoded_request(scope, receive, content_encoding)
+            if receive is None:
+                await Response("Corps de requête compressé invalide ou trop volumineux.", status_code=400)(
+                    scope, receive, send)
+                return
+
+        encoding = choose_encoding(request_headers.get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+
+        async def send_compressed(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] == "http.response.body" and start_message is not None:
+                start, start_message = start_message, None
+                body = message.get("body", b"")
+                headers = MutableHeaders(raw=start["headers"])
+                content_type = headers.get("content-type", "")
+                if (not message.get("more_body", False) and len(body) >= self.minimum_size
+                        and "content-encoding" not in headers
+                        and not content_type.startswith(PRECOMPRESSED_MEDIA_TYPES)):
+                    if len(body) >= THREADED_COMPRESSION_SIZE:
+                        body = await run_in_threadpool(compress, body, encoding)
+                    else:
+                        body = compress(body, encoding)
+                    headers["Content-Encoding"] = encoding
+                    headers["Content-Length"] = str(len(body))
+                    headers.add_vary_header("Accept-Encoding")
+                    message = {**message, "body": body}
+                await send(start)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
+
+    @staticmethod
+    async def _decoded_request(scope, receive, encoding):
+        """Lit et décode le corps ; retourne (scope, receive) pour l'application, receive=None si invalide."""
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        try:
+            body = decompress(b"".join(chunks), encoding)
+        except (ValueError, OSError, zlib.error) as e:
+            logger.warning(f"Requête {scope.get('path')} rejetée : {e}")
+            return scope, None
+
+        headers = [(k, v) for k, v in scope["headers"] if k not in (b"content-encoding", b"content-length")]
+        headers.append((b"content-length", str(len(body)).encode()))
+        sent = False
+
+        async def receive_decoded():
+            nonlocal sent
+            if sent:
+                return await receive()  # Attente de la déconnexion du client
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        return {**scope, "headers": headers}, receive_decoded
@@ -0,0 +1,60 @@
+import hashlib
+import joblib
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Iterable, Tuple
+
+# --- LOGIQUE DE SCORING PARTAGÉE ---
+# Étapes du scoring d'un lot de transactions, séparées pour pouvoir être mesurées
+# individuellement : parse (construction du DataFrame), scale, inference.
+
+FEATURE_COLUMNS = [
+    "Time", "V1", "V2", "V3", "V4", "V5", "V6", "V7", "V8", "V9", "V10",
+    "V11", "V12", "V13", "V14", "V15", "V16", "V17", "V18", "V19", "V20",
+    "V21", "V22", "V23", "V24", "V25", "V26", "V27", "V28", "Amount"
+]
+SCALED_FEATURES = ['Time', 'Amount']
+
+# Seuil de décision utilisé par XGBClassifier.predict() (probabilité > 0.5)
+DECISION_THRESHOLD = 0.5
+
+
+def load_artifacts(model_path: str, scaler_path: str) -> Tuple[Any, Any]:
+    """Charge le modèle XGBoost et le scaler depuis le disque."""
+    return joblib.load(model_path), joblib.load(scaler_path)
+
+
+def compute_model_version(*paths: str) -> str:
+    """Empreinte courte (SHA-256) des fichiers du modèle, utilisée comme version par les clients (caches)."""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def records_to_frame(records: Iterable[Dict[str, float]]) -> pd.DataFrame:
+    """Construit le DataFrame des variables du modèle, dans l'ordre attendu par celui-ci."""
+    return pd.DataFrame.from_records(list(records), columns=FEATURE_COLUMNS)
+
+
+def scale_features(df: pd.DataFrame, scaler) -> pd.DataFrame:
+    """Normalise les variables 'Time' et 'Amount' (en place) comme à l'entraînement."""
+    df[SCALED_FEATURES] = scaler.transform(df[SCALED_FEATURES])
+    return df
+
+
+def predict_scores(df: pd.DataFrame, model, threshold: float = DECISION_THRESHOLD) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Retourne (prédictions, probabilités de fraude) avec un seul passage dans le modèle :
+    la prédiction est déduite de la probabilité, comme le fait XGBClassifier.predict().
+    """
+    probabilities = model.predict_proba(df)[:, 1]
+    predictions = (probabilities > threshold).astype(np.int64)
+    return predictions, probabilities
+
+
+def confidence_label(probability: float) -> str:
+    """Niveau de confiance affiché pour une prédiction individuelle."""
+    return "Haute" if probability > 0.8 else ("Moyenne" if probability > 0.5 else "Basse")
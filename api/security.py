@@ -0,0 +1,321 @@
+import hashlib
+import json
+import logging
+import math
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+
+from api.metrics import REGISTRY
+
+# --- AUTHENTIFICATION PAR CLÉ D'API ET LIMITATION DE DÉBIT PAR CLIENT ---
+# Clés acceptées (aucune configurée : API ouverte, comportement historique) :
+# - FRAUD_API_KEYS_FILE : fichier JSON {"clients": [{"name": ..., "key_sha256": ...,
+#   "requests_per_minute": ..., "rows_per_minute": ...}, ...]} ; seules les empreintes SHA-256
+#   des clés y figurent (python -m api.security <clé> affiche l'empreinte). Le fichier est relu
+#   quand il change (au plus toutes les KEYS_RELOAD_INTERVAL secondes) ;
+# - FRAUD_API_KEYS : "nom:clé,nom:clé" (limites par défaut), pratique pour un seul client.
+# Les clés sont gardées en mémoire, indexées par empreinte : la vérification d'une requête
+# coûte un SHA-256 et une recherche dans un dictionnaire.
+#
+# Chaque client a deux seaux à jetons : requêtes et lignes scorées (1 pour /predict, la taille
+# du lot pour /predict_batch). Capacité = quota par minute, remplissage continu. Une requête
+# hors quota reçoit 429 avec Retry-After ; toutes les réponses portent les en-têtes RateLimit
+# et RateLimit-Policy (draft-ietf-httpapi-ratelimit-headers). Les seaux sont propres à chaque
+# worker : les quotas sont divisés par FRAUD_API_WORKERS (renseigné par gunicorn.conf.py), mais
+# la capacité d'un seau de lignes ne descend jamais sous min(rows_per_minute, MAX_BATCH_ROWS) :
+# un lot autorisé par le quota global tient toujours dans le seau d'un seul worker.
+#
+# Un lot plus grand que la capacité du seau reçoit 413. Quand Content-Length est connu, le
+# contrôle a lieu avant la lecture du corps : au-delà de capacité x MAX_ROW_BYTES octets, aucun
+# lot autorisé ne peut tenir dans le corps (le nombre exact de lignes est vérifié après analyse).
+
+logger = logging.getLogger("fraud_api.security")
+
+API_KEY_HEADER = "x-api-key"
+PUBLIC_PATHS = frozenset({"/health", "/metrics", "/docs", "/redoc", "/openapi.json"})
+KEYS_FILE = os.environ.get("FRAUD_API_KEYS_FILE")
+KEYS_ENV = os.environ.get("FRAUD_API_KEYS", "")
+KEYS_RELOAD_INTERVAL = 5.0
+DEFAULT_REQUESTS_PER_MINUTE = int(os.environ.get("FRAUD_API_RATE_REQUESTS", "600"))
+DEFAULT_ROWS_PER_MINUTE = int(os.environ.get("FRAUD_API_RATE_ROWS", "300000"))
+WORKERS = max(1, int(os.environ.get("FRAUD_API_WORKERS", "1")))
+MAX_BATCH_ROWS = int(os.environ.get("FRAUD_API_MAX_BATCH_ROWS", "50000"))
+MAX_ROW_BYTES = 2048  # Transaction JSON de 30 variables, indentation comprise, très au-delà du cas réel
+CLIENT_FIELDS = ("name", "requests_per_minute", "rows_per_minute")
+
+AUTH_FAILURES = REGISTRY.counter(
+    "fraud_api_auth_failures_total", "Requêtes refusées faute de clé d'API valide.", ("reason",))
+RATE_LIMITED = REGISTRY.counter(
+    "fraud_api_rate_limited_total", "Requêtes refusées par la limitation de débit.", ("client", "limit"))
+
+
+def key_digest(key: str) -> str:
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+class TokenBucket:
+    """Seau à jetons : capacité `capacity`, remplissage de `rate` jetons par seconde."""
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def consume(self, amount: float) -> float:
+        """Retire `amount` jetons si possible ; retourne 0, ou le délai (s) avant qu'ils soient disponibles."""
+        with self._lock:
+            self._refill(time.monotonic())
+            if amount <= self.tokens:
+                self.tokens -= amount
+                return 0.0
+            return (amount - self.tokens) / self.rate
+
+    def state(self) -> Tuple[int, int]:
+        """(jetons restants, secondes avant remplissage complet)."""
+        with self._lock:
+            self._refill(time.monotonic())
+            return int(self.tokens), math.ceil((self.capacity - self.tokens) / self.rate)
+
+
+@dataclass
+class Client:
+    name: str
+    requests_per_minute: int = DEFAULT_REQUESTS_PER_MINUTE
+    rows_per_minute: int = DEFAULT_ROWS_PER_MINUTE
+
+    def __post_init__(self):
+        # Quotas de ce worker ; au moins un lot maximal de lignes (dans la limite du quota
+        # global du client) doit tenir dans le seau
+        min_rows = min(self.rows_per_minute, MAX_BATCH_ROWS)
+        self.requests = TokenBucket(max(1.0, self.requests_per_minute / WORKERS), self.requests_per_minute / WORKERS / 60)
+        self.rows = TokenBucket(max(1.0, min_rows, self.rows_per_minute / WORKERS), self.rows_per_minute / WORKERS / 60)
+
+    def headers(self) -> Dict[str, str]:
+        """En-têtes RateLimit-Policy et RateLimit (quotas et état des deux seaux de ce worker)."""
+        policies, states = [], []
+        for label, bucket in (("requests", self.requests), ("rows", self.rows)):
+            remaining, reset = bucket.state()
+            policies.append(f'"{label}";q={int(bucket.capacity)};w=60')
+            states.append(f'"{label}";r={remaining};t={reset}')
+        return {"RateLimit-Policy": ", ".join(policies), "RateLimit": ", ".join(states)}
+
+
+def client_from_config(config: Dict, source: str) -> Client:
+    """
+    Construit un Client à partir d'une entrée de configuration (sans l'empreinte de clé).
+    Lève ValueError, en nommant la source, si un champ est inconnu ou une valeur invalide.
+    """
+    unknown = sorted(set(config) - set(CLIENT_FIELDS))
+    if unknown:
+        raise ValueError(f"{source} : champ(s) inconnu(s) {unknown} (champs acceptés : "
+                         f"key_sha256, {', '.join(CLIENT_FIELDS)}).")
+    name = config.get("name")
+    if not isinstance(name, str) or not name.strip():
+        raise ValueError(f"{source} : 'name' doit être une chaîne non vide.")
+    for field in CLIENT_FIELDS[1:]:
+        value = config.get(field)
+        if field in config and (isinstance(value, bool) or not isinstance(value, int) or value <= 0):
+            raise ValueError(f"{source} : '{field}' doit être un entier strictement positif (reçu {value!r}).")
+    return Client(**config)
+
+
+class KeyCache:
+    """Clients indexés par empreinte de clé, rechargés quand le fichier de clés change."""
+
+    def __init__(self, keys_file: Optional[str] = KEYS_FILE, keys_env: str = KEYS_ENV):
+        self.keys_file = keys_file
+        self.keys_env = keys_env
+        self._clients: Dict[str, Client] = {}
+        self._mtime: Optional[float] = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self._load()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._clients)
+
+    def _entries(self) -> List[Tuple[str, Client]]:
+        """Clients configurés, avec l'empreinte de leur clé. Lève ValueError si la configuration est invalide."""
+        entries = []
+        for position, item in enumerate(filter(None, (part.strip() for part in self.keys_env.split(","))), 1):
+            name, _, key = item.partition(":")
+            if not key:
+                raise ValueError(f"FRAUD_API_KEYS, entrée n°{position} : format 'nom:clé' attendu.")
+            entries.append((key_digest(key), client_from_config({"name": name}, f"FRAUD_API_KEYS, entrée n°{position}")))
+        if self.keys_file and os.path.exists(self.keys_file):
+            with open(self.keys_file) as f:
+                try:
+                    document = json.load(f)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"{self.keys_file} : JSON invalide ({e}).")
+            clients = document.get("clients", []) if isinstance(document, dict) else None
+            if not isinstance(clients, list):
+                raise ValueError(f"{self.keys_file} : objet {{\"clients\": [...]}} attendu.")
+            for position, config in enumerate(clients, 1):
+                source = f"{self.keys_file}, client n°{position}"
+                if not isinstance(config, dict):
+                    raise ValueError(f"{source} : objet JSON attendu, reçu {type(config).__name__}.")
+                config = dict(config)
+                digest = config.pop("key_sha256", None)
+                if not isinstance(digest, str) or len(digest) != 64 or \
+                        any(c not in "0123456789abcdef" for c in digest.lower()):
+                    raise ValueError(f"{source} : 'key_sha256' doit être une empreinte SHA-256 hexadécimale "
+                                     f"(python -m api.security <clé>).")
+                entries.append((digest.lower(), client_from_config(config, source)))
+        return entries
+
+    def _load(self):
+        """Charge les clés ; lève ValueError (message explicite) si la configuration est invalide."""
+        self._mtime = os.path.getmtime(self.keys_file) if self.keys_file and os.path.exists(self.keys_file) else None
+        clients = {}
+        for digest, client in self._entries():
+            # Un client déjà connu garde ses seaux si ses quotas n'ont pas changé
+            previous = self._clients.get(digest)
+            if previous is not None and (previous.name, previous.requests_per_minute, previous.rows_per_minute) == \
+                    (client.name, client.requests_per_minute, client.rows_per_minute):
+                client = previous
+            clients[digest] = client
+        self._clients = clients
+        logger.info(f"Clés d'API chargées : {len(clients)} client(s).")
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if not self.keys_file or now - self._checked < KEYS_RELOAD_INTERVAL:
+            return
+        with self._lock:
+            self._checked = now
+            mtime = os.path.getmtime(self.keys_file) if os.path.exists(self.keys_file) else None
+            if mtime != self._mtime:
+                try:
+                    self._load()
+                except (OSError, ValueError) as e:
+                    logger.error(f"❌ Fichier de clés d'API invalide, clés précédentes conservées : {e}")
+
+    def lookup(self, key: Optional[str]) -> Optional[Client]:
+        self._maybe_reload()
+        return self._clients.get(key_digest(key)) if key else None
+
+
+# Une configuration invalide arrête le démarrage (ValueError explicite) : l'API ne doit pas
+# s'ouvrir sans authentification parce qu'un fichier de clés est mal formé
+KEY_CACHE = KeyCache()
+
+
+def presented_key(request) -> Optional[str]:
+    """Clé fournie dans X-API-Key ou dans Authorization: Bearer <clé>."""
+    key = request.headers.get(API_KEY_HEADER)
+    if key:
+        return key
+    scheme, _, credentials = request.headers.get("authorization", "").partition(" ")
+    return credentials.strip() or None if scheme.lower() == "bearer" else None
+
+
+def authorize(request) -> Optional[Client]:
+    """
+    Identifie le client de la requête et consomme un jeton de requête.
+    Retourne None si l'authentification est désactivée ou le chemin public ; lève
+    HTTPException 401 (clé absente ou inconnue) ou 429 (quota de requêtes dépassé).
+    """
+    if not KEY_CACHE.enabled or request.url.path in PUBLIC_PATHS or request.method == "OPTIONS":
+        return None
+    client = KEY_CACHE.lookup(presented_key(request))
+    if client is None:
+        AUTH_FAILURES.inc(reason="missing" if presented_key(request) is None else "invalid")
+        raise HTTPException(status_code=401, detail="Clé d'API absente ou invalide.",
+                            headers={"WWW-Authenticate": "Bearer"})
+    wait = client.requests.consume(1)
+    if wait:
+        RATE_LIMITED.inc(client=client.name, limit="requests")
+        raise HTTPException(status_code=429, detail="Quota de requêtes dépassé.",
+                            headers={"Retry-After": str(math.ceil(wait)), **client.headers()})
+    return client
+
+
+class RateLimitMiddleware:
+    """
+    Middleware ASGI : clé d'API et quota de requêtes du client (authorize), client exposé dans
+    request.state.client, en-têtes RateLimit ajoutés au début de la réponse. Le corps de la
+    réponse est transmis tel quel (un seul message) : la compression reste possible en aval.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request = Request(scope)
+        try:
+            client = authorize(request)
+        except HTTPException as e:
+            await JSONResponse({"detail": e.detail}, status_code=e.status_code, headers=e.headers)(
+                scope, receive, send)
+            return
+        request.state.client = client
+        if client is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).update(client.headers())
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+def check_body_size(request):
+    """
+    Rejette (413) avant lecture du corps un lot dont Content-Length dépasse la taille maximale
+    d'un lot autorisé pour le client (capacité du seau de lignes x MAX_ROW_BYTES). Sans effet si
+    l'authentification est désactivée ou si Content-Length est absent (corps en flux).
+    """
+    client = getattr(request.state, "client", None)
+    length = request.headers.get("content-length", "")
+    if client is None or not length.isdigit():
+        return
+    max_bytes = int(client.rows.capacity) * MAX_ROW_BYTES
+    if int(length) > max_bytes:
+        raise HTTPException(status_code=413, detail=f"Corps de requête trop volumineux : {length} octets "
+                                                    f"(maximum {max_bytes} pour {int(client.rows.capacity)} lignes).")
+
+
+def charge_rows(request, rows: int):
+    """
+    Consomme `rows` jetons de lignes pour le client de la requête (sans effet si
+    l'authentification est désactivée). Lève HTTPException 413 si le lot dépasse la capacité
+    du seau, 429 si le quota de lignes est épuisé.
+    """
+    client = getattr(request.state, "client", None)
+    if client is None:
+        return
+    if rows > client.rows.capacity:
+        raise HTTPException(status_code=413, detail=f"Lot trop volumineux : {rows} lignes "
+                                                    f"(maximum {int(client.rows.capacity)} par requête).")
+    wait = client.rows.consume(rows)
+    if wait:
+        RATE_LIMITED.inc(client=client.name, limit="rows")
+        raise HTTPException(status_code=429, detail="Quota de lignes scorées dépassé.",
+                            headers={"Retry-After": str(math.ceil(wait)), **client.headers()})
+
+
+if __name__ == "__main__":
+    # Empreinte à reporter dans FRAUD_API_KEYS_FILE : python -m api.security <clé>
+    print(key_digest(sys.argv[1]))
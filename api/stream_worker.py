@@ -0,0 +1,386 @@
+"""
+Consommateur en continu : score les transactions d'une source en ajout seul, sans passer par HTTP.
+
+Sources :
+- un fichier NDJSON (une transaction JSON par ligne) ;
+- un répertoire de segments NDJSON (*.ndjson, *.jsonl), traités dans l'ordre des noms ;
+- une socket Unix locale sur laquelle les producteurs écrivent des lignes NDJSON.
+
+Pour les fichiers, chaque fichier est découpé en blocs de --block-size octets ; le bloc k d'un
+fichier appartient au worker (crc32(nom) + k) % N. Une ligne appartient au bloc qui contient
+son premier octet. Chaque worker score ses lignes par micro-lots puis enregistre sa position
+(fichier, bloc, offset) dans un checkpoint : après un crash, il reprend au dernier lot validé.
+L'identifiant d'alerte est dérivé de (fichier, offset) et la file SQLite ignore les doublons :
+rejouer un lot ne crée pas d'alerte en double.
+
+Les alertes sont écrites dans la file SQLite partagée avec l'API (FRAUD_API_ALERT_DB / --alert-db).
+
+Usage (depuis la racine du dépôt) :
+    python -m api.stream_worker --source transactions.ndjson --workers 4 --alert-db alerts.db
+    python -m api.stream_worker --source segments/ --follow --alert-db alerts.db
+    python -m api.stream_worker --socket /tmp/fraud_stream.sock --alert-db alerts.db
+"""
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import socketserver
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from api.alert_store import SQLiteAlertStore, make_alert, ALERT_DB_PATH
+from api.audit import AuditLogger, AUDIT_ENABLED
+from api.scoring import (
+    DECISION_THRESHOLD, load_artifacts, compute_model_version, records_to_frame, scale_features, predict_scores
+)
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+logger = logging.getLogger("fraud_stream")
+
+MODEL_PATH = os.path.join("app", "models", "xgb_fraud_detection_model.pkl")
+SCALER_PATH = os.path.join("app", "models", "scaler.pkl")
+SEGMENT_SUFFIXES = (".ndjson", ".jsonl")
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_BLOCK_SIZE = 8 * 1024 * 1024
+POLL_INTERVAL = 0.5
+LOG_INTERVAL = 10.0
+
+
+class Scorer:
+    """Modèle, scaler et file d'alertes d'un processus ; score un micro-lot d'enregistrements."""
+
+    def __init__(self, alert_db: str, n_threads: Optional[int] = None):
+        self.model, self.scaler = load_artifacts(MODEL_PATH, SCALER_PATH)
+        self.model_version = compute_model_version(MODEL_PATH, SCALER_PATH)
+        if n_threads:
+            # Plusieurs processus sur la même machine : éviter la sur-souscription des cœurs
+            self.model.set_params(n_jobs=n_threads)
+        self.store = SQLiteAlertStore(alert_db)
+        self.audit = AuditLogger()
+        if AUDIT_ENABLED:
+            self.audit.start()
+        self.rows = 0
+        self.alerts = 0
+        self.invalid = 0
+
+    def score(self, records: List[Dict], alert_ids: List[Optional[str]]) -> int:
+        """Score les enregistrements ; les fraudes prédites sont ajoutées à la file. Retourne le nombre d'alertes."""
+        if not records:
+            return 0
+        started = time.perf_counter()
+        # Valeurs non numériques (texte, listes...) -> NaN : ligne comptée invalide au lieu de faire
+        # échouer le scaler, ce qui bloquerait le consommateur sur le même lot à chaque redémarrage
+        df = records_to_frame(records).apply(pd.to_numeric, errors="coerce").astype(np.float64)
+        valid = np.isfinite(df.to_numpy()).all(axis=1)
+        if not valid.all():
+            self.invalid += int((~valid).sum())
+            df = df[valid].reset_index(drop=True)
+            records = [r for r, ok in zip(records, valid) if ok]
+            alert_ids = [i for i, ok in zip(alert_ids, valid) if ok]
+            if df.empty:
+                return 0
+
+        scale_features(df, self.scaler)
+        predictions, probabilities = predict_scores(df, self.model)
+        self.audit.submit("stream", df.to_numpy(), probabilities, predictions,
+                          DECISION_THRESHOLD, self.model_version, time.perf_counter() - started)
+
+        fraud_rows = np.flatnonzero(predictions == 1)
+        alerts = [make_alert(records[i], probabilities[i], alert_ids[i]) for i in fraud_rows]
+        self.store.add(alerts)
+        self.rows += len(df)
+        self.alerts += len(alerts)
+        return len(alerts)
+
+    def close(self):
+        self.audit.stop()
+
+
+def parse_lines(lines: List[Tuple[int, bytes]], source_name: str, scorer: Scorer) -> Tuple[List[Dict], List[str]]:
+    """Décode les lignes NDJSON ; l'identifiant d'alerte est dérivé de (source, offset)."""
+    records, alert_ids = [], []
+    for offset, line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            scorer.invalid += 1
+            continue
+        if not isinstance(record, dict):
+            scorer.invalid += 1
+            continue
+        records.append(record)
+        alert_ids.append(hashlib.blake2b(f"{source_name}:{offset}".encode(), digest_size=6).hexdigest())
+    return records, alert_ids
+
+
+# --- SOURCES FICHIERS : PARTITIONNEMENT PAR BLOCS D'OCTETS ---
+
+def list_source_files(source: str) -> List[str]:
+    if os.path.isdir(source):
+        return sorted(
+            os.path.join(source, name) for name in os.listdir(source) if name.endswith(SEGMENT_SUFFIXES)
+        )
+    return [source] if os.path.exists(source) else []
+
+
+class FileWorker:
+    """Un worker : traite les blocs qui lui sont attribués, fichier par fichier, et checkpointe sa position."""
+
+    def __init__(self, source: str, index: int, n_workers: int, scorer: Scorer, checkpoint_dir: str,
+                 batch_size: int = DEFAULT_BATCH_SIZE, block_size: int = DEFAULT_BLOCK_SIZE, follow: bool = False):
+        self.source = source
+        self.index = index
+        self.n_workers = n_workers
+        self.scorer = scorer
+        self.batch_size = batch_size
+        self.block_size = block_size
+        self.follow = follow
+        self.stopping = False
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        self.checkpoint_path = os.path.join(checkpoint_dir, f"worker-{index}-of-{n_workers}.json")
+        self.state = self._load_checkpoint()
+
+    # --- Checkpoint ---
+
+    def _load_checkpoint(self) -> Dict:
+        if not os.path.exists(self.checkpoint_path):
+            return {"block_size": self.block_size, "files": {}}
+        with open(self.checkpoint_path) as f:
+            state = json.load(f)
+        if state.get("block_size") != self.block_size:
+            raise SystemExit(f"Checkpoint {self.checkpoint_path} créé avec --block-size {state.get('block_size')} : "
+                             "le partitionnement doit rester identique pour reprendre.")
+        return state
+
+    def _save_checkpoint(self):
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    # --- Blocs ---
+
+    def _first_block(self, name: str) -> int:
+        """Premier bloc du fichier attribué à ce worker ; les suivants sont espacés de n_workers."""
+        return (self.index - zlib.crc32(name.encode())) % self.n_workers
+
+    @staticmethod
+    def _first_line_start(f, start: int, sealed: bool) -> Optional[int]:
+        """Offset de la première ligne commençant à start ou après (None si elle n'est pas encore écrite)."""
+        if start == 0:
+            return 0
+        f.seek(start - 1)
+        line = f.readline()
+        if not line.endswith(b"\n"):
+            return f.tell() if sealed else None
+        return f.tell()
+
+    def _process_file(self, path: str, is_last: bool) -> int:
+        """
+        Traite les blocs disponibles d'un fichier ; retourne le nombre de lignes lues.
+        Un fichier est scellé s'il ne grandira plus : sans --follow, ou si un segment plus récent
+        existe (les producteurs ouvrent un nouveau segment une fois le précédent terminé).
+        """
+        name = os.path.basename(path)
+        sealed = not self.follow or not is_last
+        file_state = self.state["files"].setdefault(name, {"block": self._first_block(name), "offset": None})
+        if file_state.get("done"):
+            return 0
+
+        n_lines = 0
+        size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            while not self.stopping:
+                start = file_state["block"] * self.block_size
+                end = start + self.block_size
+                if start >= size:
+                    break
+                offset = file_state["offset"]
+                if offset is None:
+                    offset = self._first_line_start(f, start, sealed)
+                    if offset is None:
+                        break
+
+                f.seek(offset)
+                batch: List[Tuple[int, bytes]] = []
+                complete = False
+                while offset < end:
+                    line = f.readline()
+                    if not line:
+                        break
+                    if not line.endswith(b"\n") and not sealed:
+                        break  # Ligne en cours d'écriture : on la reprendra au prochain passage
+                    batch.append((offset, line))
+                    offset += len(line)
+                    if len(batch) >= self.batch_size:
+                        self._commit(name, batch, file_state, offset)
+                        n_lines += len(batch)
+                        batch = []
+                else:
+                    complete = True
+                self._commit(name, batch, file_state, offset)
+                n_lines += len(batch)
+
+                if not complete:
+                    break
+                file_state["block"] += self.n_workers
+                file_state["offset"] = None
+                self._save_checkpoint()
+
+        # Segment clos (un segment plus récent existe) et entièrement parcouru : plus rien à lire
+        if not is_last and not self.stopping:
+            file_state["done"] = True
+            self._save_checkpoint()
+        return n_lines
+
+    def _commit(self, name: str, batch: List[Tuple[int, bytes]], file_state: Dict, offset: int):
+        """Score le micro-lot puis avance le checkpoint (au moins une fois ; alertes idempotentes)."""
+        if not batch and file_state["offset"] == offset:
+            return
+        if batch:
+            records, alert_ids = parse_lines(batch, name, self.scorer)
+            self.scorer.score(records, alert_ids)
+        file_state["offset"] = offset
+        self._save_checkpoint()
+
+    def run(self):
+        last_log = time.monotonic()
+        while not self.stopping:
+            files = list_source_files(self.source)
+            n_lines = 0
+            for i, path in enumerate(files):
+                n_lines += self._process_file(path, is_last=(i == len(files) - 1))
+            if time.monotonic() - last_log >= LOG_INTERVAL:
+                self._log_progress()
+                last_log = time.monotonic()
+            if not self.follow:
+                break
+            if n_lines == 0:
+                time.sleep(POLL_INTERVAL)
+        self._log_progress()
+
+    def _log_progress(self):
+        logger.info(f"[worker {self.index}/{self.n_workers}] {self.scorer.rows} transactions scorées, "
+                    f"{self.scorer.alerts} alertes, {self.scorer.invalid} lignes invalides.")
+
+
+def run_file_worker(args, index: int, n_threads: Optional[int]):
+    scorer = Scorer(args.alert_db, n_threads)
+    worker = FileWorker(args.source, index, args.workers, scorer, args.checkpoint_dir,
+                        args.batch_size, args.block_size, args.follow)
+
+    def stop(signum, frame):
+        worker.stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    try:
+        worker.run()
+    finally:
+        scorer.close()
+
+
+# --- SOURCE SOCKET ---
+
+def serve_socket(args):
+    """
+    Écoute une socket Unix : chaque connexion envoie des lignes NDJSON, regroupées en micro-lots
+    (taille ou délai). Un flux socket ne se rejoue pas : pas de checkpoint, un seul processus.
+    """
+    scorer = Scorer(args.alert_db)
+    lines: "queue.Queue[bytes]" = queue.Queue(maxsize=args.batch_size * 10)
+    stopping = threading.Event()
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                if line.strip():
+                    lines.put(line)
+
+    if os.path.exists(args.socket):
+        os.remove(args.socket)
+    server = socketserver.ThreadingUnixStreamServer(args.socket, Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info(f"🔌 En écoute sur {args.socket}")
+
+    def stop(signum, frame):
+        stopping.set()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    try:
+        while not stopping.is_set():
+            batch = []
+            deadline = time.monotonic() + POLL_INTERVAL
+            while len(batch) < args.batch_size:
+                try:
+                    batch.append(lines.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            if batch:
+                records, _ = parse_lines(list(enumerate(batch)), "socket", scorer)
+                scorer.score(records, [None] * len(records))
+    finally:
+        server.shutdown()
+        server.server_close()
+        os.remove(args.socket)
+        scorer.close()
+        logger.info(f"{scorer.rows} transactions scorées, {scorer.alerts} alertes, {scorer.invalid} lignes invalides.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--source", help="Fichier NDJSON ou répertoire de segments.")
+    source.add_argument("--socket", help="Chemin de la socket Unix à écouter.")
+    parser.add_argument("--workers", type=int, default=1, help="Nombre de processus (sources fichiers).")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--block-size", type=int, default=DEFAULT_BLOCK_SIZE, help="Taille des blocs de partitionnement (octets).")
+    parser.add_argument("--follow", action="store_true", help="Continuer à lire les ajouts (sinon s'arrêter en fin de source).")
+    parser.add_argument("--checkpoint-dir", default="stream_checkpoints")
+    parser.add_argument("--alert-db", default=ALERT_DB_PATH, help="Base SQLite des alertes partagée avec l'API.")
+    args = parser.parse_args()
+
+    if not args.alert_db:
+        parser.error("--alert-db (ou FRAUD_API_ALERT_DB) est requis : la file d'alertes doit être partagée avec l'API.")
+
+    if args.socket:
+        serve_socket(args)
+        return
+
+    n_threads = max(1, (os.cpu_count() or 1) // args.workers)
+    if args.workers == 1:
+        run_file_worker(args, 0, None)
+        return
+
+    processes = [
+        multiprocessing.Process(target=run_file_worker, args=(args, i, n_threads), name=f"stream-worker-{i}")
+        for i in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+
+    def forward(signum, frame):
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
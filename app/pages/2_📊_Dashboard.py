@@ -1,20 +1,28 @@
 import streamlit as st
+import os
+from typing import List # Ajouté pour le type hinting
+from utils.auth import check_authentication
+
+# Authentification avant les imports lourds (pandas, plotly, modèle) : l'écran de connexion
+# s'affiche sans les charger.
+check_authentication()
+
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-import os
 import requests
 # Assurez-vous que load_data et les autres utilitaires sont bien dans votre dépôt
-from utils.data_loader import load_data
+from utils.data_loader import load_data, dataset_version, memory_footprint, read_table_response, TABLE_ACCEPT
+from utils.cube import AmountCube
+from utils.filter_index import FilterIndex
+from utils.charts import binned_histogram_figure, CLASS_COLORS
 from utils.ui_style import setup_page_config, load_css, create_footer, create_header
-from utils.auth import check_authentication
-from typing import List # Ajouté pour le type hinting
+from utils.api_client import get_api_client
+from utils.local_scoring import predict_frame, local_first, local_fallback_allowed, local_model_version
+from utils.batch_scoring import predict_remote
 
-check_authentication()
-
-# URL de l'API FastAPI
-# PAS DE CHANGEMENT : L'URL déployée est correcte.
-API_URL = "https://lamine-th0101-detection-fraud-bancaire-api.hf.space"
+# Client HTTP partagé vers l'API FastAPI (URL configurable : utils/api_client.py)
 
 # Liste des 30 caractéristiques à envoyer à l'API
 FEATURE_COLS = [
@@ -23,11 +31,35 @@ FEATURE_COLS = [
     "V21", "V22", "V23", "V24", "V25", "V26", "V27", "V28", "Amount"
 ]
 
-@st.cache_data
+# Colonnes chargées par le Dashboard (variables du modèle, vérité terrain et heure)
+DASHBOARD_COLUMNS = tuple(FEATURE_COLS + ["Class", "Hour"])
+
+FRAUD_FILTER_CLASSES = {"Toutes": None, "Normales": 0, "Fraudes": 1}
+
+# Plages semi-ouvertes [min, max) des filtres rapides (bornes exactes du cube).
+# Changement de sens par rapport aux anciennes plages fermées ([50, 100], [100, 500], > 500) :
+# une transaction de 100 $ ou de 500 $ exactement n'est plus comptée dans deux plages, elle
+# appartient à la plage supérieure (100 $ -> "Gros", 500 $ -> "Très gros"). Les libellés le précisent.
+QUICK_AMOUNT_RANGES = {
+    "Tous montants": (None, None),
+    "Petits (< 50)": (None, 50.0),
+    "Moyens (50 à < 100)": (50.0, 100.0),
+    "Gros (100 à < 500)": (100.0, 500.0),
+    "Très gros (≥ 500)": (500.0, None),
+}
+
+class BatchPredictionError(RuntimeError):
+    """Prédictions par lot incomplètes : le cube n'est pas construit (ni mis en cache)."""
+
+
 def get_data():
-    df = load_data()
-    df['Hour'] = df['Time'].apply(lambda x: pd.to_datetime(x, unit='s').hour)
-    return df
+    # 'Hour' est déjà calculée (uint8) par le chargeur ; Amount_Category n'est pas utilisée ici
+    return load_data(columns=DASHBOARD_COLUMNS)
+
+@st.cache_data
+def get_data_footprint(data_version: str) -> float:
+    """Empreinte mémoire (Mo) du jeu de données chargé par le Dashboard."""
+    return memory_footprint(get_data())
 
 @st.cache_data(ttl=5)
 def get_feedback_data():
@@ -35,9 +67,9 @@ def get_feedback_data():
     Récupère les données de rétroaction depuis l'API. (inchangé)
     """
     try:
-        response = requests.get(f"{API_URL}/alerts")
+        response = get_api_client().get("/alerts", params={"orient": "split"}, headers={'Accept': TABLE_ACCEPT})
         if response.status_code == 200:
-            feedback_df = pd.DataFrame(response.json().get('alerts', []))
+            feedback_df = read_table_response(response, key='alerts')
             if not feedback_df.empty:
                 # Assurez-vous que Time est présent avant de l'utiliser
                 if 'Time' in feedback_df.columns:
@@ -50,50 +82,116 @@ def get_feedback_data():
         st.error(f"Impossible de se connecter à l'API : {e}. Assurez-vous que l'API est en cours d'exécution.")
         return pd.DataFrame()
 
-def fallback_prediction(df_to_predict: pd.DataFrame) -> List[int]:
+def predict_batch_local(df_to_predict: pd.DataFrame) -> List[int]:
+    """Prédictions du modèle embarqué (utils/local_scoring.py), en mémoire."""
+    predictions, _ = predict_frame(df_to_predict)
+    return predictions.tolist()
+
+
+def predict_batch_remote(df_to_predict: pd.DataFrame) -> List[int]:
     """
-    ⚠️ Solution de secours (Fallback) pour les prédictions.
-    Retourne la VRAIE CLASSE (Class) si elle existe dans le DataFrame (comme dans le cas de load_data).
-    Ceci permet de simuler un modèle parfait pour que les KPIs fonctionnent en cas d'échec de l'API.
+    Prédiction par lot via l'API, par tranches (utils/batch_scoring.py).
+    Lève requests.exceptions.RequestException si l'API est injoignable ou répond en erreur.
     """
-    if 'Class' in df_to_predict.columns:
-        return df_to_predict['Class'].tolist()
-    else:
-        # Si même la vraie classe est manquante, retourne 'Normal' pour éviter l'échec.
-        return [0] * len(df_to_predict)
+    predictions, _ = predict_remote(df_to_predict)
+    return predictions.tolist()
 
 
-@st.cache_data(show_spinner="⏳ Prédictions en cours via API (lot)...")
-def predict_batch_api(df_to_predict: pd.DataFrame) -> List[int]:
+@st.cache_data(show_spinner="⏳ Prédictions en cours (lot)...")
+def predict_batch(df_to_predict: pd.DataFrame) -> List[int]:
     """
-    Tente la prédiction par lot via l'API, utilise une solution de secours en cas d'échec.
+    Prédictions par lot selon le backend de scoring configuré : modèle embarqué, API, ou API
+    avec repli sur le modèle embarqué (mode "auto"). Lève requests.exceptions.RequestException
+    si l'API seule est configurée et qu'elle échoue : une exception n'est pas mise en cache,
+    l'appel est retenté au prochain rerun et aucune prédiction n'est simulée.
     """
     if df_to_predict.empty:
         return []
-    
+
+    if local_first():
+        st.info(f"Prédiction locale de {len(df_to_predict):,.0f} transactions (modèle embarqué).")
+        return predict_batch_local(df_to_predict)
+
     st.info(f"Envoi de {len(df_to_predict):,.0f} transactions à l'API pour prédiction en lot.")
+    try:
+        return predict_batch_remote(df_to_predict)
+    except requests.exceptions.RequestException as e:
+        if not local_fallback_allowed():
+            raise
+        st.warning(f"⚠️ API indisponible ({e}). Prédiction avec le modèle embarqué.")
+        return predict_batch_local(df_to_predict)
 
+@st.cache_data(ttl=300)
+def get_model_version():
+    """
+    Récupère la version du modèle qui produira les prédictions (clé de cache du cube d'agrégats) :
+    celle du modèle embarqué en mode local ou si l'API est injoignable, sinon celle de l'API.
+    """
+    if local_first():
+        return local_model_version()
     try:
-        data_to_send = {
-            'transactions': df_to_predict[FEATURE_COLS].astype(float).to_dict('records')
-        }
-        
-        # L'API a une chance d'échouer ici avec 404 (non trouvé)
-        response = requests.post(f"{API_URL}/predict_batch", json=data_to_send, timeout=120) 
-        
+        response = get_api_client().get("/health", timeout=5)
         if response.status_code == 200:
-            predictions = response.json().get('predictions', [])
-            return predictions
-        else:
-            # 🚨 Gérer l'échec API (y compris 404) avec la solution de secours
-            st.warning(f"⚠️ Erreur API ({response.status_code}). Utilisation de la prédiction de secours pour maintenir les KPIs fonctionnels.")
-            st.caption(f"Réponse de l'API: {response.text[:100]}...") # Afficher un aperçu de l'erreur
-            return fallback_prediction(df_to_predict)
-            
-    except requests.exceptions.RequestException as e:
-        # 🚨 Gérer l'erreur de connexion avec la solution de secours
-        st.error(f"❌ Erreur de connexion à l'API lors de la prédiction par lot. Utilisation de la prédiction de secours. Erreur: {e}")
-        return fallback_prediction(df_to_predict)
+            return response.json().get('model_version') or 'unknown'
+    except requests.exceptions.RequestException:
+        pass
+    return local_model_version() if local_fallback_allowed() else 'unavailable'
+
+@st.cache_data(ttl=60)
+def get_drift_report(window_seconds: int):
+    """
+    Récupère le rapport de dérive (PSI / KS par variable et pour le score) calculé par l'API.
+    Retourne None si l'API est injoignable ou si la référence n'a pas été construite.
+    """
+    try:
+        response = get_api_client().get("/drift", params={"window_seconds": window_seconds})
+        if response.status_code == 200:
+            return response.json()
+    except requests.exceptions.RequestException:
+        pass
+    return None
+
+@st.cache_data(ttl=30)
+def get_feedback_metrics():
+    """
+    Récupère les indicateurs de performance calculés par l'API à partir du feedback
+    (résumé de taille constante : cumul, fenêtres journalières et hebdomadaires).
+    """
+    try:
+        response = get_api_client().get("/feedback_metrics")
+        if response.status_code == 200:
+            return response.json()
+    except requests.exceptions.RequestException:
+        pass
+    return None
+
+@st.cache_resource(show_spinner="⏳ Construction du cube d'agrégats...")
+def get_cube(data_version: str, model_version: str):
+    """
+    Construit le cube Heure x Montant x Class x Predicted_Class une fois par version
+    du jeu de données et du modèle. Retourne (cube, prédictions par ligne).
+    Lève une exception si les prédictions sont indisponibles ou incomplètes : rien n'est alors
+    mis en cache sous cette version du modèle.
+    """
+    df = get_data()
+    predictions = np.asarray(predict_batch(df), dtype=np.int64)
+    if len(predictions) != len(df):
+        raise BatchPredictionError(f"Le nombre de prédictions ({len(predictions)}) ne correspond pas "
+                         f"au nombre de transactions ({len(df)}).")
+
+    cube = AmountCube.from_arrays(
+        hours=df['Hour'].to_numpy(),
+        amounts=df['Amount'].to_numpy(),
+        classes=df['Class'].to_numpy(),
+        predictions=predictions,
+        version=(data_version, model_version)
+    )
+    return cube, predictions
+
+@st.cache_resource(show_spinner="⏳ Construction de l'index de filtrage...")
+def get_filter_index(data_version: str):
+    """Index trié par montant + bitmaps heure/classe, construit une fois par version du jeu de données."""
+    return FilterIndex.from_frame(get_data())
 
 def show():
     load_css()
@@ -103,87 +201,55 @@ def show():
     st.markdown(
         "Ce tableau de bord interactif vous permet d'explorer les caractéristiques des transactions et d'évaluer la performance du modèle de détection de fraude.")
 
-    # Afficher la vue principale du tableau de bord
-    df = get_data()
+    # Le cube est construit une seule fois par version des données et du modèle :
+    # les KPIs et graphiques ci-dessous ne parcourent plus les lignes à chaque rerun.
+    data_version = dataset_version()
+    try:
+        cube, predictions = get_cube(data_version, get_model_version())
+    except (requests.exceptions.RequestException, BatchPredictionError) as e:
+        st.error(f"❌ Prédictions par lot indisponibles, le tableau de bord ne peut pas être construit : {e}")
+        st.stop()
+    filter_index = get_filter_index(data_version)
 
     st.sidebar.header("🔍 Filtres Principaux")
     
-    # ... (les filtres sont inchangés)
     fraud_filter = st.sidebar.radio("Type de transaction", ["Toutes", "Normales", "Fraudes"], horizontal=True)
 
-    quick_amount = st.sidebar.selectbox("Plage de montant rapide",
-                                        ["Tous montants", "Petits (<50)", "Moyens (50-100)", "Gros (100-500)", "Très gros (>500)"])
-
-    amount_range = st.sidebar.slider("Plage de montant précise", float(df['Amount'].min()), float(df['Amount'].max()),
-                                     (0.0, 500.0))
+    quick_amount = st.sidebar.selectbox(
+        "Plage de montant rapide", list(QUICK_AMOUNT_RANGES),
+        help="Borne inférieure incluse, borne supérieure exclue : 100 $ exactement est dans « Gros ».")
+
+    # Le curseur propose les bornes des tranches du cube : toute plage choisie est exacte
+    amount_range = st.sidebar.select_slider(
+        "Plage de montant précise",
+        options=cube.amount_edges.tolist(),
+        value=(0.0, 500.0),
+        format_func=lambda x: f"{x:,.0f}"
+    )
     hour_range = st.sidebar.slider("Heure de transaction", 0, 23, (0, 23))
+    st.sidebar.caption(f"💾 Données en mémoire : {get_data_footprint(data_version):,.1f} Mo")
 
-    filtered_df = df.copy()
-
-    if fraud_filter == "Normales":
-        filtered_df = filtered_df[filtered_df['Class'] == 0]
-    elif fraud_filter == "Fraudes":
-        filtered_df = filtered_df[filtered_df['Class'] == 1]
-
-    if quick_amount == "Petits (<50)":
-        filtered_df = filtered_df[filtered_df['Amount'] < 50]
-    elif quick_amount == "Moyens (50-100)":
-        filtered_df = filtered_df[(filtered_df['Amount'] >= 50) & (filtered_df['Amount'] <= 100)]
-    elif quick_amount == "Gros (100-500)":
-        filtered_df = filtered_df[(filtered_df['Amount'] >= 100) & (filtered_df['Amount'] <= 500)]
-    elif quick_amount == "Très gros (>500)":
-        filtered_df = filtered_df[filtered_df['Amount'] > 500]
-
-    filtered_df = filtered_df[
-        (filtered_df['Amount'] >= amount_range[0]) &
-        (filtered_df['Amount'] <= amount_range[1]) &
-        (filtered_df['Hour'] >= hour_range[0]) &
-        (filtered_df['Hour'] <= hour_range[1])
-        ]
-
-    # --- PRÉDICTION SUR LES DONNÉES FILTRÉES VIA L'API (AVEC FALLBACK) ---
-    if filtered_df.empty:
-        st.warning("Aucune transaction ne correspond à vos filtres. Veuillez ajuster les critères de recherche.")
-        filtered_df['Predicted_Class'] = 0
-    else:
-        try:
-            # 🚀 Utilisation de la prédiction par lot (avec fallback)
-            predictions = predict_batch_api(filtered_df)
-            
-            # Vérification de la taille de la réponse
-            if len(predictions) == len(filtered_df):
-                filtered_df['Predicted_Class'] = predictions
-                st.success(f"✅ Prédictions terminées avec succès pour {len(predictions):,.0f} transactions !")
-            else:
-                st.error(f"Erreur: Le nombre de prédictions ({len(predictions)}) renvoyées ne correspond pas au nombre de transactions filtrées ({len(filtered_df)}). Utilisation de 0 comme prédiction.")
-                filtered_df['Predicted_Class'] = 0 # Échec de la prédiction
-            
-        except Exception as e:
-            st.error(f"Erreur inattendue lors de la prédiction : {e}")
-            filtered_df['Predicted_Class'] = 0
+    fraud_class = FRAUD_FILTER_CLASSES[fraud_filter]
+    quick_min, quick_max = QUICK_AMOUNT_RANGES[quick_amount]
+    amount_min = max(amount_range[0], quick_min) if quick_min is not None else amount_range[0]
+    amount_max = min(amount_range[1], quick_max) if quick_max is not None else amount_range[1]
 
+    cube_slice = cube.query(fraud_class=fraud_class, amount_min=amount_min, amount_max=amount_max,
+                            hour_min=hour_range[0], hour_max=hour_range[1])
+    kpis = cube_slice.kpis()
+
+    if kpis['total_transactions'] == 0:
+        st.warning("Aucune transaction ne correspond à vos filtres. Veuillez ajuster les critères de recherche.")
 
     # --- AFFICHAGE DES KPIS ET VISUALISATIONS ---
     st.header("Indicateurs de Performance Clés")
 
-    # Calcul des métriques (inchangé)
-    total_transactions = filtered_df.shape[0]
-    
-    # 🚨 S'assurer que 'Class' et 'Predicted_Class' existent pour les calculs
-    if 'Class' not in filtered_df.columns:
-        st.error("Colonne 'Class' manquante pour le calcul des KPIs de fraude.")
-        return # Arrêter l'affichage si les données sont insuffisantes
-
-    total_fraud_transactions = filtered_df['Class'].sum()
-    total_fraud_amount = filtered_df[filtered_df['Class'] == 1]['Amount'].sum()
-    fraud_rate = (total_fraud_transactions / total_transactions) * 100 if total_transactions > 0 else 0
-    
-    # Calcul des KPIs de performance
-    true_positives = len(filtered_df[(filtered_df['Class'] == 1) & (filtered_df['Predicted_Class'] == 1)])
-    false_positives = len(filtered_df[(filtered_df['Class'] == 0) & (filtered_df['Predicted_Class'] == 1)])
-    
-    recall = true_positives / total_fraud_transactions if total_fraud_transactions > 0 else 0
-    precision = true_positives / (true_positives + false_positives) if (true_positives + false_positives) > 0 else 0
+    total_transactions = kpis['total_transactions']
+    total_fraud_amount = kpis['total_fraud_amount']
+    fraud_rate = kpis['fraud_rate']
+    true_positives = kpis['true_positives']
+    false_positives = kpis['false_positives']
+    recall = kpis['recall']
 
     col1, col2, col3 = st.columns(3)
     col1.metric("Transactions (filtrées)", f"{total_transactions:,.0f}")
@@ -200,9 +266,8 @@ def show():
     st.header("Visualisations Clés")
 
     if total_transactions > 0:
-        # ... (les graphiques sont inchangés)
         st.subheader("Distribution des transactions par heure")
-        transactions_by_hour = filtered_df.groupby(['Hour', 'Class']).size().reset_index(name='Count')
+        transactions_by_hour = cube_slice.by_hour()
         fig1 = px.bar(
             transactions_by_hour,
             x='Hour',
@@ -210,18 +275,18 @@ def show():
             color='Class',
             title='Nombre de transactions par heure de la journée',
             labels={'Hour': 'Heure (24h)', 'Count': 'Nombre de transactions', 'Class': 'Type de transaction'},
-            color_discrete_map={0: 'blue', 1: 'red'}
+            color_discrete_map=CLASS_COLORS
         )
         st.plotly_chart(fig1, use_container_width=True)
         st.subheader("Distribution des montants de transactions")
-        fig2 = px.histogram(
-            filtered_df,
-            x='Amount',
-            color='Class',
-            nbins=50,
+        edges, counts = cube_slice.amount_histogram(max_bins=50)
+        fig2 = binned_histogram_figure(
+            edges,
+            {int(class_value): counts[:, class_pos] for class_pos, class_value in enumerate(cube_slice.classes)},
+            colors=CLASS_COLORS,
             title='Distribution des montants (Normal vs. Fraude)',
-            labels={'Amount': 'Montant de la transaction', 'Class': 'Type de transaction'},
-            color_discrete_map={0: 'blue', 1: 'red'}
+            x_title='Montant de la transaction',
+            legend_title='Type de transaction'
         )
         st.plotly_chart(fig2, use_container_width=True)
     else:
@@ -269,9 +334,14 @@ def show():
         with col_data:
             st.markdown("◆ Télécharger les Données Filtrées")
             st.info("Aperçu des 10 premières lignes. Le fichier CSV complet contient toutes les transactions filtrées.")
-            # S'assurer que les colonnes nécessaires pour l'affichage sont présentes
-            cols_to_display = filtered_df.columns.tolist() if 'Predicted_Class' in filtered_df.columns else filtered_df.columns.tolist() + ['Predicted_Class']
-            st.dataframe(filtered_df[cols_to_display].head(10), use_container_width=True)
+            # Les lignes ne sont matérialisées qu'au moment de l'export, en une seule sélection indexée
+            rows = filter_index.select(
+                fraud_class=fraud_class, amount_min=amount_min, amount_max=amount_max,
+                hour_min=hour_range[0], hour_max=hour_range[1]
+            )
+            filtered_df = get_data().take(rows)
+            filtered_df['Predicted_Class'] = predictions[rows]
+            st.dataframe(filtered_df.head(10), use_container_width=True)
             csv_data = filtered_df.to_csv(index=False).encode('utf-8')
             st.download_button(
                 label="📥 Télécharger les transactions filtrées (CSV)",
@@ -281,6 +351,47 @@ def show():
                 key="download_data"
             )
 
+    # --- SURVEILLANCE DE LA DÉRIVE ---
+    st.divider()
+    st.header("Surveillance de la Dérive")
+    st.markdown("Écart entre les transactions scorées récemment par l'API et le jeu de données d'entraînement (PSI, KS).")
+
+    drift_windows = {"Dernière heure": 3600, "6 dernières heures": 6 * 3600, "24 dernières heures": 24 * 3600}
+    drift_window_label = st.radio("Fenêtre d'observation", list(drift_windows), horizontal=True, key="drift_window")
+    drift_report = get_drift_report(drift_windows[drift_window_label])
+
+    if drift_report is None:
+        st.info("ℹ️ Rapport de dérive indisponible (API injoignable ou référence non construite).")
+    elif not drift_report['features']:
+        st.info("ℹ️ Aucune transaction scorée sur cette fenêtre.")
+    else:
+        score_drift = drift_report.get('score') or {}
+        col_drift1, col_drift2, col_drift3 = st.columns(3)
+        col_drift1.metric("Transactions observées", f"{drift_report['n_observations']:,}")
+        col_drift2.metric("Variables en dérive (PSI > 0.25)", len(drift_report['drifting_features']))
+        col_drift3.metric("PSI du score", f"{score_drift['psi']:.3f}" if score_drift else "N/A")
+
+        if not drift_report['sufficient_data']:
+            st.warning("⚠️ Peu de transactions sur cette fenêtre : les indicateurs sont encore instables.")
+
+        drift_df = (
+            pd.DataFrame.from_dict(drift_report['features'], orient='index')
+            .rename_axis('Variable').reset_index()
+            .sort_values('psi', ascending=False)
+        )
+        fig_drift = px.bar(
+            drift_df,
+            x='Variable',
+            y='psi',
+            color='status',
+            title="Indice de stabilité (PSI) par variable",
+            color_discrete_map={'ok': 'green', 'warning': 'orange', 'drift': 'red'},
+            labels={'psi': 'PSI', 'status': 'Statut'}
+        )
+        fig_drift.add_hline(y=0.25, line_dash="dash", line_color="red")
+        fig_drift.add_hline(y=0.1, line_dash="dot", line_color="orange")
+        st.plotly_chart(fig_drift, use_container_width=True)
+
     # --- NOUVELLE SECTION POUR LES DONNÉES DE RÉTROACTION ---
     st.divider()
     st.header("Analyse de la Rétroaction")
@@ -293,6 +404,7 @@ def show():
         st.session_state.show_feedback = not st.session_state.show_feedback
 
     if st.session_state.show_feedback:
+        show_online_performance()
         feedback_df = get_feedback_data()
 
         if not feedback_df.empty:
@@ -328,5 +440,58 @@ def show():
         else:
             st.warning("Aucune donnée de rétroaction n'a encore été enregistrée.")
 
+def show_online_performance():
+    """Précision, faux positifs et calibration du modèle d'après le feedback des analystes."""
+    st.subheader("Performance du modèle en production")
+    metrics = get_feedback_metrics()
+    if metrics is None or metrics['all_time']['n'] == 0:
+        st.info("ℹ️ Pas encore d'indicateurs de performance (aucun feedback reçu ou API injoignable).")
+        return
+
+    def fmt(value):
+        return f"{value:.1%}" if value is not None else "N/A"
+
+    today = metrics['daily'][-1] if metrics['daily'] else {}
+    this_week = metrics['weekly'][-1] if metrics['weekly'] else {}
+    col_perf1, col_perf2, col_perf3, col_perf4 = st.columns(4)
+    col_perf1.metric("Feedbacks reçus", metrics['all_time']['n'])
+    col_perf2.metric("Précision (cumul)", fmt(metrics['all_time']['precision']))
+    col_perf3.metric(f"Précision ({today.get('window', 'jour')})", fmt(today.get('precision')))
+    col_perf4.metric(f"Précision ({this_week.get('window', 'semaine')})", fmt(this_week.get('precision')))
+    if metrics['all_time'].get('reviewed_non_alerts', 0) == 0:
+        st.caption("ℹ️ Seules des alertes ont été revues : le rappel et le taux de faux positifs "
+                   f"(cumul : {fmt(metrics['all_time']['recall'])} et {fmt(metrics['all_time']['false_positive_rate'])}) "
+                   "ne sont pas estimés (100 % ou N/A par construction). Revoir aussi des transactions non alertées pour les estimer.")
+    else:
+        st.caption(f"Rappel (cumul) : {fmt(metrics['all_time']['recall'])} — taux de faux positifs (cumul) : "
+                   f"{fmt(metrics['all_time']['false_positive_rate'])}, sur "
+                   f"{metrics['all_time']['reviewed_non_alerts']} transaction(s) non alertée(s) revue(s).")
+
+    col_chart1, col_chart2 = st.columns(2)
+    with col_chart1:
+        daily_df = pd.DataFrame(metrics['daily'])
+        if not daily_df.empty:
+            fig_precision = px.line(
+                daily_df,
+                x='window',
+                y=['precision', 'false_positive_rate'],
+                markers=True,
+                title="Précision et taux de faux positifs par jour",
+                labels={'window': 'Jour', 'value': 'Taux', 'variable': 'Indicateur'}
+            )
+            st.plotly_chart(fig_precision, use_container_width=True)
+    with col_chart2:
+        calibration_df = pd.DataFrame(metrics['all_time']['calibration'])
+        if not calibration_df.empty:
+            fig_calibration = go.Figure()
+            fig_calibration.add_trace(go.Scatter(x=[0, 1], y=[0, 1], mode='lines', name='Calibration parfaite',
+                                                 line=dict(dash='dash', color='grey')))
+            fig_calibration.add_trace(go.Scatter(x=calibration_df['mean_score'], y=calibration_df['observed_fraud_rate'],
+                                                 mode='lines+markers', name='Modèle', marker=dict(color='red'),
+                                                 text=calibration_df['n'], hovertemplate="Score moyen %{x:.2f}<br>Taux observé %{y:.2f}<br>n=%{text}"))
+            fig_calibration.update_layout(title="Calibration du score (cumul)", xaxis_title="Score moyen prédit",
+                                          yaxis_title="Taux de fraude confirmé")
+            st.plotly_chart(fig_calibration, use_container_width=True)
+
 if __name__ == "__main__":
     show()
\ No newline at end of file
@@ -1,12 +1,21 @@
 import streamlit as st
-import requests
 import json
-import pandas as pd
-import plotly.express as px
 from typing import Optional
 
 from utils.auth import check_authentication
 
+# Authentification avant les imports lourds (pandas, plotly, modèle) : l'écran de connexion
+# s'affiche sans les charger.
+check_authentication()
+
+import requests
+import pandas as pd
+import plotly.express as px
+
+from utils.api_client import get_api_client
+from utils.local_scoring import local_first, local_fallback_allowed, predict_transaction as local_predict_transaction
+from utils.batch_scoring import score_upload, BatchValidationError, READ_CHUNK_ROWS
+
 # Assurez-vous d'avoir les fonctions ui_style importées
 try:
     from utils.ui_style import setup_page_config, load_css, create_footer, create_header
@@ -15,14 +24,11 @@ try:
 except ImportError:
     UI_STYLE_EXISTS = False
 
-check_authentication()
-
-# URL de l'API FastAPI
-API_URL = "https://lamine-th0101-detection-fraud-bancaire-api.hf.space"
+# Endpoints de l'API FastAPI (URL de base : utils/api_client.py)
 # 🚨 NOTE: L'endpoint de prédiction reste /predict (pour la détection individuelle)
-PREDICT_URL = f"{API_URL}/predict" 
+PREDICT_PATH = "/predict"
 # 🚨 NOUVEL ENDPOINT POUR LE FEEDBACK (selon main.py)
-ALERT_URL = f"{API_URL}/alert" 
+ALERT_PATH = "/alert"
 
 # Exemple de transaction (classe = 0, non-fraude)
 TRANSACTION_EXAMPLE = {
@@ -54,23 +60,36 @@ TRANSACTION_FRAUD_EXAMPLE = {
 
 def predict_transaction(transaction_data):
     """
-    Prédit si une transaction est frauduleuse via l'API.
+    Prédit si une transaction est frauduleuse via l'API, ou avec le modèle embarqué selon le
+    backend de scoring configuré (utils/local_scoring.py).
     """
+    # ⚠️ Pour la détection individuelle, il est crucial d'utiliser l'endpoint /predict
+    # et de s'assurer que les données sont des floats.
+    float_data = {k: float(v) for k, v in transaction_data.items()}
+    if local_first():
+        return predict_locally(float_data)
+
     try:
-        # ⚠️ Pour la détection individuelle, il est crucial d'utiliser l'endpoint /predict
-        # et de s'assurer que les données sont des floats.
-        float_data = {k: float(v) for k, v in transaction_data.items()}
-        
-        response = requests.post(PREDICT_URL, json=float_data, timeout=10)
+        response = get_api_client().post(PREDICT_PATH, json=float_data, timeout=10)
         if response.status_code == 200:
             return response.json()
-        else:
-            st.error(f"Erreur API: {response.status_code} - {response.text}")
-            return None
+        if response.status_code >= 500 and local_fallback_allowed():
+            st.warning(f"⚠️ Erreur API ({response.status_code}). Prédiction avec le modèle embarqué.")
+            return predict_locally(float_data)
+        st.error(f"Erreur API: {response.status_code} - {response.text}")
+        return None
     except requests.exceptions.RequestException as e:
+        if local_fallback_allowed():
+            st.warning(f"⚠️ API injoignable ({e}). Prédiction avec le modèle embarqué.")
+            return predict_locally(float_data)
         st.error(f"Erreur de connexion à l'API: {e}")
         return None
 
+def predict_locally(float_data):
+    """Prédiction du modèle embarqué (même code de scoring que l'API)."""
+    st.caption("Prédiction locale : aucune alerte n'est ajoutée à la file de l'API.")
+    return local_predict_transaction(float_data)
+
 def submit_feedback(transaction_data, model_pred: int, user_class: int):
     """
     Soumet une rétroaction à l'API en utilisant le nouveau format d'alerte.
@@ -84,7 +103,7 @@ def submit_feedback(transaction_data, model_pred: int, user_class: int):
     
     try:
         # ⚠️ Utilisation du nouvel endpoint /alert
-        response = requests.post(ALERT_URL, json=feedback_data, timeout=10)
+        response = get_api_client().post(ALERT_PATH, json=feedback_data, timeout=10)
         if response.status_code == 200:
             return True
         else:
@@ -94,6 +113,63 @@ def submit_feedback(transaction_data, model_pred: int, user_class: int):
         st.error(f"Erreur de connexion à l'API pour le feedback: {e}")
         return False
 
+def show_batch_scoring():
+    """
+    Mode lot : un fichier CSV/Parquet de transactions est validé, noté par blocs avec une barre
+    de progression (utils/batch_scoring.py), puis résumé ; les résultats sont téléchargeables
+    en CSV compressé. Le résultat est conservé dans la session jusqu'au dépôt d'un autre fichier ;
+    le fichier de résultats est supprimé avec lui (ResultFile).
+    """
+    st.subheader("Analyse d'un fichier de transactions")
+    st.markdown(f"""
+    Déposez un fichier **CSV** (éventuellement compressé en `.csv.gz`) ou **Parquet** contenant les colonnes
+    `Time`, `V1` à `V28` et `Amount`. Les autres colonnes (identifiants, `Class`...) sont recopiées dans le
+    fichier de résultats. Le fichier est traité par blocs de {READ_CHUNK_ROWS:,} lignes.
+    """)
+    uploaded_file = st.file_uploader("Fichier de transactions", type=["csv", "gz", "parquet"])
+    if uploaded_file is None:
+        return
+
+    result = st.session_state.get('batch_result')
+    if result is None or result['file_id'] != uploaded_file.file_id:
+        if st.button("Analyser le fichier", type="primary"):
+            if result is not None:
+                result['file'].discard()
+            st.session_state.pop('batch_result', None)
+
+            progress_bar = st.progress(0.0, text="Analyse du fichier...")
+            def on_progress(progress, rows):
+                progress_bar.progress(progress, text=f"{rows:,} transactions analysées")
+            try:
+                summary, errors, result_file = score_upload(uploaded_file, on_progress=on_progress)
+            except ValueError as e:  # BatchValidationError, CSV illisible
+                progress_bar.empty()
+                st.error(f"❌ Fichier invalide : {e}")
+                return
+            except requests.exceptions.RequestException as e:
+                progress_bar.empty()
+                st.error(f"❌ Erreur de l'API lors de la prédiction par lot. Erreur: {e}")
+                return
+            progress_bar.progress(1.0, text="Analyse terminée")
+            result = {'file_id': uploaded_file.file_id, 'name': uploaded_file.name,
+                      'summary': summary, 'errors': errors, 'file': result_file}
+            st.session_state['batch_result'] = result
+        else:
+            return
+
+    st.table(pd.DataFrame(list(result['summary'].items()), columns=["Indicateur", "Valeur"]).set_index("Indicateur"))
+    if result['errors']:
+        with st.expander(f"Lignes rejetées (premières {len(result['errors'])})"):
+            st.dataframe(pd.DataFrame(result['errors']), use_container_width=True, hide_index=True)
+
+    if result['file'].available:
+        base_name = result['name'].split('.')[0]
+        with open(result['file'].path, 'rb') as f:
+            st.download_button("📥 Télécharger les résultats (CSV gzip)", data=f,
+                               file_name=f"{base_name}_predictions.csv.gz", mime="application/gzip")
+    else:
+        st.warning("Le fichier de résultats n'est plus disponible : relancez l'analyse.")
+
 def show():
     """
     Affiche la page de détection de fraude en temps réel.
@@ -131,6 +207,11 @@ def show():
     Saisissez les paramètres de la transaction ou utilisez les exemples fournis.
     """)
 
+    mode = st.radio("Mode d'analyse", ["Transaction individuelle", "Fichier de transactions (lot)"], horizontal=True)
+    if mode == "Fichier de transactions (lot)":
+        show_batch_scoring()
+        return
+
     # Boutons pour charger les données d'exemples (inchangé)
     col1, col2 = st.columns(2)
     with col1:
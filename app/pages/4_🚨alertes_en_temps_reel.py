@@ -1,72 +1,133 @@
 import streamlit as st
-import pandas as pd
-import requests
-import time
 import os
-import plotly.graph_objects as go
-from scipy.stats import gaussian_kde
-import numpy as np
 
 # Import des fonctions de style à partir d'un autre fichier
 # 🚨 Assurez-vous que ces fichiers (dans utils/) sont aussi présents dans votre dépôt GitHub
-from utils.ui_style import setup_page_config, load_css, create_footer, apply_button_style
 from utils.auth import check_authentication
 
+# Authentification avant les imports lourds (pandas, plotly) : l'écran de connexion s'affiche
+# sans les charger. scipy n'est importé qu'au calcul de la première courbe de densité.
 check_authentication()
 
-# 1. 🔑 MODIFICATION CLÉ : URL de l'API déployée
-API_URL = "https://lamine-th0101-detection-fraud-bancaire-api.hf.space"
+import pandas as pd
+import requests
+import plotly.graph_objects as go
+import numpy as np
+
+from utils.ui_style import setup_page_config, load_css, create_footer, apply_button_style
+from utils.charts import histogram_bins, binned_bar_trace, lttb, MAX_LINE_POINTS
+from utils.data_loader import read_table_response, read_only_frame, TABLE_ACCEPT
+from utils.api_client import get_api_client, API_URL
+from utils.prefetch import prefetch, invalidate
+
+# 1. 🔑 Endpoints de l'API déployée (URL de base et client partagé : utils/api_client.py)
+ALERT_PATH = "/alert"
+BULK_FEEDBACK_PATH = "/alerts/feedback"
+GET_ALERTS_PATH = "/alerts"
+HISTORICAL_DATA_PATH = "/historical_data"
 
-# 🚨 Nouveaux endpoints basés sur l'API déployée
-ALERT_URL = f"{API_URL}/alert"
-GET_ALERTS_URL = f"{API_URL}/alerts"
-HISTORICAL_DATA_URL = f"{API_URL}/historical_data"
+# Emplacement de session des données de la page (utils/prefetch.py) et durée de validité
+PAGE_SLOT = "alerts_page"
+PAGE_DATA_TTL = 5
 
 
-@st.cache_data(ttl=5)
+@st.cache_data(ttl=5, show_spinner=False)
 def get_model_alerts():
     """
     Récupère la liste des alertes de fraude à partir de l'API.
+    Lève requests.exceptions.RequestException si l'API est injoignable ou répond en erreur.
     """
-    try:
-        # 🚨 Utilisation de l'endpoint d'API déployé
-        response = requests.get(GET_ALERTS_URL, timeout=10)
-        if response.status_code == 200:
-            alerts_data = response.json().get('alerts', [])
-            if not alerts_data:
-                return pd.DataFrame()
-            alerts_df = pd.DataFrame(alerts_data)
-            alerts_df['id'] = alerts_df.index.astype(str)
-            return alerts_df
-        else:
-            st.error(f"Erreur lors de la récupération des alertes : {response.status_code}")
-            return pd.DataFrame()
-    except requests.exceptions.RequestException as e:
-        st.error(f"Impossible de se connecter à l'API ({GET_ALERTS_URL}). Vérifiez l'état de l'API. Erreur: {e}")
+    # Forme "split" : noms de colonnes envoyés une seule fois (réponse plus compacte)
+    response = get_api_client().get(GET_ALERTS_PATH, params={"orient": "split"}, headers={'Accept': TABLE_ACCEPT})
+    response.raise_for_status()
+    alerts_df = read_table_response(response, key='alerts')
+    if alerts_df.empty:
         return pd.DataFrame()
+    # L'identifiant stable fourni par l'API est utilisé pour le triage en masse
+    if 'alert_id' in alerts_df.columns:
+        alerts_df['id'] = alerts_df['alert_id'].astype(str)
+    else:
+        alerts_df['id'] = alerts_df.index.astype(str)
+    return alerts_df
+
+V_FEATURES = [f"V{i}" for i in range(1, 29)]
+# Variables du schéma Transaction de l'API (les alertes peuvent porter d'autres champs : entity_id...)
+FEATURE_COLUMNS = ["Time", *V_FEATURES, "Amount"]
 
 # 2. 🔑 MODIFICATION CLÉ : Retrait du chargement local du fichier CSV
-@st.cache_data
+@st.cache_resource(show_spinner=False)
 def get_historical_data():
     """
     Récupère des données historiques pour la visualisation UNIQUEMENT via l'API.
     Ceci est nécessaire pour le déploiement en ligne.
+    L'échantillon est chargé une fois par processus et partagé, en lecture seule, par toutes les
+    sessions (utils/data_loader.py). Lève requests.exceptions.RequestException en cas d'échec
+    (rien n'est mis en cache).
     """
-    with st.spinner("Chargement des données historiques..."):
-        try:
-            # Tente de récupérer les données depuis l'API déployée
-            response = requests.get(HISTORICAL_DATA_URL, timeout=10)
-            if response.status_code == 200:
-                data = response.json().get('data', [])
-                return pd.DataFrame(data)
-            else:
-                # Échec de l'API
-                st.error(f"Erreur lors de la récupération des données historiques depuis l'API : {response.status_code}")
-                return pd.DataFrame()
-        except requests.exceptions.RequestException as e:
-            # Échec de la connexion à l'API
-            st.error(f"Erreur de connexion à l'API pour les données historiques. Assurez-vous que l'API est saine. Erreur: {e}")
-            return pd.DataFrame()
+    # Arrow (compressé) si pyarrow est installé, sinon JSON "split" compressé en gzip/brotli
+    response = get_api_client().get(HISTORICAL_DATA_PATH, params={"orient": "split"},
+                                    headers={'Accept': TABLE_ACCEPT})
+    response.raise_for_status()
+    return read_only_frame(read_table_response(response))
+
+@st.cache_resource(show_spinner=False)
+def get_normal_feature_stats():
+    """Moyenne et écart-type de V1-V28 sur les transactions normales de l'échantillon historique (calculés une fois)."""
+    historical_df = get_historical_data()
+    normal_data = historical_df.loc[historical_df['Class'] == 0,
+                                    [feature for feature in V_FEATURES if feature in historical_df.columns]]
+    return pd.DataFrame({'mean': normal_data.mean(), 'std': normal_data.std()})
+
+@st.cache_resource(show_spinner=False)
+def get_normal_density(feature):
+    """
+    Courbe de densité (KDE réduite par LTTB) d'une variable sur les transactions normales,
+    calculée une fois par variable pour toutes les sessions. None si elle ne peut être estimée.
+    """
+    from scipy.stats import gaussian_kde
+
+    historical_df = get_historical_data()
+    values = historical_df.loc[historical_df['Class'] == 0, feature].dropna()
+    if values.nunique() < 2:  # Nécessite au moins 2 points pour kde
+        return None
+    try:
+        kde = gaussian_kde(values)
+    except ValueError:
+        # Gérer le cas où kde échoue (e.g., données non numériques ou trop peu de points)
+        return None
+    x_vals = np.linspace(values.min(), values.max(), 1000)
+    # Courbe réduite côté serveur (LTTB) pour borner la taille envoyée au navigateur
+    return lttb(x_vals, kde.evaluate(x_vals), n_out=MAX_LINE_POINTS)
+
+def get_api_health():
+    """Code HTTP de /health (lève requests.exceptions.RequestException si l'API est injoignable)."""
+    return get_api_client().get("/health", timeout=5).status_code
+
+def load_page_data(need_alerts: bool):
+    """
+    Charge en parallèle les données de la page (santé de l'API, alertes si la file locale est
+    à initialiser, données historiques) puis affiche les erreurs éventuelles.
+    Le temps de chargement est celui de l'appel le plus lent.
+    """
+    tasks = {"health": get_api_health, "historical": get_historical_data}
+    if need_alerts:
+        tasks["alerts"] = get_model_alerts
+    with st.spinner("Chargement des alertes et des données historiques..."):
+        results, errors = prefetch(tasks, slot=PAGE_SLOT, ttl=PAGE_DATA_TTL)
+
+    # Test de connexion à l'API
+    if "health" in errors:
+        st.error(f"⚠️ Impossible de se connecter à l'API ({API_URL}). Vérifiez la connectivité.")
+    elif results["health"] != 200:
+        st.error(f"⚠️ L'API ({API_URL}) n'est pas accessible. Statut: {results['health']}")
+    if "alerts" in errors:
+        st.error(f"Impossible de récupérer les alertes ({API_URL}{GET_ALERTS_PATH}). "
+                 f"Vérifiez l'état de l'API. Erreur: {errors['alerts']}")
+    if "historical" in errors:
+        st.error(f"Erreur lors de la récupération des données historiques depuis l'API. "
+                 f"Assurez-vous que l'API est saine. Erreur: {errors['historical']}")
+
+    return results.get("alerts", pd.DataFrame()), results.get("historical", pd.DataFrame())
 
 def find_most_anomalous_feature(current_transaction, historical_df):
     """
@@ -82,13 +143,11 @@ def find_most_anomalous_feature(current_transaction, historical_df):
         st.warning("La colonne 'Class' est manquante dans les données historiques de l'API.")
         return 'V1', 0.0
 
-    normal_data = historical_df[historical_df['Class'] == 0]
-
-    for feature in [f"V{i}" for i in range(1, 29)]:
-        if feature in normal_data.columns and feature in current_transaction:
-            mean = normal_data[feature].mean()
-            std = normal_data[feature].std()
+    # Statistiques des transactions normales partagées (calculées une fois, pas à chaque alerte)
+    feature_stats = get_normal_feature_stats()
 
+    for feature, mean, std in feature_stats.itertuples():
+        if feature in current_transaction:
             if std > 0:
                 # Assurez-vous que la valeur de la transaction est un float avant la soustraction
                 try:
@@ -113,36 +172,30 @@ def create_pca_plot(df, current_transaction, feature):
         st.error("Impossible de créer le graphique car les données historiques ou la colonne 'Class' sont manquantes.")
         return
 
-    normal_data = df[df['Class'] == 0]
     fraud_data = df[df['Class'] == 1]
 
-    # Générer la courbe de densité pour les transactions normales
-    if not normal_data.empty and len(normal_data[feature].unique()) > 1: # Nécessite au moins 2 points pour kde
-        try:
-            kde = gaussian_kde(normal_data[feature].dropna())
-            x_vals = np.linspace(normal_data[feature].min(), normal_data[feature].max(), 1000)
-            y_vals = kde.evaluate(x_vals)
-
-            fig.add_trace(go.Scatter(
-                x=x_vals, y=y_vals,
-                mode='lines',
-                name='Distribution Normale',
-                fill='tozeroy',
-                line_color='#28a745',
-                opacity=0.6
-            ))
-        except ValueError:
-            # Gérer le cas où kde échoue (e.g., données non numériques ou trop peu de points)
-            pass
+    # Courbe de densité des transactions normales (partagée, calculée une fois par variable)
+    density = get_normal_density(feature)
+    if density is not None:
+        x_vals, y_vals = density
+        fig.add_trace(go.Scatter(
+            x=x_vals, y=y_vals,
+            mode='lines',
+            name='Distribution Normale',
+            fill='tozeroy',
+            line_color='#28a745',
+            opacity=0.6
+        ))
 
     # Ajouter l'histogramme des transactions frauduleuses (pour référence)
+    # (bins calculés côté serveur : seules les bornes et densités sont transmises)
     if not fraud_data.empty:
-        fig.add_trace(go.Histogram(
-            x=fraud_data[feature],
+        edges, density = histogram_bins(fraud_data[feature], bins=30, density=True)
+        fig.add_trace(binned_bar_trace(
+            edges, density,
             name='Transactions Frauduleuses',
-            marker_color='#dc3545',
-            opacity=0.6,
-            histnorm='probability density'
+            color='#dc3545',
+            opacity=0.6
         ))
 
     # Ajouter la ligne de la transaction actuelle
@@ -176,7 +229,7 @@ def submit_feedback(feedback_data):
     """
     try:
         # 🚨 Utilisation de l'endpoint /alert pour le feedback
-        response = requests.post(ALERT_URL, json=feedback_data, timeout=10)
+        response = get_api_client().post(ALERT_PATH, json=feedback_data)
         if response.status_code == 200:
             return True
         else:
@@ -191,13 +244,10 @@ def send_feedback(transaction_id, transaction_data_series, model_pred: int, true
     Construit le corps de la requête AlertIn et envoie la rétroaction à l'API.
     """
     try:
-        # Convertir les données de la transaction du format Series au dictionnaire float
-        # Exclure les colonnes de métadonnées qui ne sont pas des features de transaction
-        keys_to_drop = ['id', 'model_prediction']
-        transaction_dict = transaction_data_series.drop(keys_to_drop, errors='ignore').to_dict()
-        
+        # Seules les variables du modèle sont envoyées : les métadonnées de l'alerte (alert_id,
+        # score, entity_id, champs ajoutés par le flux...) ne font pas partie du schéma Transaction
         # Le endpoint /alert nécessite que toutes les valeurs numériques soient des floats
-        transaction_features = {k: float(v) for k, v in transaction_dict.items() if isinstance(v, (int, float, str))}
+        transaction_features = {k: float(transaction_data_series[k]) for k in FEATURE_COLUMNS}
         
         feedback_data = {
             "transaction": transaction_features,
@@ -206,19 +256,93 @@ def send_feedback(transaction_id, transaction_data_series, model_pred: int, true
         }
         
         if submit_feedback(feedback_data):
-            st.success(message)
-            time.sleep(2)
+            # st.toast survit au st.rerun() : plus besoin de bloquer la page avec time.sleep()
+            st.toast(message)
             # Suppression de l'alerte de la file d'attente après confirmation réussie
             if 'alerts_queue' in st.session_state and st.session_state.alerts_queue:
                 st.session_state.alerts_queue.pop(0)
-            # Invalider le cache de la fonction get_model_alerts()
-            get_model_alerts.clear() 
+            # Invalider le cache de la fonction get_model_alerts() et les données de la page
+            get_model_alerts.clear()
+            invalidate(PAGE_SLOT)
             st.rerun()
         else:
             st.error("Échec de l'enregistrement de la rétroaction")
     except Exception as e:
         st.error(f"Erreur lors de la préparation/envoi de la rétroaction : {e}")
 
+def submit_bulk_feedback(labels):
+    """
+    Soumet en une seule requête le feedback d'un lot d'alertes via l'endpoint /alerts/feedback.
+    `labels` est une liste de dictionnaires {"alert_id": str, "user_feedback": int}.
+    Retourne la réponse de l'API, ou None en cas d'échec.
+    """
+    try:
+        response = get_api_client().post(BULK_FEEDBACK_PATH, json={"labels": labels}, timeout=30)
+        if response.status_code == 200:
+            return response.json()
+        st.error(f"Erreur lors de l'envoi du feedback en masse: {response.status_code} - {response.text}")
+        return None
+    except requests.exceptions.RequestException as e:
+        st.error(f"Erreur de connexion à l'API lors de l'envoi du feedback en masse: {e}")
+        return None
+
+def send_bulk_feedback(alert_ids, true_class: int):
+    """
+    Étiquette plusieurs alertes en un seul aller-retour puis les retire de la file locale.
+    """
+    if not alert_ids:
+        st.warning("Aucune alerte sélectionnée.")
+        return
+
+    result = submit_bulk_feedback([{"alert_id": alert_id, "user_feedback": true_class} for alert_id in alert_ids])
+    if result is None:
+        return
+
+    labelled = set(alert_ids)
+    st.session_state.alerts_queue = [
+        alert for alert in st.session_state.alerts_queue if alert['id'] not in labelled
+    ]
+    get_model_alerts.clear()
+    invalidate(PAGE_SLOT)
+    # Les identifiants traités n'existent plus dans les options du multiselect
+    st.session_state.pop("bulk_selected_alerts", None)
+
+    label = "fraude" if true_class == 1 else "légitime"
+    st.toast(f"{result.get('resolved', 0)} alerte(s) marquée(s) comme {label}.")
+    if result.get('unknown_ids'):
+        st.toast(f"{len(result['unknown_ids'])} alerte(s) déjà traitée(s) ou inconnue(s) côté API.")
+    st.rerun()
+
+def show_bulk_triage(alerts_queue):
+    """Affiche les actions de triage en masse (sélection multiple et « tout marquer comme légitime »)."""
+    with st.expander(f"⚡ Triage en masse ({len(alerts_queue)} alerte(s) en attente)"):
+        if not any('alert_id' in alert for alert in alerts_queue):
+            st.info("Le triage en masse nécessite des alertes identifiées par l'API (champ 'alert_id').")
+            return
+
+        alerts_by_id = {alert['id']: alert for alert in alerts_queue}
+        selected_ids = st.multiselect(
+            "Alertes à étiqueter :",
+            options=list(alerts_by_id),
+            format_func=lambda alert_id: (
+                f"{alert_id} — {float(alerts_by_id[alert_id].get('Amount', 0.0)):.2f} $"
+                f" — score {float(alerts_by_id[alert_id].get('prediction_score', 0.0)):.2f}"
+            ),
+            key="bulk_selected_alerts"
+        )
+
+        col_fraud, col_normal, col_all = st.columns(3)
+        with col_fraud:
+            if st.button("🚨 Sélection = FRAUDE", key="bulk_fraud", disabled=not selected_ids):
+                send_bulk_feedback(selected_ids, 1)
+        with col_normal:
+            if st.button("✅ Sélection = NORMAL", key="bulk_normal", disabled=not selected_ids):
+                send_bulk_feedback(selected_ids, 0)
+        with col_all:
+            if st.button("✅ Tout le reste = NORMAL", key="bulk_all_normal",
+                         help="Marque toutes les alertes restantes comme légitimes en une seule requête."):
+                send_bulk_feedback(list(alerts_by_id), 0)
+
 def show():
     """Affiche la page des alertes en temps réel avec des améliorations interactives."""
     # setup_page_config() # Décommenter si vous utilisez setup_page_config
@@ -231,18 +355,12 @@ def show():
         "Bienvenue dans votre file d'attente d'alertes. Validez les transactions suspectes une par une pour les retirer de la liste.")
     st.markdown("---")
 
-    # Test de connexion à l'API
-    try:
-        health_response = requests.get(f"{API_URL}/health", timeout=5)
-        if health_response.status_code != 200:
-            st.error(f"⚠️ L'API ({API_URL}) n'est pas accessible. Statut: {health_response.status_code}")
-    except:
-        st.error(f"⚠️ Impossible de se connecter à l'API ({API_URL}). Vérifiez la connectivité.")
+    # Santé de l'API, alertes et données historiques chargées en parallèle
+    alerts_df, historical_df = load_page_data(need_alerts='alerts_queue' not in st.session_state)
 
     # --- Gestion de la file d'attente ---
     if 'alerts_queue' not in st.session_state:
-        alerts_df = get_model_alerts()
-        
+
         required_cols = alerts_df.columns.tolist() 
         if 'id' not in required_cols:
             alerts_df['id'] = alerts_df.index.astype(str)
@@ -254,7 +372,6 @@ def show():
         st.session_state.alerts_queue = alerts_df.to_dict('records')
         st.session_state.initial_alerts_count = len(st.session_state.alerts_queue)
 
-    historical_df = get_historical_data()
     alerts_queue = st.session_state.alerts_queue
 
     if not alerts_queue:
@@ -268,6 +385,8 @@ def show():
         progress_value = 1.0 - (remaining_alerts / initial_alerts_count) if initial_alerts_count > 0 else 1.0
         st.progress(progress_value, text=f"**{remaining_alerts} alerte(s)** restante(s) à traiter")
 
+        show_bulk_triage(alerts_queue)
+
         current_transaction_data = alerts_queue[0]
         # Convertir en Series, en s'assurant que les colonnes numériques sont au bon format
         current_transaction = pd.Series(current_transaction_data).apply(pd.to_numeric, errors='ignore')
@@ -342,20 +461,20 @@ def show():
                          help="Cliquez pour valider la fraude. La transaction est retirée de la file.", type='primary'):
                 with st.spinner("Envoi de la rétroaction..."):
                     send_feedback(current_transaction['id'], 
-                                  current_transaction.drop(['id', 'model_prediction'], errors='ignore'), 
+                                  current_transaction.drop(['id', 'alert_id', 'model_prediction', 'prediction_score'], errors='ignore'), 
                                   model_verdict, 
                                   1,
-                                  "Rétroaction de *fraude* enregistrée avec succès ! Redirection...")
+                                  "Rétroaction de *fraude* enregistrée avec succès !")
         with col2:
             if st.button("✅ Confirmer NORMAL (Class=0)", key=f"normal_{current_transaction['id']}",
                          help="Cliquez pour confirmer que la transaction est normale. La transaction est retirée de la file.",
                          type='secondary'):
                 with st.spinner("Envoi de la rétroaction..."):
                     send_feedback(current_transaction['id'], 
-                                  current_transaction.drop(['id', 'model_prediction'], errors='ignore'), 
+                                  current_transaction.drop(['id', 'alert_id', 'model_prediction', 'prediction_score'], errors='ignore'), 
                                   model_verdict, 
                                   0,
-                                  "Rétroaction de transaction *normale* enregistrée avec succès ! Redirection...")
+                                  "Rétroaction de transaction *normale* enregistrée avec succès !")
 
         st.markdown('</div>', unsafe_allow_html=True)
 
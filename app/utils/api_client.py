@@ -0,0 +1,186 @@
+import math
+import random
+import threading
+import time
+
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+
+from utils.config import config_value
+
+# --- CLIENT HTTP PARTAGÉ VERS L'API DE SCORING ---
+# Une seule session requests par processus Streamlit (st.cache_resource) : les connexions
+# TCP/TLS vers l'API sont conservées (keep-alive) et réutilisées par toutes les pages et sessions.
+# Chaque appel a un délai de connexion et de lecture, les erreurs transitoires sont rejouées
+# avec un délai exponentiel aléatoire (« full jitter »), et un disjoncteur coupe les appels
+# pendant CIRCUIT_RESET_SECONDS après CIRCUIT_FAILURE_THRESHOLD échecs consécutifs, pour que
+# les pages échouent immédiatement au lieu d'attendre les délais quand l'API est indisponible.
+#
+# URL de l'API : variable d'environnement FRAUD_API_URL, sinon clé API_URL de
+# .streamlit/secrets.toml, sinon l'API déployée. Clé d'API (en-tête X-API-Key) : FRAUD_API_KEY,
+# sinon clé API_KEY de secrets.toml. Une réponse 429 (quota du client dépassé, requête non
+# traitée) est rejouée après le délai Retry-After s'il ne dépasse pas MAX_RATE_LIMIT_WAIT.
+
+DEFAULT_API_URL = "https://lamine-th0101-detection-fraud-bancaire-api.hf.space"
+
+CONNECT_TIMEOUT = 3.05
+DEFAULT_READ_TIMEOUT = 10
+MAX_RETRIES = 2
+BACKOFF_BASE = 0.25
+BACKOFF_MAX = 2.0
+# Réponses d'une passerelle ou d'une API momentanément indisponible
+RETRY_STATUSES = frozenset({502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+MAX_RATE_LIMIT_WAIT = 2.0
+POOL_SIZE = 16
+
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_SECONDS = 30.0
+
+
+API_URL = config_value("FRAUD_API_URL", "API_URL", DEFAULT_API_URL).rstrip("/")
+API_KEY = config_value("FRAUD_API_KEY", "API_KEY")
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Appel refusé sans contacter l'API : le disjoncteur est ouvert."""
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur à trois états : fermé (appels normaux), ouvert (appels refusés) après
+    failure_threshold échecs consécutifs, puis semi-ouvert après reset_seconds : un seul appel
+    d'essai est autorisé, qui referme le circuit s'il réussit et le rouvre sinon.
+    """
+
+    def __init__(self, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, reset_seconds=CIRCUIT_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_progress = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.reset_seconds else "open"
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_in_progress:
+                self._trial_in_progress = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_progress = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_in_progress or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial_in_progress = False
+
+    def retry_after(self):
+        """Secondes avant le prochain appel d'essai (0 si le circuit n'est pas ouvert)."""
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.reset_seconds - (time.monotonic() - self.opened_at))
+
+
+def backoff_delay(attempt):
+    """Délai avant la tentative attempt + 1 : tirage uniforme dans [0, min(max, base * 2^attempt)]."""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+def rate_limit_delay(response):
+    """Délai Retry-After (s) d'une réponse 429 s'il permet de rejouer la requête, None sinon."""
+    try:
+        delay = float(response.headers.get("Retry-After", ""))
+    except ValueError:
+        return None
+    return delay if 0 <= delay <= MAX_RATE_LIMIT_WAIT else None
+
+
+class ApiClient:
+    """Session HTTP vers l'API avec délais, reprises et disjoncteur."""
+
+    def __init__(self, base_url=API_URL, pool_size=POOL_SIZE, breaker=None, api_key=API_KEY):
+        self.base_url = base_url.rstrip("/")
+        self.breaker = breaker or CircuitBreaker()
+        self.session = requests.Session()
+        if api_key:
+            self.session.headers["X-API-Key"] = api_key
+        # Reprises gérées ici (et non par urllib3) pour appliquer la gigue et le disjoncteur
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def url(self, path):
+        return f"{self.base_url}{path}"
+
+    def request(self, method, path, timeout=DEFAULT_READ_TIMEOUT, retries=MAX_RETRIES, idempotent=None, **kwargs):
+        """
+        Envoie une requête et retourne la réponse (quel que soit son code HTTP).
+
+        `timeout` est le délai de lecture (le délai de connexion est CONNECT_TIMEOUT).
+        Les méthodes idempotentes (ou idempotent=True) sont rejouées après une erreur réseau, un
+        délai dépassé ou un code 502/503/504 ; les autres (POST qui créent des alertes ou écrivent
+        du feedback) seulement si la requête n'a pas été traitée : connexion impossible, 503, ou
+        429 avec un Retry-After court. Un 429 ne compte pas comme un échec pour le disjoncteur.
+        Lève une requests.exceptions.RequestException (CircuitOpenError si le circuit est ouvert).
+        """
+        method = method.upper()
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        if not self.breaker.allow():
+            raise CircuitOpenError(
+                f"API indisponible ({self.base_url}) : nouvel essai dans {math.ceil(self.breaker.retry_after())} s.")
+
+        for attempt in range(retries + 1):
+            last_attempt = attempt == retries
+            try:
+                response = self.session.request(method, self.url(path), timeout=(CONNECT_TIMEOUT, timeout), **kwargs)
+            except requests.exceptions.RequestException as e:
+                retryable = isinstance(e, requests.exceptions.ConnectTimeout) or (
+                    idempotent and isinstance(e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)))
+                if last_attempt or not retryable:
+                    self.breaker.record_failure()
+                    raise
+            else:
+                delay = rate_limit_delay(response) if response.status_code == 429 and not last_attempt else None
+                if delay is not None:
+                    response.close()
+                    time.sleep(delay)
+                    continue
+                if response.status_code in RETRY_STATUSES and not last_attempt and (idempotent or response.status_code == 503):
+                    response.close()
+                elif response.status_code >= 500:
+                    self.breaker.record_failure()
+                    return response
+                else:
+                    self.breaker.record_success()
+                    return response
+            time.sleep(backoff_delay(attempt))
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+
+@st.cache_resource
+def get_api_client():
+    """Client partagé par toutes les pages et sessions du processus Streamlit."""
+    return ApiClient(API_URL)
@@ -1,24 +1,41 @@
 import streamlit as st
-import time
 import re
 
 # Corrected import for ui_style
 from utils.ui_style import apply_login_form_style, set_background, custom_sidebar_style
 
 from utils.ui_style import apply_auth_button_style
+from utils.credentials import create_credential_store, authenticate, register
+from utils.session_tokens import issue_token, verify_token
 
-# --- Système de connexion simplifié (pour démonstration) ---
-# Vous pouvez connecter ce dictionnaire à une base de données dans une version plus avancée
-USERS = {
-    "user@gmail.com": "thiao123",
-    "admin@example.com": "adminpass"
-}
+# --- Système de connexion ---
+# Identifiants : magasin SQLite partagé, mots de passe stockés sous forme d'empreintes salées
+# (utils/credentials.py). Après connexion, un jeton signé à durée limitée (utils/session_tokens.py)
+# est conservé dans l'état de la session Streamlit uniquement, côté serveur : il n'apparaît ni
+# dans l'URL (historique, journaux, en-tête Referer, lien copié) ni dans le navigateur. À chaque
+# exécution, un jeton expiré ferme la session ; la déconnexion efface le jeton. Un rechargement
+# de la page ouvre une nouvelle session Streamlit : l'utilisateur se reconnecte.
 
-# Appliquer les styles au chargement du module
-set_background()
-custom_sidebar_style()
-apply_login_form_style()
-apply_auth_button_style()
+
+@st.cache_resource
+def get_credential_store():
+    """Magasin d'identifiants partagé par toutes les sessions du processus Streamlit."""
+    return create_credential_store()
+
+
+def apply_auth_styles(login_screen):
+    """
+    Injecte les styles de l'application, une fois par exécution du script (appelée par
+    check_authentication()). Streamlit retire à chaque rerun les éléments qui ne sont pas
+    réémis : les styles doivent être injectés à chaque exécution, et non à l'import du module
+    (qui n'a lieu qu'une fois par processus). Les styles du formulaire ne servent qu'à l'écran
+    de connexion.
+    """
+    set_background()
+    custom_sidebar_style()
+    if login_screen:
+        apply_login_form_style()
+        apply_auth_button_style()
 
 
 def validate_email(email):
@@ -47,32 +64,42 @@ def login_user(username, password):
         st.error("Format d'email invalide.")
         return
 
-    if username in USERS and USERS[username] == password:
-        st.session_state["logged_in"] = True
-        st.session_state["user_email"] = username
-        st.success(f"Bienvenue, {username} !")
-        time.sleep(1)
+    if authenticate(get_credential_store(), username, password):
+        start_session(username, issue_token(username))
         st.rerun()
     else:
         st.error("Nom d'utilisateur ou mot de passe incorrect.")
 
 
-def logout_user():
-    """Déconnecte l'utilisateur en réinitialisant les variables de session."""
+def start_session(username, token):
+    """Ouvre la session de l'utilisateur avec son jeton signé (conservé dans l'état de la session)."""
+    st.session_state["logged_in"] = True
+    st.session_state["user_email"] = username
+    st.session_state["auth_token"] = token
+
+
+def end_session():
+    """Réinitialise les variables de session et efface le jeton."""
     st.session_state["logged_in"] = False
     st.session_state["user_email"] = None
-    st.rerun()
+    st.session_state["auth_token"] = None
+
+
+def logout_user():
+    """Déconnecte l'utilisateur en réinitialisant les variables de session."""
+    end_session()
 
 
 def register_user(username, password, confirm_password):
-    """Simule l'inscription d'un nouvel utilisateur avec une validation améliorée."""
+    """Inscrit un nouvel utilisateur dans le magasin d'identifiants, après validation."""
     # Validation de l'email
     if not validate_email(username):
         st.error("Format d'email invalide.")
         return
 
     # Validation de l'existence de l'utilisateur
-    if username in USERS:
+    store = get_credential_store()
+    if store.get_hash(username) is not None:
         st.error("Ce nom d'utilisateur existe déjà.")
         return
 
@@ -86,19 +113,15 @@ def register_user(username, password, confirm_password):
         st.error("Les mots de passe ne correspondent pas.")
         return
 
-    # Si toutes les validations passent
-    USERS[username] = password
-    st.session_state["logged_in"] = False
-    st.session_state["user_email"] = None
+    # Si toutes les validations passent (l'unicité est garantie par le magasin en cas d'inscriptions simultanées)
+    if not register(store, username, password):
+        st.error("Ce nom d'utilisateur existe déjà.")
+        return
     st.success("Inscription réussie ! Vous pouvez maintenant vous connecter.")
-    time.sleep(2)
-    st.rerun()
 
 
 def show_login_form():
     """Affiche le formulaire de connexion et d'inscription."""
-    apply_login_form_style()
-
     # Centrer le contenu en utilisant des colonnes vides
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
@@ -136,10 +159,23 @@ def is_logged_in():
     return st.session_state["logged_in"]
 
 
+def check_session_expiry():
+    """Ferme la session si son jeton signé a expiré (vérification sans accès à la base)."""
+    token = st.session_state.get("auth_token")
+    if not st.session_state["logged_in"] or token is None:
+        return  # Pas de session, ou session ouverte côté serveur sans jeton
+    if verify_token(token) is None:
+        end_session()
+        st.warning("Votre session a expiré. Veuillez vous reconnecter.")
+
+
 def check_authentication():
     """Vérifie l'état de l'authentification et gère l'affichage du formulaire ou de la page principale."""
     if "logged_in" not in st.session_state:
         st.session_state["logged_in"] = False
+    check_session_expiry()
+
+    apply_auth_styles(login_screen=not st.session_state["logged_in"])
 
     if not st.session_state["logged_in"]:
         show_login_form()
@@ -0,0 +1,257 @@
+import gzip
+import json
+import os
+import tempfile
+import time
+import weakref
+
+import numpy as np
+import pandas as pd
+import requests
+
+from utils.api_client import get_api_client
+from utils.data_loader import read_table_response, TABLE_ACCEPT
+from utils.local_scoring import FEATURE_COLUMNS, predict_frame, local_first, local_fallback_allowed
+
+# --- SCORING PAR LOT D'UN FICHIER DE TRANSACTIONS ---
+# Le fichier déposé (CSV, CSV.gz ou Parquet) est lu par blocs de READ_CHUNK_ROWS lignes. Chaque
+# bloc est validé par des opérations vectorisées sur les colonnes (schéma Transaction de l'API :
+# 30 variables numériques finies), noté par tranches de API_CHUNK_ROWS lignes (API ou modèle
+# embarqué, selon utils/local_scoring.py), puis ajouté à un CSV compressé en gzip écrit sur disque.
+# Seuls des compteurs sont conservés entre les blocs : la mémoire utilisée dépend de la taille
+# des blocs, pas de celle du fichier.
+#
+# Le fichier de résultats reprend, pour chaque ligne du fichier : son numéro, les colonnes hors
+# variables du modèle (identifiants, Class...), le montant, la prédiction, la probabilité de
+# fraude et, pour une ligne rejetée, les colonnes invalides.
+#
+# Les fichiers de résultats sont écrits dans RESULTS_DIR et rattachés à la session qui les a
+# produits (ResultFile, conservé dans st.session_state) : ils sont supprimés à une nouvelle
+# analyse, à la fin de la session (objet libéré) ou à l'arrêt du processus. Chaque analyse purge
+# aussi les fichiers de plus de RESULT_MAX_AGE secondes et les plus anciens au-delà de
+# RESULT_MAX_FILES (sessions interrompues par un arrêt brutal).
+
+PREDICT_BATCH_PATH = "/predict_batch"
+API_CHUNK_ROWS = 5000
+READ_CHUNK_ROWS = 50_000
+MAX_REPORTED_ERRORS = 20
+RESULTS_DIR = os.path.join(tempfile.gettempdir(), 'fraud_scoring_results')
+RESULT_MAX_AGE = 6 * 3600
+RESULT_MAX_FILES = 20
+
+
+class BatchValidationError(ValueError):
+    """Fichier inutilisable (format non pris en charge, colonnes manquantes...)."""
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class ResultFile:
+    """Fichier de résultats d'une session, supprimé quand l'objet est libéré ou par discard()."""
+
+    def __init__(self, path):
+        self.path = path
+        self._finalizer = weakref.finalize(self, _remove_file, path)
+
+    @property
+    def available(self):
+        return os.path.exists(self.path)
+
+    def discard(self):
+        self._finalizer()
+
+
+def purge_results(directory=RESULTS_DIR, max_age=RESULT_MAX_AGE, max_files=RESULT_MAX_FILES):
+    """Supprime les fichiers de résultats expirés, puis les plus anciens au-delà de max_files."""
+    try:
+        entries = sorted((entry for entry in os.scandir(directory) if entry.is_file()),
+                         key=lambda entry: entry.stat().st_mtime)
+    except OSError:
+        return
+    cutoff = time.time() - max_age
+    expired = [entry for entry in entries if entry.stat().st_mtime < cutoff]
+    for entry in entries[:max(len(expired), len(entries) - max_files)]:
+        _remove_file(entry.path)
+
+
+def predict_remote(df):
+    """
+    Prédictions et probabilités de fraude de l'API (/predict_batch), par tranches de
+    API_CHUNK_ROWS lignes. Les probabilités valent None si l'API ne les renvoie pas.
+    Lève requests.exceptions.RequestException si l'API est injoignable ou répond en erreur.
+    """
+    predictions, probabilities = [], []
+    for start in range(0, len(df), API_CHUNK_ROWS):
+        chunk = df.iloc[start:start + API_CHUNK_ROWS]
+        data_to_send = {'transactions': chunk[FEATURE_COLUMNS].astype(float).to_dict('records')}
+        # Corps JSON compressé en gzip ; réponse en Arrow si pyarrow est disponible
+        body = gzip.compress(json.dumps(data_to_send).encode('utf-8'), compresslevel=5)
+        headers = {'Content-Type': 'application/json', 'Content-Encoding': 'gzip', 'Accept': TABLE_ACCEPT}
+
+        # /predict_batch ne modifie pas l'état de l'API : il peut être rejoué sans risque
+        response = get_api_client().post(PREDICT_BATCH_PATH, data=body, headers=headers, timeout=120, idempotent=True)
+        response.raise_for_status()
+
+        if response.headers.get('content-type', '').startswith('application/json'):
+            payload = response.json()
+            predictions.extend(payload.get('predictions', []))
+            probabilities.extend(payload.get('probabilities') or [np.nan] * len(chunk))
+        else:
+            result = read_table_response(response)
+            predictions.extend(result['prediction'].tolist())
+            probabilities.extend(result['probability'].tolist() if 'probability' in result else [np.nan] * len(chunk))
+
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    return np.asarray(predictions, dtype=np.int64), (None if np.isnan(probabilities).all() else probabilities)
+
+
+def score_frame(df, local=False):
+    """
+    (prédictions, probabilités, backend) pour les lignes de df : modèle embarqué si `local` ou si
+    le backend configuré est "local", sinon l'API avec repli sur le modèle embarqué (mode "auto").
+    """
+    if local or local_first():
+        return (*predict_frame(df), 'local')
+    try:
+        return (*predict_remote(df), 'api')
+    except requests.exceptions.RequestException:
+        if not local_fallback_allowed():
+            raise
+        return (*predict_frame(df), 'local')
+
+
+def iter_upload(uploaded_file):
+    """Blocs (DataFrame, avancement entre 0 et 1) d'un fichier CSV, CSV.gz ou Parquet déposé."""
+    name = uploaded_file.name.lower()
+    size = max(uploaded_file.size, 1)
+    if name.endswith('.parquet'):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise BatchValidationError("Lecture Parquet indisponible : pyarrow n'est pas installé.")
+        parquet_file = pq.ParquetFile(uploaded_file)
+        total_rows, rows_read = max(parquet_file.metadata.num_rows, 1), 0
+        for batch in parquet_file.iter_batches(batch_size=READ_CHUNK_ROWS):
+            rows_read += batch.num_rows
+            yield batch.to_pandas(), rows_read / total_rows
+    elif name.endswith(('.csv', '.csv.gz')):
+        compression = 'gzip' if name.endswith('.gz') else None
+        # Avancement estimé à partir de la position dans le fichier (octets compressés pour un .gz)
+        for chunk in pd.read_csv(uploaded_file, chunksize=READ_CHUNK_ROWS, compression=compression, low_memory=False):
+            yield chunk, min(uploaded_file.tell() / size, 1.0)
+    else:
+        raise BatchValidationError(f"Format non pris en charge : {uploaded_file.name} (CSV, CSV.gz ou Parquet).")
+
+
+def validate_chunk(chunk):
+    """
+    Valide un bloc selon le schéma Transaction : (variables en float64, masque des lignes valides,
+    colonnes invalides par ligne). Lève BatchValidationError si des colonnes manquent.
+    """
+    missing = [col for col in FEATURE_COLUMNS if col not in chunk.columns]
+    if missing:
+        raise BatchValidationError(f"Colonnes manquantes : {', '.join(missing)}")
+
+    # Conversion numérique colonne par colonne (valeurs non numériques -> NaN), puis contrôle des valeurs finies
+    features = chunk[FEATURE_COLUMNS].apply(pd.to_numeric, errors='coerce').astype(np.float64)
+    finite = np.isfinite(features.to_numpy())
+    valid = finite.all(axis=1)
+
+    invalid_columns = pd.Series('', index=chunk.index)
+    if not valid.all():
+        bad = ~finite[~valid]
+        names = np.asarray(FEATURE_COLUMNS)
+        invalid_columns[~valid] = [', '.join(names[row]) for row in bad]
+    return features, valid, invalid_columns
+
+
+def score_upload(uploaded_file, on_progress=None):
+    """
+    Valide, note et enregistre les résultats d'un fichier déposé. Retourne (résumé, exemples
+    d'erreurs, ResultFile du CSV gzip de résultats). `on_progress(avancement, lignes lues)` est appelé
+    après chaque bloc. Lève BatchValidationError si le fichier est inutilisable, et
+    requests.exceptions.RequestException si l'API seule est configurée et qu'elle échoue.
+    """
+    started = time.perf_counter()
+    counts = {'rows': 0, 'scored': 0, 'rejected': 0, 'frauds': 0, 'fraud_amount': 0.0,
+              'labelled_frauds': 0, 'detected_frauds': 0}
+    has_labels = False
+    backends = set()
+    errors = []
+
+    # Place faite pour le nouveau fichier : au plus RESULT_MAX_FILES fichiers avec celui-ci
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    purge_results(max_files=RESULT_MAX_FILES - 1)
+    fd, path = tempfile.mkstemp(prefix='scoring_', suffix='.csv.gz', dir=RESULTS_DIR)
+    os.close(fd)
+    output = ResultFile(path)
+    try:
+        with gzip.open(output.path, 'wt', encoding='utf-8', newline='', compresslevel=5) as out:
+            for chunk, progress in iter_upload(uploaded_file):
+                features, valid, invalid_columns = validate_chunk(chunk)
+                row_numbers = np.arange(counts['rows'] + 1, counts['rows'] + len(chunk) + 1)
+
+                predictions = np.full(len(chunk), -1, dtype=np.int64)
+                probabilities = np.full(len(chunk), np.nan)
+                if valid.any():
+                    # Après un repli sur le modèle embarqué, les blocs suivants restent en local
+                    scored, scores, backend = score_frame(features[valid], local='local' in backends)
+                    backends.add(backend)
+                    predictions[valid] = scored
+                    if scores is not None:
+                        probabilities[valid] = scores
+
+                extra_columns = [col for col in chunk.columns if col not in FEATURE_COLUMNS]
+                result = chunk[extra_columns].copy()
+                result.insert(0, 'row', row_numbers)
+                result['Amount'] = features['Amount']
+                result['prediction'] = pd.array(np.where(valid, predictions, None), dtype='Int8')
+                result['probability'] = probabilities
+                result['invalid_columns'] = invalid_columns
+                result.to_csv(out, header=counts['rows'] == 0, index=False)
+
+                frauds = valid & (predictions == 1)
+                counts['rows'] += len(chunk)
+                counts['scored'] += int(valid.sum())
+                counts['rejected'] += int((~valid).sum())
+                counts['frauds'] += int(frauds.sum())
+                counts['fraud_amount'] += float(features['Amount'].to_numpy()[frauds].sum())
+                if 'Class' in chunk.columns:
+                    has_labels = True
+                    labels = pd.to_numeric(chunk['Class'], errors='coerce').to_numpy() == 1
+                    counts['labelled_frauds'] += int((labels & valid).sum())
+                    counts['detected_frauds'] += int((labels & frauds).sum())
+
+                for row in np.flatnonzero(~valid)[:MAX_REPORTED_ERRORS - len(errors)]:
+                    errors.append({'Ligne': int(row_numbers[row]), 'Colonnes invalides': invalid_columns.iloc[row]})
+
+                if on_progress is not None:
+                    on_progress(progress, counts['rows'])
+    except Exception:
+        output.discard()
+        raise
+
+    if counts['rows'] == 0:
+        output.discard()
+        raise BatchValidationError("Le fichier ne contient aucune transaction.")
+
+    elapsed = time.perf_counter() - started
+    summary = {
+        "Transactions lues": f"{counts['rows']:,}",
+        "Transactions notées": f"{counts['scored']:,}",
+        "Lignes rejetées (schéma)": f"{counts['rejected']:,}",
+        "Fraudes prédites": f"{counts['frauds']:,}",
+        "Taux de fraude prédit": f"{counts['frauds'] / counts['scored']:.3%}" if counts['scored'] else "-",
+        "Montant des fraudes prédites": f"{counts['fraud_amount']:,.2f} $",
+        "Backend de scoring": ' + '.join(sorted(backends)) or "-",
+        "Durée": f"{elapsed:.1f} s ({counts['rows'] / elapsed:,.0f} lignes/s)",
+    }
+    if has_labels:
+        summary["Fraudes réelles détectées (Class = 1)"] = (
+            f"{counts['detected_frauds']:,} / {counts['labelled_frauds']:,}")
+    return summary, errors, output
@@ -0,0 +1,112 @@
+import numpy as np
+import plotly.graph_objects as go
+
+# --- GRAPHIQUES À CHARGE BORNÉE ---
+# Les données sont agrégées côté serveur avant d'être envoyées au navigateur :
+# - histogrammes : seules les bornes et les comptes des bins sont transmis ;
+# - nuages de points / courbes : sous-échantillonnage (LTTB ou échantillonnage uniforme
+#   conservant toutes les fraudes).
+# La taille du JSON Plotly ne dépend donc plus du nombre de lignes filtrées.
+
+MAX_HISTOGRAM_BINS = 100
+MAX_LINE_POINTS = 500
+MAX_SCATTER_POINTS = 2000
+
+CLASS_COLORS = {0: 'blue', 1: 'red'}
+
+
+def histogram_bins(values, bins=50, value_range=None, density=False):
+    """
+    Calcule l'histogramme côté serveur. Retourne (bornes, comptes).
+    `density=True` normalise comme histnorm='probability density' de Plotly.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = values[np.isfinite(values)]
+    bins = min(int(bins), MAX_HISTOGRAM_BINS)
+    if len(values) == 0:
+        return np.array([0.0, 1.0]), np.zeros(1)
+    counts, edges = np.histogram(values, bins=bins, range=value_range, density=density)
+    return edges, counts
+
+
+def binned_bar_trace(edges, counts, name, color, opacity=None):
+    """Trace Plotly d'un histogramme pré-calculé : une barre par bin (centre + largeur)."""
+    edges = np.asarray(edges, dtype=np.float64)
+    return go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2,
+        y=np.asarray(counts),
+        width=np.diff(edges),
+        name=name,
+        marker_color=color,
+        opacity=opacity,
+    )
+
+
+def binned_histogram_figure(edges, counts_by_series, colors, title=None, x_title=None, y_title='count',
+                            legend_title=None, barmode='stack'):
+    """
+    Figure d'histogramme à partir de bins pré-calculés.
+    `counts_by_series` associe un nom de série à ses comptes (mêmes bornes pour toutes les séries).
+    """
+    fig = go.Figure()
+    for name, counts in counts_by_series.items():
+        fig.add_trace(binned_bar_trace(edges, counts, name=str(name), color=colors.get(name)))
+    fig.update_layout(
+        title_text=title,
+        xaxis_title_text=x_title,
+        yaxis_title_text=y_title,
+        legend_title_text=legend_title,
+        barmode=barmode,
+        bargap=0,
+    )
+    return fig
+
+
+def lttb(x, y, n_out=MAX_LINE_POINTS):
+    """
+    Sous-échantillonnage Largest-Triangle-Three-Buckets d'une courbe (x trié).
+    Conserve la forme visuelle (pics, creux) avec au plus `n_out` points.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return x, y
+
+    # n_out - 2 buckets entre le premier et le dernier point (toujours conservés)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    previous = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_start = edges[i + 1]
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_stop].mean()
+        avg_y = y[next_start:next_stop].mean()
+
+        areas = np.abs((x[previous] - avg_x) * (y[start:stop] - y[previous])
+                       - (x[previous] - x[start:stop]) * (avg_y - y[previous]))
+        previous = start + int(np.argmax(areas))
+        selected[i + 1] = previous
+
+    return x[selected], y[selected]
+
+
+def sample_keep_all(df, max_points=MAX_SCATTER_POINTS, keep_column='Class', keep_value=1, seed=42):
+    """
+    Sous-échantillonne un DataFrame pour un nuage de points en conservant toutes les lignes
+    où `keep_column == keep_value` (les fraudes) ; le reste est tiré uniformément sans remise.
+    """
+    if len(df) <= max_points:
+        return df
+
+    keep = (df[keep_column] == keep_value).to_numpy() if keep_column in df.columns else np.zeros(len(df), bool)
+    kept = np.flatnonzero(keep)
+    others = np.flatnonzero(~keep)
+    n_others = min(max(max_points - len(kept), 0), len(others))
+
+    rng = np.random.default_rng(seed)
+    chosen = rng.choice(others, size=n_others, replace=False)
+    return df.iloc[np.sort(np.concatenate([kept, chosen]))]
@@ -0,0 +1,18 @@
+import os
+
+import streamlit as st
+
+# --- PARAMÈTRES DE L'APPLICATION ---
+# Chaque paramètre est lu dans une variable d'environnement, sinon dans .streamlit/secrets.toml.
+# Module sans dépendance lourde : importable par l'écran de connexion.
+
+
+def config_value(env_name, secret_name, default=None):
+    """Paramètre de l'application : variable d'environnement, sinon clé de .streamlit/secrets.toml."""
+    value = os.environ.get(env_name)
+    if not value:
+        try:
+            value = st.secrets.get(secret_name)
+        except Exception:  # Pas de fichier secrets.toml
+            value = None
+    return value or default
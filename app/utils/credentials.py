@@ -0,0 +1,200 @@
+import base64
+import functools
+import hashlib
+import hmac
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from utils.config import config_value
+
+# --- MAGASIN D'IDENTIFIANTS DE L'APPLICATION ---
+# Deux implémentations de la même interface :
+# - MemoryCredentialStore : dictionnaire en mémoire du processus (démonstration, tests) ;
+# - SQLiteCredentialStore : base SQLite (mode WAL) partagée par les processus et répliques qui
+#   montent le même volume ; utilisée par défaut.
+# FRAUD_AUTH_DB (ou la clé AUTH_DB de secrets.toml) donne le chemin de la base ; "memory"
+# sélectionne le magasin en mémoire.
+#
+# Seules des empreintes PBKDF2-HMAC-SHA256 salées sont stockées
+# ("pbkdf2_sha256$<itérations>$<sel>$<empreinte>"). Le nombre d'itérations est calibré au premier
+# calcul d'empreinte pour qu'une vérification prenne environ HASH_TARGET_MS millisecondes sur la
+# machine (jamais moins de MIN_ITERATIONS) ; une empreinte calculée avec moins de la moitié de ce
+# nombre (machine plus rapide, cible relevée) est recalculée à la connexion suivante.
+# hashlib libère le GIL pendant le calcul : les connexions simultanées des sessions Streamlit
+# (un thread chacune) s'exécutent en parallèle.
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_AUTH_DB = os.path.join(APP_DIR, 'users.db')
+
+HASH_ALGORITHM = 'pbkdf2_sha256'
+HASH_TARGET_MS = float(os.environ.get('FRAUD_AUTH_HASH_TARGET_MS', '100'))
+MIN_ITERATIONS = 100_000
+SALT_BYTES = 16
+
+# Comptes de démonstration créés dans un magasin vide (anciens identifiants codés en dur)
+DEMO_USERS = {
+    "user@gmail.com": "thiao123",
+    "admin@example.com": "adminpass"
+}
+
+
+def calibrate_iterations(target_ms: float = HASH_TARGET_MS, sample_iterations: int = 20_000) -> int:
+    """Nombre d'itérations PBKDF2 pour qu'un calcul d'empreinte dure environ target_ms sur cette machine."""
+    start = time.perf_counter()
+    hashlib.pbkdf2_hmac('sha256', b'calibration', b'0' * SALT_BYTES, sample_iterations)
+    elapsed_ms = max((time.perf_counter() - start) * 1000, 1e-3)
+    return max(MIN_ITERATIONS, int(sample_iterations * target_ms / elapsed_ms) // 1000 * 1000)
+
+
+@functools.lru_cache(maxsize=None)
+def hash_iterations() -> int:
+    """Nombre d'itérations des nouvelles empreintes (calibré une fois par processus, à la première utilisation)."""
+    return calibrate_iterations()
+
+
+def hash_password(password: str, iterations: Optional[int] = None) -> str:
+    """Empreinte salée du mot de passe, au format "pbkdf2_sha256$<itérations>$<sel>$<empreinte>"."""
+    iterations = iterations or hash_iterations()
+    salt = secrets.token_bytes(SALT_BYTES)
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iterations)
+    return f"{HASH_ALGORITHM}${iterations}${base64.b64encode(salt).decode('ascii')}${base64.b64encode(digest).decode('ascii')}"
+
+
+def verify_password(password: str, encoded: str) -> bool:
+    """Vrai si le mot de passe correspond à l'empreinte (comparaison en temps constant)."""
+    try:
+        algorithm, iterations, salt, expected = encoded.split('$')
+        iterations, salt, expected = int(iterations), base64.b64decode(salt), base64.b64decode(expected)
+    except ValueError:  # Empreinte mal formée (binascii.Error hérite de ValueError)
+        return False
+    if algorithm != HASH_ALGORITHM:
+        return False
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iterations)
+    return hmac.compare_digest(digest, expected)
+
+
+def needs_rehash(encoded: str) -> bool:
+    """Vrai si l'empreinte a été calculée avec moins de la moitié des itérations du réglage actuel."""
+    try:
+        return int(encoded.split('$')[1]) * 2 < hash_iterations()
+    except (IndexError, ValueError):
+        return True
+
+
+@functools.lru_cache(maxsize=None)
+def _dummy_hash() -> str:
+    """Empreinte vérifiée pour un utilisateur inconnu : même durée de réponse qu'un mauvais mot de passe."""
+    return hash_password(secrets.token_urlsafe(16))
+
+
+class MemoryCredentialStore:
+    """Identifiants en mémoire (un seul processus, perdus au redémarrage)."""
+
+    def __init__(self):
+        self._hashes = {}
+        self._lock = threading.Lock()
+
+    def get_hash(self, username: str) -> Optional[str]:
+        return self._hashes.get(username)
+
+    def add_user(self, username: str, password_hash: str) -> bool:
+        """Crée le compte ; False si l'utilisateur existe déjà."""
+        with self._lock:
+            if username in self._hashes:
+                return False
+            self._hashes[username] = password_hash
+            return True
+
+    def set_hash(self, username: str, password_hash: str):
+        with self._lock:
+            self._hashes[username] = password_hash
+
+    def count(self) -> int:
+        return len(self._hashes)
+
+
+class SQLiteCredentialStore:
+    """
+    Identifiants dans une base SQLite partagée entre processus.
+    Une connexion par thread ; le nom d'utilisateur est la clé primaire : deux inscriptions
+    simultanées du même nom ne peuvent pas aboutir toutes les deux.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS users ("
+                " username TEXT PRIMARY KEY,"
+                " password_hash TEXT NOT NULL,"
+                " created_at REAL NOT NULL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get_hash(self, username: str) -> Optional[str]:
+        row = self._connection().execute(
+            "SELECT password_hash FROM users WHERE username = ?", (username,)).fetchone()
+        return row[0] if row else None
+
+    def add_user(self, username: str, password_hash: str) -> bool:
+        """Crée le compte ; False si l'utilisateur existe déjà."""
+        conn = self._connection()
+        with conn:
+            cursor = conn.execute("INSERT OR IGNORE INTO users VALUES (?, ?, ?)",
+                                  (username, password_hash, time.time()))
+            return cursor.rowcount == 1
+
+    def set_hash(self, username: str, password_hash: str):
+        conn = self._connection()
+        with conn:
+            conn.execute("UPDATE users SET password_hash = ? WHERE username = ?", (password_hash, username))
+
+    def count(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+
+def create_credential_store(path: Optional[str] = None):
+    """
+    Magasin SQLite (chemin configuré ou DEFAULT_AUTH_DB), ou magasin en mémoire si le chemin vaut
+    "memory". Un magasin vide reçoit les comptes de démonstration.
+    """
+    path = path or config_value('FRAUD_AUTH_DB', 'AUTH_DB', DEFAULT_AUTH_DB)
+    store = MemoryCredentialStore() if path == 'memory' else SQLiteCredentialStore(path)
+    if store.count() == 0:
+        for username, password in DEMO_USERS.items():
+            store.add_user(username, hash_password(password))
+    return store
+
+
+def authenticate(store, username: str, password: str) -> bool:
+    """
+    Vérifie les identifiants. Un utilisateur inconnu coûte le même calcul qu'un mauvais mot de
+    passe ; une empreinte calculée avec moins d'itérations que le réglage actuel est remplacée.
+    """
+    encoded = store.get_hash(username)
+    if encoded is None:
+        verify_password(password, _dummy_hash())
+        return False
+    if not verify_password(password, encoded):
+        return False
+    if needs_rehash(encoded):
+        store.set_hash(username, hash_password(password))
+    return True
+
+
+def register(store, username: str, password: str) -> bool:
+    """Crée le compte avec l'empreinte du mot de passe ; False si l'utilisateur existe déjà."""
+    return store.add_user(username, hash_password(password))
@@ -0,0 +1,159 @@
+import numpy as np
+import pandas as pd
+
+from utils.data_loader import AMOUNT_CATEGORY_BINS, AMOUNT_CATEGORY_LABELS
+
+# --- CUBE D'AGRÉGATS (OLAP) POUR LE DASHBOARD ---
+# Dimensions : Heure (24) x Tranche de montant x Class (2) x Predicted_Class (2).
+# Chaque cellule contient un nombre de transactions et une somme de montants.
+# Les tranches de montant servent à la fois de bins d'histogramme, de support au filtre
+# de montant et (par regroupement) de dimension Amount_Category.
+
+N_HOURS = 24
+FINE_AMOUNT_LIMIT = 1000.0  # Résolution de 1 $ jusqu'à 1000 $, puis tranches logarithmiques
+N_COARSE_BINS = 60
+
+
+def build_amount_edges(max_amount):
+    """
+    Construit les bornes des tranches de montant du cube.
+    Toutes les bornes des catégories de montant et des filtres rapides (10, 50, 100, 500, 1000)
+    sont des bornes de tranche : les filtres correspondants sont donc exacts.
+    """
+    fine_edges = np.arange(0.0, FINE_AMOUNT_LIMIT, 1.0)
+    upper = max(float(np.ceil(max_amount)) + 1.0, FINE_AMOUNT_LIMIT + 1.0)
+    coarse_edges = np.round(np.geomspace(FINE_AMOUNT_LIMIT, upper, N_COARSE_BINS + 1))
+    category_edges = [edge for edge in AMOUNT_CATEGORY_BINS if np.isfinite(edge)]
+    return np.unique(np.concatenate([fine_edges, coarse_edges, category_edges]))
+
+
+class AmountCube:
+    """
+    Cube pré-agrégé construit une seule fois par version du jeu de données et du modèle.
+    Les requêtes du Dashboard se résolvent en sommes de cellules, sans parcourir les lignes.
+    Les tranches sont semi-ouvertes : une tranche [a, b) contient les montants a <= x < b.
+    """
+
+    def __init__(self, amount_edges, counts, amount_sums, version=None):
+        self.amount_edges = amount_edges
+        self.counts = counts
+        self.amount_sums = amount_sums
+        self.version = version
+        # Catégorie de montant (index dans AMOUNT_CATEGORY_LABELS) de chaque tranche
+        self.bin_category = np.searchsorted(AMOUNT_CATEGORY_BINS, amount_edges[:-1], side='right') - 1
+
+    @classmethod
+    def from_arrays(cls, hours, amounts, classes, predictions, version=None):
+        """Construit le cube en un seul passage vectorisé (np.bincount) sur les lignes."""
+        amounts = np.asarray(amounts, dtype=np.float64)
+        amount_edges = build_amount_edges(amounts.max() if len(amounts) else 0.0)
+        n_bins = len(amount_edges) - 1
+
+        bin_idx = np.clip(np.searchsorted(amount_edges, amounts, side='right') - 1, 0, n_bins - 1)
+        cell = ((np.asarray(hours, dtype=np.int64) * n_bins + bin_idx) * 2
+                + np.asarray(classes, dtype=np.int64)) * 2 + np.asarray(predictions, dtype=np.int64)
+
+        shape = (N_HOURS, n_bins, 2, 2)
+        size = int(np.prod(shape))
+        counts = np.bincount(cell, minlength=size).reshape(shape)
+        amount_sums = np.bincount(cell, weights=amounts, minlength=size).reshape(shape)
+        return cls(amount_edges, counts, amount_sums, version=version)
+
+    def amount_bin_range(self, amount_min=None, amount_max=None):
+        """Convertit une plage de montant [amount_min, amount_max) en plage d'indices de tranches."""
+        start = 0 if amount_min is None else int(np.searchsorted(self.amount_edges, amount_min, side='right') - 1)
+        stop = len(self.amount_edges) - 1 if amount_max is None else int(np.searchsorted(self.amount_edges, amount_max, side='left'))
+        return max(start, 0), max(stop, 0)
+
+    def query(self, fraud_class=None, amount_min=None, amount_max=None, hour_min=0, hour_max=N_HOURS - 1):
+        """
+        Sélectionne les cellules correspondant aux filtres de la barre latérale.
+        Retourne un CubeSlice (vues NumPy, aucune copie des lignes).
+        """
+        start, stop = self.amount_bin_range(amount_min, amount_max)
+        class_slice = slice(None) if fraud_class is None else slice(fraud_class, fraud_class + 1)
+        selection = (slice(hour_min, hour_max + 1), slice(start, stop), class_slice, slice(None))
+
+        return CubeSlice(
+            counts=self.counts[selection],
+            amount_sums=self.amount_sums[selection],
+            hours=np.arange(hour_min, hour_max + 1),
+            amount_edges=self.amount_edges[start:stop + 1],
+            classes=np.arange(2)[class_slice],
+            bin_category=self.bin_category[start:stop],
+        )
+
+
+class CubeSlice:
+    """Sous-cube issu d'une requête ; fournit les KPIs et les données de graphiques."""
+
+    def __init__(self, counts, amount_sums, hours, amount_edges, classes, bin_category):
+        self.counts = counts
+        self.amount_sums = amount_sums
+        self.hours = hours
+        self.amount_edges = amount_edges
+        self.classes = classes
+        self.bin_category = bin_category
+
+    def _class_index(self, value):
+        matches = np.flatnonzero(self.classes == value)
+        return int(matches[0]) if len(matches) else None
+
+    def kpis(self):
+        """Calcule les indicateurs du Dashboard à partir des cellules sélectionnées."""
+        total_transactions = int(self.counts.sum())
+        fraud_idx = self._class_index(1)
+        normal_idx = self._class_index(0)
+
+        total_fraud_transactions = int(self.counts[:, :, fraud_idx, :].sum()) if fraud_idx is not None else 0
+        total_fraud_amount = float(self.amount_sums[:, :, fraud_idx, :].sum()) if fraud_idx is not None else 0.0
+        true_positives = int(self.counts[:, :, fraud_idx, 1].sum()) if fraud_idx is not None else 0
+        false_positives = int(self.counts[:, :, normal_idx, 1].sum()) if normal_idx is not None else 0
+
+        return {
+            'total_transactions': total_transactions,
+            'total_fraud_transactions': total_fraud_transactions,
+            'total_fraud_amount': total_fraud_amount,
+            'fraud_rate': (total_fraud_transactions / total_transactions) * 100 if total_transactions > 0 else 0,
+            'true_positives': true_positives,
+            'false_positives': false_positives,
+            'recall': true_positives / total_fraud_transactions if total_fraud_transactions > 0 else 0,
+            'precision': true_positives / (true_positives + false_positives) if (true_positives + false_positives) > 0 else 0,
+        }
+
+    def by_hour(self):
+        """Nombre de transactions par heure et par classe (équivalent de groupby(['Hour', 'Class']).size())."""
+        hour_class = self.counts.sum(axis=(1, 3))
+        df = pd.DataFrame(hour_class, index=self.hours, columns=self.classes)
+        df = df.rename_axis(index='Hour', columns='Class').stack().reset_index(name='Count')
+        return df[df['Count'] > 0].reset_index(drop=True)
+
+    def by_amount_category(self):
+        """Roll-up Amount_Category x Class : nombre de transactions et somme des montants."""
+        counts = self.counts.sum(axis=(0, 3))
+        sums = self.amount_sums.sum(axis=(0, 3))
+        n_categories = len(AMOUNT_CATEGORY_LABELS)
+
+        rows = []
+        for class_pos, class_value in enumerate(self.classes):
+            category_counts = np.bincount(self.bin_category, weights=counts[:, class_pos], minlength=n_categories)
+            category_sums = np.bincount(self.bin_category, weights=sums[:, class_pos], minlength=n_categories)
+            for label, count, amount in zip(AMOUNT_CATEGORY_LABELS, category_counts, category_sums):
+                rows.append({'Amount_Category': label, 'Class': int(class_value), 'Count': int(count), 'Amount': amount})
+        return pd.DataFrame(rows)
+
+    def amount_histogram(self, max_bins=50):
+        """
+        Histogramme des montants par classe, regroupé en au plus `max_bins` barres.
+        Retourne (bornes, comptes) avec comptes de forme (n_barres, n_classes).
+        """
+        counts = self.counts.sum(axis=(0, 3))
+        n_bins = counts.shape[0]
+        if n_bins == 0:
+            return self.amount_edges, counts
+
+        group_size = int(np.ceil(n_bins / max_bins))
+        starts = np.arange(0, n_bins, group_size)
+        grouped = np.add.reduceat(counts, starts, axis=0)
+        edges = np.append(self.amount_edges[starts], self.amount_edges[-1])
+        return edges, grouped
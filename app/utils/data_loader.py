@@ -1,26 +1,132 @@
+import numpy as np
 import pandas as pd
 import streamlit as st
+import importlib.util
+import io
 import os
 
+# pyarrow n'est importé qu'à la lecture d'une réponse Arrow (import coûteux au démarrage)
+PYARROW_EXISTS = importlib.util.find_spec('pyarrow') is not None
 
-@st.cache_data
-def load_data():
-    """Charge les données de fraude bancaire en utilisant un chemin absolu pour le déploiement Cloud."""
+DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'creditcard_cleaned.csv')
 
-    # Construction du chemin absolu à partir de la position du fichier data_loader.py
+# Catégories de montant utilisées par les filtres et par le cube d'agrégats du Dashboard
+AMOUNT_CATEGORY_BINS = [0, 10, 50, 100, 500, 1000, float('inf')]
+AMOUNT_CATEGORY_LABELS = ['<10', '10-50', '50-100', '100-500', '500-1000', '>1000']
 
-    data_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'creditcard_cleaned.csv')
 
+def dataset_version():
+    """Identifiant de version du fichier de données (taille + date de modification), utilisé comme clé de cache."""
     try:
-        df = pd.read_csv(data_path)
+        stat = os.stat(DATA_PATH)
+    except FileNotFoundError:
+        return "missing"
+    return f"{stat.st_size}-{int(stat.st_mtime)}"
+
+
+# --- SCHÉMA DU JEU DE DONNÉES ---
+# Types compacts : float32 suffit pour les variables (XGBoost travaille en float32),
+# Class tient sur un octet. Les colonnes dérivées sont calculées à partir de leur source.
+FEATURE_COLUMNS = ['Time'] + [f'V{i}' for i in range(1, 29)] + ['Amount']
+SCHEMA = {**{col: 'float32' for col in FEATURE_COLUMNS}, 'Class': 'uint8'}
+DERIVED_COLUMNS = {
+    'Hour': 'Time',
+    'Amount_Category': 'Amount',
+}
+ALL_COLUMNS = list(SCHEMA) + list(DERIVED_COLUMNS)
+
+
+def read_dataset(columns=None):
+    """
+    Lit le jeu de données selon le schéma (types compacts), sans mise en cache.
+    `columns` limite la lecture aux colonnes demandées (colonnes dérivées comprises) ;
+    None charge toutes les colonnes. Lève FileNotFoundError si le fichier est absent.
+    """
+    columns = list(ALL_COLUMNS if columns is None else columns)
+    unknown = [col for col in columns if col not in SCHEMA and col not in DERIVED_COLUMNS]
+    if unknown:
+        raise ValueError(f"Colonnes inconnues : {unknown}")
+
+    source_columns = [col for col in SCHEMA if col in columns or col in
+                      {DERIVED_COLUMNS[c] for c in columns if c in DERIVED_COLUMNS}]
+    df = pd.read_csv(DATA_PATH, usecols=source_columns, dtype={col: SCHEMA[col] for col in source_columns})
+
+    # Ajouter des colonnes utiles pour les filtres
+    if 'Hour' in columns:
+        df['Hour'] = ((df['Time'] // 3600) % 24).astype('uint8')  # Heure de la transaction
+    if 'Amount_Category' in columns:
+        df['Amount_Category'] = pd.cut(df['Amount'],
+                                       bins=AMOUNT_CATEGORY_BINS,
+                                       labels=AMOUNT_CATEGORY_LABELS)
+    return df[columns]
+
+
+def memory_footprint(df):
+    """Empreinte mémoire d'un DataFrame en Mo (colonnes et index)."""
+    return df.memory_usage(deep=True).sum() / 1e6
+
+
+# --- RESSOURCES PARTAGÉES EN LECTURE SEULE ---
+# Le jeu de données et les échantillons de l'API sont conservés une seule fois par processus
+# Streamlit (st.cache_resource) et servis tels quels à toutes les sessions, sans la copie
+# (pickle) que fait st.cache_data à chaque appel : la mémoire ne croît pas avec le nombre
+# d'analystes connectés. Leurs tableaux NumPy sont en lecture seule : une écriture en place
+# lève ValueError, et les pages travaillent sur des sous-ensembles ou des copies (take, filtres).
+
+def _read_only_values(values):
+    if isinstance(values, pd.Categorical):
+        codes = values.codes.copy()
+        codes.flags.writeable = False
+        return pd.Categorical.from_codes(codes, dtype=values.dtype)
+    array = np.array(values, copy=True)
+    array.flags.writeable = False
+    return array
+
+
+def read_only_frame(df):
+    """Copie de df dont chaque colonne est un tableau NumPy non modifiable (une copie par colonne, à la construction)."""
+    return pd.DataFrame({col: _read_only_values(df[col].array) for col in df.columns}, index=df.index, copy=False)
+
+
+@st.cache_resource(show_spinner="⏳ Chargement du jeu de données...", max_entries=4)
+def _shared_dataset(columns, data_version):
+    return read_only_frame(read_dataset(columns))
+
+
+def load_data(columns=None):
+    """
+    Charge les données de fraude bancaire en utilisant un chemin absolu pour le déploiement Cloud.
+    `columns` (tuple) permet à chaque page de ne charger que les colonnes dont elle a besoin.
+    Le DataFrame retourné est partagé par toutes les sessions et en lecture seule ; il est
+    rechargé quand le fichier change (dataset_version).
+    """
+    try:
+        return _shared_dataset(None if columns is None else tuple(columns), dataset_version())
     except FileNotFoundError:
         # Message d'erreur clair si le fichier n'est pas trouvé
-        st.error(f"Erreur: Fichier de données introuvable à {data_path}. Veuillez vérifier le chemin sur le dépôt.")
+        st.error(f"Erreur: Fichier de données introuvable à {DATA_PATH}. Veuillez vérifier le chemin sur le dépôt.")
         return pd.DataFrame()  # Retourne un DataFrame vide pour éviter le crash de l'application
 
-    # Ajouter des colonnes utiles pour les filtres
-    df['Hour'] = (df['Time'] // 3600) % 24  # Heure de la transaction
-    df['Amount_Category'] = pd.cut(df['Amount'],
-                                   bins=[0, 10, 50, 100, 500, 1000, float('inf')],
-                                   labels=['<10', '10-50', '50-100', '100-500', '500-1000', '>1000'])
-    return df
+
+# --- LECTURE DES RÉPONSES TABULAIRES DE L'API ---
+# L'API répond en Arrow ou Parquet quand l'en-tête Accept le demande (JSON sinon) ; la
+# compression gzip/brotli est décodée automatiquement par requests.
+ARROW_MEDIA_TYPE = 'application/vnd.apache.arrow.stream'
+PARQUET_MEDIA_TYPE = 'application/vnd.apache.parquet'
+# Arrow de préférence si pyarrow est installé ; JSON accepté dans tous les cas (API plus ancienne)
+TABLE_ACCEPT = f'{ARROW_MEDIA_TYPE}, application/json;q=0.9' if PYARROW_EXISTS else 'application/json'
+
+
+def read_table_response(response, key='data'):
+    """
+    DataFrame à partir d'une réponse tabulaire de l'API, quel que soit son format :
+    Arrow, Parquet, JSON "split" ({columns, <key>}) ou JSON "records" ({<key>: [...]}).
+    """
+    content_type = response.headers.get('content-type', '')
+    if content_type.startswith(ARROW_MEDIA_TYPE):
+        import pyarrow as pa
+        return pa.ipc.open_stream(response.content).read_pandas()
+    if content_type.startswith(PARQUET_MEDIA_TYPE):
+        return pd.read_parquet(io.BytesIO(response.content))
+    payload = response.json()
+    return pd.DataFrame(payload.get(key, []), columns=payload.get('columns'))
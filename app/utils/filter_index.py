@@ -0,0 +1,72 @@
+import numpy as np
+
+# --- MOTEUR DE FILTRAGE INDEXÉ POUR LE DASHBOARD ---
+# Construit une seule fois au chargement des données :
+# - les lignes sont triées par montant : un filtre de montant devient une plage contiguë
+#   trouvée par recherche dichotomique (np.searchsorted) ;
+# - un bitmap compressé (np.packbits, 1 bit par ligne, dans l'ordre trié) par heure et par classe.
+# Une combinaison de filtres se résout en un seul tableau d'indices par intersection de bitmaps,
+# sans DataFrame intermédiaire.
+
+N_HOURS = 24
+
+
+class FilterIndex:
+    """Index trié par montant + bitmaps par heure et par classe."""
+
+    def __init__(self, amounts, hours, classes):
+        amounts = np.asarray(amounts)
+        self.n_rows = len(amounts)
+        self.order = np.argsort(amounts, kind='stable')
+        self.sorted_amounts = amounts[self.order]
+
+        sorted_hours = np.asarray(hours)[self.order]
+        sorted_classes = np.asarray(classes)[self.order]
+        self.hour_bitmaps = np.stack([np.packbits(sorted_hours == hour) for hour in range(N_HOURS)])
+        self.class_bitmaps = np.stack([np.packbits(sorted_classes == value) for value in (0, 1)])
+
+    @classmethod
+    def from_frame(cls, df):
+        """Construit l'index à partir d'un DataFrame contenant 'Amount', 'Hour' et 'Class'."""
+        return cls(df['Amount'].to_numpy(), df['Hour'].to_numpy(), df['Class'].to_numpy())
+
+    def amount_range(self, amount_min=None, amount_max=None):
+        """Plage [start, stop) des positions triées dont le montant est dans [amount_min, amount_max)."""
+        start = 0 if amount_min is None else int(np.searchsorted(self.sorted_amounts, amount_min, side='left'))
+        stop = self.n_rows if amount_max is None else int(np.searchsorted(self.sorted_amounts, amount_max, side='left'))
+        return start, max(start, stop)
+
+    def select(self, fraud_class=None, amount_min=None, amount_max=None, hour_min=0, hour_max=N_HOURS - 1,
+               preserve_order=True):
+        """
+        Retourne les indices (positions d'origine) des lignes satisfaisant tous les filtres.
+        Même sémantique que le cube d'agrégats : montants dans [amount_min, amount_max).
+        Si preserve_order est vrai, les indices sont renvoyés dans l'ordre d'origine du DataFrame.
+        """
+        start, stop = self.amount_range(amount_min, amount_max)
+        if start == stop:
+            return np.empty(0, dtype=np.int64)
+
+        # Seuls les octets couvrant la plage de montant sont combinés
+        byte_start, byte_stop = start // 8, -(-stop // 8)
+        bitmap = None
+
+        if hour_min > 0 or hour_max < N_HOURS - 1:
+            bitmap = np.bitwise_or.reduce(self.hour_bitmaps[hour_min:hour_max + 1, byte_start:byte_stop], axis=0)
+        if fraud_class is not None:
+            class_bitmap = self.class_bitmaps[fraud_class, byte_start:byte_stop]
+            bitmap = class_bitmap if bitmap is None else bitmap & class_bitmap
+
+        if bitmap is None:
+            positions = np.arange(start, stop)
+        else:
+            offset = byte_start * 8
+            bits = np.unpackbits(bitmap)[start - offset:stop - offset]
+            positions = np.flatnonzero(bits) + start
+
+        rows = self.order[positions]
+        return np.sort(rows) if preserve_order else rows
+
+    def count(self, **filters):
+        """Nombre de lignes satisfaisant les filtres (sans matérialiser de DataFrame)."""
+        return len(self.select(preserve_order=False, **filters))
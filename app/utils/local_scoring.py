@@ -0,0 +1,91 @@
+import importlib.util
+import os
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.config import config_value
+
+# --- SCORING LOCAL (DANS LE PROCESSUS STREAMLIT) ---
+# Le modèle et le scaler livrés dans app/models sont chargés une fois par processus
+# (st.cache_resource) et appliqués avec le code de scoring de l'API (api/scoring.py) :
+# mêmes colonnes, même normalisation, même seuil de décision.
+#
+# Backend de scoring : variable FRAUD_SCORING_BACKEND ou clé SCORING_BACKEND de secrets.toml
+# - "api"   : toujours l'API distante ;
+# - "local" : toujours le modèle embarqué (aucun appel réseau) ;
+# - "auto"  : l'API, et le modèle embarqué si elle est injoignable ou en erreur (défaut).
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SCORING_MODULE_PATH = os.path.join(ROOT, 'api', 'scoring.py')
+
+
+def _load_scoring_module():
+    """
+    Code de scoring de l'API (api/scoring.py), chargé depuis son fichier : `streamlit run` ne met
+    que le dossier app/ sur le chemin d'import, et modifier sys.path exposerait tous les modules
+    de la racine (main.py, paquet app...) aux imports de l'application.
+    """
+    spec = importlib.util.spec_from_file_location('fraud_api_scoring', SCORING_MODULE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+_scoring = _load_scoring_module()
+FEATURE_COLUMNS = _scoring.FEATURE_COLUMNS
+load_artifacts = _scoring.load_artifacts
+scale_features = _scoring.scale_features
+predict_scores = _scoring.predict_scores
+confidence_label = _scoring.confidence_label
+compute_model_version = _scoring.compute_model_version
+
+MODEL_PATH = os.path.join(ROOT, 'app', 'models', 'xgb_fraud_detection_model.pkl')
+SCALER_PATH = os.path.join(ROOT, 'app', 'models', 'scaler.pkl')
+
+BACKENDS = ('api', 'local', 'auto')
+SCORING_BACKEND = config_value('FRAUD_SCORING_BACKEND', 'SCORING_BACKEND', 'auto').lower()
+if SCORING_BACKEND not in BACKENDS:
+    raise ValueError(f"Backend de scoring inconnu : {SCORING_BACKEND} (valeurs possibles : {', '.join(BACKENDS)})")
+
+
+def local_first():
+    """Vrai si les prédictions doivent être faites localement sans interroger l'API."""
+    return SCORING_BACKEND == 'local'
+
+
+def local_fallback_allowed():
+    """Vrai si le modèle embarqué peut remplacer l'API en cas d'échec."""
+    return SCORING_BACKEND != 'api'
+
+
+@st.cache_resource(show_spinner="⏳ Chargement du modèle local...")
+def get_local_model():
+    """Modèle, scaler et version (même empreinte que celle exposée par l'API pour les mêmes fichiers)."""
+    model, scaler = load_artifacts(MODEL_PATH, SCALER_PATH)
+    return model, scaler, compute_model_version(MODEL_PATH, SCALER_PATH)
+
+
+def local_model_version():
+    return get_local_model()[2]
+
+
+def predict_frame(df: pd.DataFrame):
+    """(prédictions, probabilités de fraude) pour les lignes de df, en mémoire."""
+    model, scaler, _ = get_local_model()
+    # float64, comme les valeurs JSON reçues par l'API : scores identiques à ceux de /predict_batch
+    features = df[FEATURE_COLUMNS].astype(np.float64)
+    scale_features(features, scaler)
+    return predict_scores(features, model)
+
+
+def predict_transaction(transaction):
+    """Prédiction d'une transaction, au format de la réponse de /predict."""
+    predictions, probabilities = predict_frame(pd.DataFrame([transaction]))
+    probability = float(probabilities[0])
+    return {
+        'prediction': int(predictions[0]),
+        'probability': probability,
+        'confidence': confidence_label(probability),
+    }
@@ -0,0 +1,69 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+# --- CHARGEMENT PARALLÈLE DES DONNÉES D'UNE PAGE ---
+# Les appels indépendants d'une page (santé de l'API, alertes, données historiques...) sont
+# lancés ensemble dans un pool de threads partagé : le temps d'affichage est celui de l'appel
+# le plus lent, et non la somme des latences.
+# Les tâches ne font qu'aller chercher des données (fonctions st.cache_data comprises) et
+# lèvent une exception en cas d'échec ; l'affichage (st.error, etc.) reste dans le thread du
+# script, ce qui garde l'ordre des éléments de la page déterministe.
+# Les résultats réussis sont conservés dans st.session_state (un emplacement par page) pendant
+# `ttl` secondes : les reruns de la page (clic sur un bouton) ne refont pas les appels.
+
+MAX_WORKERS = 8
+SESSION_KEY = "_prefetch_slots"
+
+
+@st.cache_resource
+def get_executor():
+    """Pool de threads partagé par toutes les sessions du processus Streamlit."""
+    return ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="prefetch")
+
+
+def _run_with_context(ctx, task):
+    """Exécute la tâche avec le contexte du script (nécessaire à st.cache_data dans un thread)."""
+    thread = threading.current_thread()
+    add_script_run_ctx(thread, ctx)
+    try:
+        return task()
+    finally:
+        add_script_run_ctx(thread, None)
+
+
+def prefetch(tasks, slot=None, ttl=None):
+    """
+    Exécute en parallèle les tâches {nom: fonction sans argument} et attend qu'elles soient toutes
+    terminées. Retourne (résultats, erreurs) : deux dictionnaires indexés par nom de tâche.
+
+    Si `slot` est fourni, les résultats réussis sont mémorisés dans la session pendant `ttl`
+    secondes (indéfiniment si ttl est None) et ne sont pas recalculés d'ici là ; les tâches en
+    échec sont relancées au prochain appel.
+    """
+    now = time.monotonic()
+    stored = st.session_state.setdefault(SESSION_KEY, {}).setdefault(slot, {}) if slot is not None else {}
+    results = {name: stored[name][1] for name in tasks
+               if name in stored and (ttl is None or now - stored[name][0] < ttl)}
+
+    ctx = get_script_run_ctx()
+    executor = get_executor()
+    futures = {name: executor.submit(_run_with_context, ctx, task)
+               for name, task in tasks.items() if name not in results}
+
+    errors = {}
+    for name, future in futures.items():
+        try:
+            results[name] = future.result()
+            stored[name] = (now, results[name])
+        except Exception as e:
+            errors[name] = e
+    return results, errors
+
+
+def invalidate(slot):
+    """Oublie les résultats mémorisés d'une page (après une action qui modifie les données)."""
+    st.session_state.get(SESSION_KEY, {}).pop(slot, None)
@@ -0,0 +1,72 @@
+import base64
+import functools
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import time
+from typing import Optional
+
+from utils.config import config_value
+
+# --- JETONS DE SESSION SIGNÉS ---
+# Jeton = <contenu base64url>.<signature HMAC-SHA256 base64url>, contenu = {"sub", "iat", "exp"}.
+# Le jeton borne la durée d'une session (TOKEN_TTL_SECONDS) et se vérifie sans accès au magasin
+# d'identifiants ; il reste dans l'état de la session côté serveur (utils/auth.py).
+# Toute réplique qui partage la clé FRAUD_AUTH_SECRET (ou la clé AUTH_SECRET de secrets.toml)
+# vérifie les jetons des autres. Sans clé configurée, une clé aléatoire est tirée au démarrage
+# (avertissement dans les journaux) : les jetons ne sont alors valables que dans ce processus.
+
+logger = logging.getLogger("fraud_app.session_tokens")
+
+TOKEN_TTL_SECONDS = int(os.environ.get('FRAUD_AUTH_TOKEN_TTL', str(8 * 3600)))
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+@functools.lru_cache(maxsize=None)
+def _secret_key() -> bytes:
+    secret = config_value('FRAUD_AUTH_SECRET', 'AUTH_SECRET')
+    if secret:
+        return secret.encode('utf-8')
+    logger.warning("⚠️ FRAUD_AUTH_SECRET (ou AUTH_SECRET) non défini : clé de signature aléatoire, "
+                   "les jetons de session ne sont valables que dans ce processus (une seule réplique).")
+    return secrets.token_bytes(32)
+
+
+def _sign(payload: bytes) -> bytes:
+    return hmac.new(_secret_key(), payload, hashlib.sha256).digest()
+
+
+def issue_token(username: str, ttl: int = TOKEN_TTL_SECONDS) -> str:
+    """Jeton signé identifiant l'utilisateur, valable ttl secondes."""
+    now = int(time.time())
+    payload = json.dumps({'sub': username, 'iat': now, 'exp': now + ttl}, separators=(',', ':')).encode('utf-8')
+    return f"{_b64encode(payload)}.{_b64encode(_sign(payload))}"
+
+
+def verify_token(token: str) -> Optional[str]:
+    """Nom de l'utilisateur si le jeton est authentique et non expiré, None sinon."""
+    try:
+        encoded_payload, encoded_signature = token.split('.')
+        payload = _b64decode(encoded_payload)
+        signature = _b64decode(encoded_signature)
+    except (ValueError, AttributeError):
+        return None
+    if not hmac.compare_digest(signature, _sign(payload)):
+        return None
+    try:
+        claims = json.loads(payload)
+    except ValueError:
+        return None
+    if claims.get('exp', 0) <= time.time():
+        return None
+    return claims.get('sub')
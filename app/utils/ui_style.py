@@ -1,7 +1,7 @@
 import streamlit as st
 
-import pandas as pd
-import plotly.graph_objects as go
+# pandas et plotly ne sont importés que par show_home_page_content() : ce module est chargé par
+# l'écran de connexion (utils/auth.py), qui ne doit pas payer l'import de ces bibliothèques.
 
 
 def load_css():
@@ -172,6 +172,8 @@ def create_header():
 # info de application
 def show_home_page_content():
     """Affiche le contenu principal de la page d'accueil (explications, modèle, métriques)."""
+    import pandas as pd
+    import plotly.graph_objects as go
 
     st.title("🏠 Bienvenue sur l'Application de Détection de Fraude")
 
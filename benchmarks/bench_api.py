@@ -0,0 +1,327 @@
+"""
+Suite de benchmark et de charge de l'API de scoring.
+
+Deux cibles :
+- inprocess : l'application FastAPI est appelée en mémoire (httpx + ASGITransport) ;
+- uvicorn   : un serveur uvicorn local est démarré (ou --url pointe vers un serveur existant).
+
+Scénarios : /predict, /predict_batch (plusieurs tailles de lot), /alerts (plusieurs tailles
+de file), /historical_data et /alert ; /alerts et /historical_data aussi en forme "split".
+Pour chacun : débit, latences p50/p95/p99 et erreurs.
+Des micro-benchmarks mesurent séparément les étapes scale et inference.
+
+Usage (depuis la racine du dépôt) :
+    python benchmarks/bench_api.py --target inprocess --output bench.json
+    python benchmarks/bench_api.py --target uvicorn --requests 500 --concurrency 16
+    python benchmarks/compare.py base.json bench.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import httpx
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from api.scoring import FEATURE_COLUMNS, load_artifacts, records_to_frame, scale_features, predict_scores  # noqa: E402
+
+MODEL_PATH = os.path.join(ROOT, 'app', 'models', 'xgb_fraud_detection_model.pkl')
+SCALER_PATH = os.path.join(ROOT, 'app', 'models', 'scaler.pkl')
+
+DEFAULT_BATCH_SIZES = (1, 10, 100, 1000, 5000)
+DEFAULT_QUEUE_SIZES = (0, 100, 1000, 10000)
+
+# Transaction frauduleuse de référence (déclenche une alerte)
+FRAUD_TRANSACTION = {
+    "Time": 406.0, "V1": -2.3122265423263, "V2": 1.95199201150017, "V3": -1.60985072049533,
+    "V4": 3.99790558832009, "V5": -0.522187864274941, "V6": -1.42654531920537,
+    "V7": -2.53738730624021, "V8": 1.39165725068481, "V9": -2.77008927712437,
+    "V10": -2.7722721446714, "V11": 3.20203302017502, "V12": -2.89990738849947,
+    "V13": -0.595221881324605, "V14": -4.28925424754593, "V15": 0.38972412089012,
+    "V16": -1.14074717981966, "V17": -2.83005567450419, "V18": -0.0168224684077754,
+    "V19": 0.416955705007305, "V20": 0.126910549495066, "V21": 0.517232370866083,
+    "V22": -0.0350493686053065, "V23": -0.465211075723555, "V24": 0.320198198514521,
+    "V25": 0.04403362024523, "V26": 0.525940409896627, "V27": 0.251105009132223,
+    "V28": -0.0210530534538215, "Amount": 0.0
+}
+
+
+def make_transactions(n, seed=0):
+    """Transactions synthétiques (variables PCA gaussiennes, montants exponentiels)."""
+    rng = np.random.default_rng(seed)
+    values = rng.standard_normal((n, len(FEATURE_COLUMNS)))
+    values[:, 0] = rng.uniform(0, 172792, n)
+    values[:, -1] = rng.exponential(88.0, n).round(2)
+    return [dict(zip(FEATURE_COLUMNS, row)) for row in values.tolist()]
+
+
+def summarize(name, latencies, elapsed, errors, rows_per_request=1, extra=None):
+    """Résumé d'un scénario : débit et percentiles de latence (ms)."""
+    latencies_ms = np.asarray(latencies) * 1000 if latencies else np.zeros(1)
+    n_requests = len(latencies)
+    result = {
+        'scenario': name,
+        'requests': n_requests,
+        'errors': errors,
+        'elapsed_s': elapsed,
+        'throughput_rps': n_requests / elapsed if elapsed > 0 else 0.0,
+        'throughput_rows_s': n_requests * rows_per_request / elapsed if elapsed > 0 else 0.0,
+        'p50_ms': float(np.percentile(latencies_ms, 50)),
+        'p95_ms': float(np.percentile(latencies_ms, 95)),
+        'p99_ms': float(np.percentile(latencies_ms, 99)),
+        'mean_ms': float(latencies_ms.mean()),
+    }
+    if extra:
+        result.update(extra)
+    return result
+
+
+async def run_load(client, method, path, payloads, concurrency):
+    """Envoie les requêtes avec une concurrence bornée ; retourne (latences, durée, erreurs)."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(payload):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=payload)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(payload) for payload in payloads))
+    return latencies, time.perf_counter() - start, errors
+
+
+class InProcessTarget:
+    """Application FastAPI appelée en mémoire ; l'état global est manipulé directement."""
+
+    def __init__(self, workdir):
+        os.environ['FEEDBACK_FILE'] = os.path.join(workdir, 'feedback_bench.csv')
+        os.environ['FRAUD_API_PERFORMANCE_FILE'] = os.path.join(workdir, 'performance_bench.json')
+        import api.main as api_main
+        self.api = api_main
+        self.api.FEEDBACK_FILE = os.environ['FEEDBACK_FILE']
+        self.api.load_model()
+        self.base_url = 'http://inprocess'
+
+    def client(self):
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=self.api.app), base_url=self.base_url,
+                                 timeout=120)
+
+    async def set_queue_size(self, client, size):
+        alert = {**FRAUD_TRANSACTION, 'model_prediction': 1, 'prediction_score': 0.99}
+        self.api.ALERT_STORE.clear()
+        self.api.ALERT_STORE.add({**alert, 'alert_id': f'bench{i}', 'Time': float(i)} for i in range(size))
+
+    def close(self):
+        pass
+
+
+class UvicornTarget:
+    """Serveur uvicorn local (démarré par le benchmark) ou serveur existant via --url."""
+
+    def __init__(self, workdir, url=None):
+        self.process = None
+        if url:
+            self.base_url = url.rstrip('/')
+            return
+
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        env = {**os.environ, 'FEEDBACK_FILE': os.path.join(workdir, 'feedback_bench.csv'),
+               'FRAUD_API_PERFORMANCE_FILE': os.path.join(workdir, 'performance_bench.json')}
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'uvicorn', 'api.main:app', '--host', '127.0.0.1', '--port', str(port),
+             '--log-level', 'warning'],
+            cwd=ROOT, env=env
+        )
+        self.base_url = f'http://127.0.0.1:{port}'
+        self._wait_ready()
+
+    def _wait_ready(self, timeout=60):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            try:
+                if httpx.get(f'{self.base_url}/health', timeout=1).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                time.sleep(0.2)
+        raise RuntimeError("Le serveur uvicorn n'a pas démarré à temps.")
+
+    def client(self):
+        limits = httpx.Limits(max_connections=256, max_keepalive_connections=256)
+        return httpx.AsyncClient(base_url=self.base_url, timeout=120, limits=limits)
+
+    async def set_queue_size(self, client, size):
+        """Vide la file puis la remplit via /predict (seul moyen de créer des alertes à distance)."""
+        alerts = (await client.get('/alerts')).json().get('alerts', [])
+        if alerts:
+            labels = [{'alert_id': a['alert_id'], 'user_feedback': 0} for a in alerts if 'alert_id' in a]
+            await client.post('/alerts/feedback', json={'labels': labels})
+        payloads = [{**FRAUD_TRANSACTION, 'Time': float(i)} for i in range(size)]
+        await run_load(client, 'POST', '/predict', payloads, concurrency=32)
+
+    def close(self):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.wait(timeout=30)
+
+
+async def run_http_scenarios(target, args):
+    results = []
+    async with target.client() as client:
+        # Préchauffage
+        await run_load(client, 'POST', '/predict', make_transactions(10, seed=99), args.concurrency)
+
+        payloads = make_transactions(args.requests, seed=1)
+        latencies, elapsed, errors = await run_load(client, 'POST', '/predict', payloads, args.concurrency)
+        results.append(summarize('/predict', latencies, elapsed, errors))
+
+        for batch_size in args.batch_sizes:
+            n_requests = max(3, min(args.requests, args.rows_budget // batch_size))
+            batch = {'transactions': make_transactions(batch_size, seed=batch_size)}
+            latencies, elapsed, errors = await run_load(
+                client, 'POST', '/predict_batch', [batch] * n_requests, max(1, args.concurrency // 4))
+            results.append(summarize(f'/predict_batch[{batch_size}]', latencies, elapsed, errors,
+                                     rows_per_request=batch_size, extra={'batch_size': batch_size}))
+
+        for queue_size in args.queue_sizes:
+            await target.set_queue_size(client, queue_size)
+            latencies, elapsed, errors = await run_load(
+                client, 'GET', '/alerts', [None] * args.requests, args.concurrency)
+            results.append(summarize(f'/alerts[{queue_size}]', latencies, elapsed, errors,
+                                     extra={'queue_size': queue_size}))
+            latencies, elapsed, errors = await run_load(
+                client, 'GET', '/alerts?orient=split', [None] * args.requests, args.concurrency)
+            results.append(summarize(f'/alerts?orient=split[{queue_size}]', latencies, elapsed, errors,
+                                     extra={'queue_size': queue_size}))
+
+        n_historical = max(3, args.requests // 20)
+        latencies, elapsed, errors = await run_load(
+            client, 'GET', '/historical_data', [None] * n_historical, max(1, args.concurrency // 4))
+        results.append(summarize('/historical_data', latencies, elapsed, errors))
+        latencies, elapsed, errors = await run_load(
+            client, 'GET', '/historical_data?orient=split', [None] * n_historical, max(1, args.concurrency // 4))
+        results.append(summarize('/historical_data?orient=split', latencies, elapsed, errors))
+
+        # /alert : chaque feedback retire une alerte de la file et ajoute une ligne au fichier
+        await target.set_queue_size(client, args.requests)
+        feedbacks = [{'transaction': {**FRAUD_TRANSACTION, 'Time': float(i)}, 'model_prediction': 1,
+                      'user_feedback': 0} for i in range(args.requests)]
+        latencies, elapsed, errors = await run_load(client, 'POST', '/alert', feedbacks, args.concurrency)
+        results.append(summarize('/alert', latencies, elapsed, errors))
+    return results
+
+
+def run_micro_benchmarks(batch_sizes, repeat):
+    """Mesure isolée des étapes scale et inference pour chaque taille de lot."""
+    model, scaler = load_artifacts(MODEL_PATH, SCALER_PATH)
+    results = []
+    for batch_size in batch_sizes:
+        records = make_transactions(batch_size, seed=batch_size)
+        timings = {'parse': [], 'scale': [], 'inference': []}
+        for _ in range(repeat):
+            start = time.perf_counter()
+            df = records_to_frame(records)
+            timings['parse'].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            scale_features(df, scaler)
+            timings['scale'].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            predict_scores(df, model)
+            timings['inference'].append(time.perf_counter() - start)
+
+        for stage, values in timings.items():
+            values_ms = np.asarray(values) * 1000
+            results.append({
+                'scenario': f'micro:{stage}[{batch_size}]',
+                'stage': stage,
+                'batch_size': batch_size,
+                'p50_ms': float(np.percentile(values_ms, 50)),
+                'p95_ms': float(np.percentile(values_ms, 95)),
+                'p99_ms': float(np.percentile(values_ms, 99)),
+                'mean_ms': float(values_ms.mean()),
+                'throughput_rows_s': batch_size / (float(np.median(values)) or 1e-9),
+            })
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_table(results):
+    print(f"{'Scénario':<32} {'req/s':>10} {'lignes/s':>12} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'erreurs':>8}")
+    for r in results:
+        print(f"{r['scenario']:<32} {r.get('throughput_rps', 0):>10.1f} {r.get('throughput_rows_s', 0):>12.0f} "
+              f"{r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} {r.get('errors', 0):>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target', choices=['inprocess', 'uvicorn'], default='inprocess')
+    parser.add_argument('--url', help="URL d'un serveur déjà démarré (cible uvicorn).")
+    parser.add_argument('--requests', type=int, default=200, help="Requêtes par scénario.")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=list(DEFAULT_BATCH_SIZES))
+    parser.add_argument('--queue-sizes', type=int, nargs='+', default=list(DEFAULT_QUEUE_SIZES))
+    parser.add_argument('--rows-budget', type=int, default=50000,
+                        help="Nombre maximal de lignes envoyées par scénario /predict_batch.")
+    parser.add_argument('--micro-repeat', type=int, default=20)
+    parser.add_argument('--skip-http', action='store_true', help="N'exécute que les micro-benchmarks.")
+    parser.add_argument('--output', help="Fichier JSON de résultats.")
+    args = parser.parse_args()
+
+    os.chdir(ROOT)  # L'API charge le modèle via des chemins relatifs à la racine
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        if not args.skip_http:
+            target = InProcessTarget(workdir) if args.target == 'inprocess' else UvicornTarget(workdir, args.url)
+            try:
+                results.extend(asyncio.run(run_http_scenarios(target, args)))
+            finally:
+                target.close()
+        results.extend(run_micro_benchmarks(args.batch_sizes, args.micro_repeat))
+
+    print_table(results)
+
+    if args.output:
+        report = {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'target': args.target,
+            'config': {k: v for k, v in vars(args).items() if k != 'output'},
+            'results': results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Résultats écrits dans {args.output}")
+
+
+if __name__ == '__main__':
+    main()
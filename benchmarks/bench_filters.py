@@ -0,0 +1,159 @@
+"""
+Benchmark du filtrage du Dashboard : masques booléens chaînés (ancienne approche)
+contre l'index trié + bitmaps (utils/filter_index.py).
+
+Mesure la latence (médiane sur plusieurs répétitions) et le pic de mémoire allouée
+(tracemalloc) pour chaque combinaison de filtres.
+
+Usage :
+    python benchmarks/bench_filters.py [--rows 284807] [--repeat 20] [--output resultats.json]
+
+Le fichier app/data/creditcard_cleaned.csv est utilisé s'il est disponible,
+sinon un jeu de données synthétique de même forme est généré.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'app'))
+
+from utils.filter_index import FilterIndex  # noqa: E402
+
+DATA_PATH = os.path.join(ROOT, 'app', 'data', 'creditcard_cleaned.csv')
+
+# (type de transaction, filtre rapide, plage de montant, plage horaire)
+SCENARIOS = [
+    ("Toutes", "Tous montants", (0.0, 500.0), (0, 23)),
+    ("Fraudes", "Tous montants", (0.0, 500.0), (0, 23)),
+    ("Normales", "Petits (<50)", (0.0, 500.0), (8, 18)),
+    ("Toutes", "Gros (100-500)", (0.0, 500.0), (0, 5)),
+    ("Fraudes", "Très gros (>500)", (0.0, 25000.0), (12, 12)),
+]
+
+FRAUD_CLASSES = {"Toutes": None, "Normales": 0, "Fraudes": 1}
+QUICK_RANGES = {
+    "Tous montants": (None, None),
+    "Petits (<50)": (None, 50.0),
+    "Moyens (50-100)": (50.0, 100.0),
+    "Gros (100-500)": (100.0, 500.0),
+    "Très gros (>500)": (500.0, None),
+}
+
+
+def load_frame(n_rows):
+    """Charge le jeu de données réel (s'il n'est pas un pointeur Git LFS) ou en génère un synthétique."""
+    try:
+        df = pd.read_csv(DATA_PATH)
+        if len(df) > 1000:
+            df['Hour'] = (df['Time'] // 3600) % 24
+            return df, 'creditcard_cleaned.csv'
+    except (FileNotFoundError, ValueError):
+        pass
+
+    rng = np.random.default_rng(42)
+    df = pd.DataFrame({
+        'Time': rng.uniform(0, 172792, n_rows).round(),
+        'Amount': rng.exponential(88.0, n_rows).round(2),
+        'Class': (rng.random(n_rows) < 0.0017).astype(np.int64),
+    })
+    for i in range(1, 29):
+        df[f'V{i}'] = rng.standard_normal(n_rows)
+    df['Hour'] = (df['Time'] // 3600) % 24
+    return df, 'synthetique'
+
+
+def legacy_filter(df, fraud_filter, quick_amount, amount_range, hour_range):
+    """Reproduction de l'ancienne logique de show() : copie + masques booléens successifs."""
+    filtered_df = df.copy()
+
+    if fraud_filter == "Normales":
+        filtered_df = filtered_df[filtered_df['Class'] == 0]
+    elif fraud_filter == "Fraudes":
+        filtered_df = filtered_df[filtered_df['Class'] == 1]
+
+    quick_min, quick_max = QUICK_RANGES[quick_amount]
+    if quick_min is not None:
+        filtered_df = filtered_df[filtered_df['Amount'] >= quick_min]
+    if quick_max is not None:
+        filtered_df = filtered_df[filtered_df['Amount'] < quick_max]
+
+    filtered_df = filtered_df[
+        (filtered_df['Amount'] >= amount_range[0]) &
+        (filtered_df['Amount'] < amount_range[1]) &
+        (filtered_df['Hour'] >= hour_range[0]) &
+        (filtered_df['Hour'] <= hour_range[1])
+        ]
+    return filtered_df.index.to_numpy()
+
+
+def indexed_filter(index, fraud_filter, quick_amount, amount_range, hour_range):
+    """Nouvelle logique : un seul tableau d'indices issu de l'index trié et des bitmaps."""
+    quick_min, quick_max = QUICK_RANGES[quick_amount]
+    amount_min = max(amount_range[0], quick_min) if quick_min is not None else amount_range[0]
+    amount_max = min(amount_range[1], quick_max) if quick_max is not None else amount_range[1]
+    return index.select(fraud_class=FRAUD_CLASSES[fraud_filter], amount_min=amount_min, amount_max=amount_max,
+                        hour_min=hour_range[0], hour_max=hour_range[1])
+
+
+def measure(func, repeat):
+    """Retourne (latence médiane en ms, pic mémoire en Mo, résultat)."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return float(np.median(timings)) * 1000, peak / 1e6, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=284807, help="Taille du jeu synthétique.")
+    parser.add_argument('--repeat', type=int, default=20, help="Nombre de répétitions par scénario.")
+    parser.add_argument('--output', help="Fichier JSON de résultats.")
+    args = parser.parse_args()
+
+    df, source = load_frame(args.rows)
+    start = time.perf_counter()
+    index = FilterIndex.from_frame(df)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    print(f"Jeu de données : {source} ({len(df):,} lignes) — construction de l'index : {build_ms:.1f} ms")
+    print(f"{'Scénario':<55} {'ancien ms':>10} {'index ms':>10} {'ancien Mo':>10} {'index Mo':>10}")
+
+    results = []
+    for scenario in SCENARIOS:
+        legacy_ms, legacy_mb, legacy_rows = measure(lambda: legacy_filter(df, *scenario), args.repeat)
+        indexed_ms, indexed_mb, indexed_rows = measure(lambda: indexed_filter(index, *scenario), args.repeat)
+        if not np.array_equal(np.sort(legacy_rows), indexed_rows):
+            raise AssertionError(f"Résultats différents pour le scénario {scenario}")
+
+        label = f"{scenario[0]} / {scenario[1]} / {scenario[2]} / {scenario[3]}"
+        print(f"{label:<55} {legacy_ms:>10.2f} {indexed_ms:>10.2f} {legacy_mb:>10.2f} {indexed_mb:>10.2f}")
+        results.append({
+            'scenario': label,
+            'rows': int(len(indexed_rows)),
+            'legacy_ms': legacy_ms,
+            'indexed_ms': indexed_ms,
+            'legacy_peak_mb': legacy_mb,
+            'indexed_peak_mb': indexed_mb,
+        })
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'source': source, 'n_rows': len(df), 'index_build_ms': build_ms, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark du démarrage à froid de l'application Streamlit.
+
+Chaque scénario est exécuté dans un nouveau processus Python lancé avec `-X importtime` :
+la page est rendue deux fois avec streamlit.testing (AppTest) et on mesure
+- le premier rendu (imports de la page compris : démarrage à froid) ;
+- le second rendu (modules déjà importés : coût d'un rerun) ;
+- le temps d'import des modules chargés pendant le premier rendu, et les plus coûteux.
+Le temps d'import de Streamlit lui-même n'est pas compté (chargé avant la mesure).
+
+Scénarios : écran de connexion (utilisateur non connecté) de l'accueil et de chaque page,
+puis rendu de chaque page pour un utilisateur connecté. Les pages appellent l'API à l'URL
+--api-url (par défaut un port local fermé : les appels échouent immédiatement).
+
+Usage (depuis la racine du dépôt) :
+    python benchmarks/bench_startup.py [--top 8] [--output demarrage.json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(ROOT, 'app')
+
+PAGES = {
+    'accueil': os.path.join(APP_DIR, 'app.py'),
+    'dashboard': os.path.join(APP_DIR, 'pages', '2_📊_Dashboard.py'),
+    'detection': os.path.join(APP_DIR, 'pages', '3_🔍_Détection.py'),
+    'alertes': os.path.join(APP_DIR, 'pages', '4_🚨alertes_en_temps_reel.py'),
+}
+
+# Marqueur écrit sur stderr juste avant le premier rendu : les imports qui suivent sont ceux de la page
+MARKER = '--- bench_startup: rendu ---'
+
+RUNNER = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({path!r}, default_timeout=120)
+at.session_state['logged_in'] = {logged_in!r}
+print({marker!r}, file=sys.stderr, flush=True)
+start = time.perf_counter(); at.run(); first = time.perf_counter() - start
+start = time.perf_counter(); at.run(); rerun = time.perf_counter() - start
+print(json.dumps({{'first_render_ms': first * 1000, 'rerun_ms': rerun * 1000,
+                  'exceptions': [str(e.value)[:200] for e in at.exception]}}))
+"""
+
+
+def parse_importtime(stderr):
+    """
+    Modules importés après le marqueur : [(module, temps cumulé en ms)] pour les imports de
+    premier niveau (un module importé par un autre est compté dans le temps de son parent).
+    """
+    lines = stderr.splitlines()
+    if MARKER in lines:
+        lines = lines[lines.index(MARKER) + 1:]
+    imports = []
+    for line in lines:
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # L'indentation du nom donne la profondeur de l'import ; seuls les imports directs sont gardés
+        if not name[1:].startswith(' '):
+            imports.append((name.strip(), int(cumulative) / 1000))
+    return imports
+
+
+def run_scenario(path, logged_in, api_url):
+    env = dict(os.environ, PYTHONPATH=APP_DIR, FRAUD_API_URL=api_url)
+    code = RUNNER.format(path=path, logged_in=logged_in, marker=MARKER)
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=APP_DIR, env=env,
+                               capture_output=True, text=True, timeout=300)
+    if completed.returncode != 0:
+        raise RuntimeError(f"Échec du scénario {path} :\n{completed.stderr[-2000:]}")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    imports = parse_importtime(completed.stderr)
+    result['import_ms'] = sum(ms for _, ms in imports)
+    result['slowest_imports'] = sorted(imports, key=lambda item: item[1], reverse=True)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--api-url', default='http://127.0.0.1:9', help="URL de l'API utilisée par les pages.")
+    parser.add_argument('--top', type=int, default=8, help="Nombre d'imports les plus lents affichés par scénario.")
+    parser.add_argument('--output', help="Fichier JSON de résultats.")
+    args = parser.parse_args()
+
+    scenarios = [(f'connexion/{name}', path, False) for name, path in PAGES.items()]
+    scenarios += [(name, path, True) for name, path in PAGES.items()]
+
+    print(f"{'Scénario':<24} {'1er rendu ms':>13} {'imports ms':>11} {'rerun ms':>9}  Imports les plus lents")
+    results = []
+    for label, path, logged_in in scenarios:
+        result = run_scenario(path, logged_in, args.api_url)
+        result['slowest_imports'] = result['slowest_imports'][:args.top]
+        slowest = ', '.join(f"{name} {ms:.0f}" for name, ms in result['slowest_imports'][:3])
+        print(f"{label:<24} {result['first_render_ms']:>13.0f} {result['import_ms']:>11.0f} "
+              f"{result['rerun_ms']:>9.0f}  {slowest}")
+        if result['exceptions']:
+            print(f"{'':<24} exceptions : {result['exceptions']}")
+        results.append({'scenario': label, **result})
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'python': sys.version.split()[0], 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Compare deux rapports JSON produits par bench_api.py et signale les régressions.
+
+Une régression est une hausse de la latence p95 (ou une baisse du débit) supérieure au seuil.
+Le code de sortie vaut 1 si au moins une régression est détectée (utilisable en CI).
+
+Usage :
+    python benchmarks/compare.py base.json nouveau.json [--threshold 0.10]
+"""
+import argparse
+import json
+import sys
+
+
+def load_results(path):
+    with open(path) as f:
+        report = json.load(f)
+    return report, {r['scenario']: r for r in report['results']}
+
+
+def relative_change(base, new):
+    return (new - base) / base if base else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('base')
+    parser.add_argument('new')
+    parser.add_argument('--threshold', type=float, default=0.10, help="Variation relative tolérée (0.10 = 10 %%).")
+    args = parser.parse_args()
+
+    base_report, base = load_results(args.base)
+    new_report, new = load_results(args.new)
+    print(f"Base : {base_report.get('git_revision')}  →  Nouveau : {new_report.get('git_revision')}")
+    print(f"{'Scénario':<32} {'p95 base':>10} {'p95 new':>10} {'Δ p95':>8} {'Δ débit':>8}")
+
+    regressions = []
+    for scenario in sorted(set(base) & set(new)):
+        b, n = base[scenario], new[scenario]
+        p95_change = relative_change(b['p95_ms'], n['p95_ms'])
+        throughput_key = 'throughput_rps' if 'throughput_rps' in b else 'throughput_rows_s'
+        throughput_change = relative_change(b.get(throughput_key, 0.0), n.get(throughput_key, 0.0))
+
+        flag = ''
+        if p95_change > args.threshold or throughput_change < -args.threshold:
+            flag = '  ⚠️ régression'
+            regressions.append(scenario)
+        print(f"{scenario:<32} {b['p95_ms']:>10.2f} {n['p95_ms']:>10.2f} {p95_change:>+8.1%} {throughput_change:>+8.1%}{flag}")
+
+    missing = sorted(set(base) - set(new))
+    if missing:
+        print(f"Scénarios absents du nouveau rapport : {', '.join(missing)}")
+
+    if regressions:
+        print(f"{len(regressions)} régression(s) au-delà de {args.threshold:.0%}.")
+        sys.exit(1)
+    print("Aucune régression détectée.")
+
+
+if __name__ == '__main__':
+    main()
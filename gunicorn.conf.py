@@ -0,0 +1,61 @@
+import gc
+import multiprocessing
+import os
+import shutil
+
+# --- LANCEMENT DE PRODUCTION : GUNICORN + WORKERS UVICORN ---
+# gunicorn -c gunicorn.conf.py api.main:app
+#
+# - Le maître importe l'application et précharge le modèle, la référence de dérive et
+#   l'échantillon historique (preload_app + when_ready) ; les workers forkés partagent ces
+#   objets en copy-on-write au lieu de les recharger chacun.
+# - SIGTERM : arrêt propre — le maître cesse d'accepter, chaque worker termine ses requêtes en
+#   cours (graceful_timeout), vide le journal d'audit et publie ses dernières métriques.
+# - SIGHUP : remplacement progressif des workers (nouvelle configuration). Avec preload_app, le
+#   code et le modèle sont ceux du maître : pour déployer une nouvelle version sans coupure,
+#   envoyer USR2 (nouveau maître) puis WINCH et QUIT à l'ancien.
+# - L'état partagé passe par le disque : file d'alertes SQLite (FRAUD_API_ALERT_DB), instantané
+#   de performance et CSV de feedback sous verrou de fichier, métriques agrégées depuis
+#   FRAUD_API_METRICS_DIR. La surveillance de la dérive et le magasin de vélocité restent propres
+#   à chaque worker (fenêtres par worker ; routage par entité nécessaire pour une vélocité exacte),
+#   comme les seaux de limitation de débit par clé d'API (quotas divisés par le nombre de workers).
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+# Recyclage des workers (fuites mémoire éventuelles), décalé pour ne pas tous les redémarrer ensemble
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10
+accesslog = "-"
+
+if workers > 1:
+    # Variables lues à l'import de api.main : à définir avant le chargement de l'application.
+    os.environ.setdefault("FRAUD_API_ALERT_DB", "alerts.db")
+    os.environ.setdefault("FRAUD_API_METRICS_DIR", os.path.join("/tmp", "fraud_api_metrics"))
+    # Seaux de limitation de débit propres à chaque worker : chacun applique quota / workers
+    os.environ.setdefault("FRAUD_API_WORKERS", str(workers))
+
+
+def on_starting(server):
+    """Repart d'un répertoire de métriques vide (les compteurs d'une exécution précédente sont obsolètes)."""
+    metrics_dir = os.environ.get("FRAUD_API_METRICS_DIR")
+    if metrics_dir:
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+        os.makedirs(metrics_dir, exist_ok=True)
+
+
+def when_ready(server):
+    """Préchargement dans le maître, avant le fork des workers."""
+    from api.main import preload_shared_state
+    missing = preload_shared_state()
+    # Les objets préchargés ne sont plus parcourus par le GC : leurs pages restent partagées
+    gc.freeze()
+    if missing:
+        # Chaque worker retentera le chargement pour son compte (pas de partage en copy-on-write)
+        server.log.warning(f"Préchargement incomplet, non chargé(s) : {', '.join(missing)}.")
+    server.log.info(f"Préchargement terminé, démarrage de {workers} workers.")
+
@@ -0,0 +1,45 @@
+import os
+import tempfile
+
+import pytest
+
+# --- CONFIGURATION DES TESTS DE L'API ---
+# Les fichiers d'exécution de l'API (feedback, instantané de performance, audit...) sont écrits
+# dans un répertoire temporaire ; ces variables sont lues à l'import de api.main.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNTIME_DIR = tempfile.mkdtemp(prefix="fraud_api_tests_")
+
+os.environ["FEEDBACK_FILE"] = os.path.join(RUNTIME_DIR, "feedback_data.csv")
+os.environ["FRAUD_API_PERFORMANCE_FILE"] = os.path.join(RUNTIME_DIR, "performance_snapshot.json")
+os.environ["FRAUD_API_AUDIT"] = "0"
+os.environ["FRAUD_API_PROFILE_DIR"] = os.path.join(RUNTIME_DIR, "profiles")
+os.environ.pop("FRAUD_API_ALERT_DB", None)
+os.environ.pop("FRAUD_API_KEYS", None)
+os.environ.pop("FRAUD_API_KEYS_FILE", None)
+
+FEATURE_COLUMNS = ["Time"] + [f"V{i}" for i in range(1, 29)] + ["Amount"]
+
+
+def make_transaction(**overrides):
+    """Transaction valide (schéma Transaction de l'API)."""
+    return {**{col: 0.1 for col in FEATURE_COLUMNS}, "Time": 1000.0, "Amount": 42.0, **overrides}
+
+
+@pytest.fixture(scope="session")
+def client():
+    """Client de test de l'API ; le modèle est chargé depuis app/models (chemins relatifs à la racine)."""
+    from fastapi.testclient import TestClient
+    from api.main import app
+
+    cwd = os.getcwd()
+    os.chdir(ROOT)
+    try:
+        with TestClient(app) as test_client:
+            yield test_client
+    finally:
+        os.chdir(cwd)
+
+
+@pytest.fixture
+def transaction():
+    return make_transaction()
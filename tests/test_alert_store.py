@@ -0,0 +1,63 @@
+import multiprocessing
+import os
+
+import pytest
+
+from api.alert_store import MemoryAlertStore, SQLiteAlertStore, make_alert
+from conftest import make_transaction
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    return MemoryAlertStore() if request.param == "memory" else SQLiteAlertStore(str(tmp_path / "alerts.db"))
+
+
+def test_add_is_idempotent(store):
+    alert = make_alert(make_transaction(), 0.9, alert_id="a1")
+
+    assert store.add([alert]) == 1
+    assert store.add([alert]) == 0
+    assert store.count() == 1
+
+
+def test_get_and_remove(store):
+    store.add([make_alert(make_transaction(Time=float(i)), 0.9, alert_id=f"a{i}") for i in range(3)])
+
+    assert [a["alert_id"] for a in store.get(["a2", "a0", "unknown"])] == ["a0", "a2"]
+    assert store.remove(["a0", "unknown"]) == 1
+    assert [a["alert_id"] for a in store.list()] == ["a1", "a2"]
+
+
+def test_remove_matching(store):
+    store.add([make_alert(make_transaction(Time=1.0, Amount=10.0), 0.9, alert_id="a1"),
+               make_alert(make_transaction(Time=2.0, Amount=10.0), 0.9, alert_id="a2")])
+
+    removed = store.remove_matching(1.0, 10.0)
+
+    assert [a["alert_id"] for a in removed] == ["a1"]
+    assert store.count() == 1
+
+
+def test_no_connection_opened_at_construction(tmp_path):
+    store = SQLiteAlertStore(str(tmp_path / "alerts.db"))
+
+    assert getattr(store._local, "conn", None) is None
+
+
+def _add_in_child(store):
+    store.add([make_alert(make_transaction(), 0.9, alert_id=f"child-{os.getpid()}")])
+
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="fork indisponible")
+def test_forked_process_opens_its_own_connection(tmp_path):
+    store = SQLiteAlertStore(str(tmp_path / "alerts.db"))
+    store.add([make_alert(make_transaction(), 0.9, alert_id="parent")])
+    parent_conn = store._local.conn
+
+    child = multiprocessing.get_context("fork").Process(target=_add_in_child, args=(store,))
+    child.start()
+    child.join(30)
+
+    assert child.exitcode == 0
+    assert store._local.conn is parent_conn
+    assert store.count() == 2
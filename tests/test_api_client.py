@@ -0,0 +1,122 @@
+import pytest
+import requests
+
+from utils import api_client
+from utils.api_client import ApiClient, CircuitBreaker, CircuitOpenError
+
+
+def make_response(status, headers=None):
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(headers or {})
+    response._content = b""
+    response._content_consumed = True
+    return response
+
+
+class ScriptedSession:
+    """Remplace session.request : rejoue une suite de réponses ou d'exceptions."""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+
+    def __call__(self, method, url, **kwargs):
+        self.calls.append((method, url))
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return make_response(*outcome) if isinstance(outcome, tuple) else make_response(outcome)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(api_client.time, "sleep", delays.append)
+    return delays
+
+
+def client_with(outcomes, breaker=None):
+    client = ApiClient("http://api.test", breaker=breaker or CircuitBreaker(failure_threshold=3, reset_seconds=30))
+    client.session.request = ScriptedSession(outcomes)
+    return client
+
+
+def test_idempotent_request_is_retried_after_transient_errors(sleeps):
+    client = client_with([requests.exceptions.ConnectionError(), 502, 200])
+
+    response = client.get("/health", retries=2)
+
+    assert response.status_code == 200
+    assert len(client.session.request.calls) == 3
+    assert len(sleeps) == 2
+    assert client.breaker.failures == 0
+
+
+def test_post_is_not_replayed_after_a_read_timeout(sleeps):
+    client = client_with([requests.exceptions.ReadTimeout(), 200])
+
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        client.post("/alert")
+
+    assert len(client.session.request.calls) == 1
+    assert client.breaker.failures == 1
+
+
+def test_post_is_replayed_after_503_but_not_502(sleeps):
+    replayed = client_with([503, 200])
+    final = client_with([502, 200])
+
+    assert replayed.post("/predict").status_code == 200
+    assert final.post("/predict").status_code == 502
+    assert final.breaker.failures == 1
+
+
+def test_short_retry_after_is_honoured_and_not_a_failure(sleeps):
+    client = client_with([(429, {"Retry-After": "1"}), 200])
+
+    assert client.post("/predict").status_code == 200
+    assert sleeps == [1.0]
+
+
+@pytest.mark.parametrize("retry_after", ["60", "soon", None])
+def test_long_or_invalid_retry_after_returns_the_429(sleeps, retry_after):
+    headers = {"Retry-After": retry_after} if retry_after else {}
+    client = client_with([(429, headers), 200])
+
+    response = client.post("/predict")
+
+    assert response.status_code == 429
+    assert sleeps == []
+    assert client.breaker.state == "closed"
+
+
+def test_breaker_opens_after_threshold_then_half_opens(sleeps):
+    client = client_with([500, 500, 500, 200])
+
+    for _ in range(3):
+        assert client.get("/health", retries=0).status_code == 500
+    assert client.breaker.state == "open"
+    with pytest.raises(CircuitOpenError, match="nouvel essai dans 30 s"):
+        client.get("/health")
+    assert len(client.session.request.calls) == 3
+
+    client.breaker.opened_at -= client.breaker.reset_seconds
+    assert client.breaker.state == "half-open"
+    assert client.get("/health", retries=0).status_code == 200
+    assert client.breaker.state == "closed"
+
+
+def test_half_open_allows_a_single_trial_and_reopens_on_failure():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=10)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    breaker.opened_at -= 10
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.retry_after() == pytest.approx(10, abs=1)
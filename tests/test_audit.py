@@ -0,0 +1,74 @@
+import gzip
+import json
+import multiprocessing
+import os
+import time
+
+import numpy as np
+import pytest
+
+from api.audit import AuditLogger
+
+
+def make_segment(directory, name, age_days):
+    path = directory / name
+    path.write_bytes(gzip.compress(b"{}\n"))
+    mtime = time.time() - age_days * 86400
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_records_are_written_to_a_segment(tmp_path):
+    audit = AuditLogger(directory=str(tmp_path), sample_rate=1.0, flush_interval=0.01)
+    audit.start()
+    audit.submit("/predict", np.zeros((2, 30)), np.array([0.9, 0.1]), np.array([1, 0]), 0.5, "v1", 0.001)
+    audit.stop()
+
+    [segment] = tmp_path.glob("audit-*.jsonl.gz")
+    records = [json.loads(line) for line in gzip.open(segment, "rt")]
+    assert [r["prediction"] for r in records] == [1, 0]
+
+
+def test_retention_removes_expired_then_oldest_segments(tmp_path):
+    expired = make_segment(tmp_path, "audit-20200101T000000-1-0001.jsonl.gz", age_days=40)
+    oldest = make_segment(tmp_path, "audit-20200102T000000-1-0002.jsonl.gz", age_days=3)
+    recent = [make_segment(tmp_path, f"audit-20200103T00000{i}-1-000{i}.jsonl.gz", age_days=1 - i / 10)
+              for i in range(3)]
+    unrelated = make_segment(tmp_path, "notes.jsonl.gz", age_days=100)
+
+    audit = AuditLogger(directory=str(tmp_path), max_segments=4, retention_days=30)
+    audit._segment()
+
+    remaining = set(tmp_path.iterdir())
+    assert expired not in remaining and oldest not in remaining
+    assert set(recent) <= remaining and unrelated in remaining
+    assert len([p for p in remaining if p.name.startswith("audit-")]) == 3  # 4e segment : le courant, créé au premier flush
+
+
+def test_retention_disabled(tmp_path):
+    segments = [make_segment(tmp_path, f"audit-2020010{i}T000000-1-000{i}.jsonl.gz", age_days=400) for i in range(3)]
+
+    AuditLogger(directory=str(tmp_path), max_segments=0, retention_days=0)._segment()
+
+    assert all(path.exists() for path in segments)
+
+
+def _sample_in_child(audit, connection):
+    audit.start()
+    connection.send(audit._rng.random(8).tolist())
+    audit.stop()
+
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="fork indisponible")
+def test_forked_workers_draw_independent_samples(tmp_path):
+    audit = AuditLogger(directory=str(tmp_path))  # Créé avant le fork, comme avec preload_app
+    context = multiprocessing.get_context("fork")
+    draws = []
+    for _ in range(2):
+        receiver, sender = context.Pipe(duplex=False)
+        child = context.Process(target=_sample_in_child, args=(audit, sender))
+        child.start()
+        draws.append(receiver.recv())
+        child.join(30)
+
+    assert draws[0] != draws[1]
@@ -0,0 +1,106 @@
+import time
+
+import pytest
+
+from utils import credentials, session_tokens
+from utils.credentials import (MemoryCredentialStore, authenticate, hash_password, needs_rehash, register,
+                               verify_password)
+from utils.session_tokens import issue_token, verify_token
+
+FAST_ITERATIONS = 1000
+
+
+@pytest.fixture(autouse=True)
+def fast_hashing(monkeypatch):
+    """Empreintes peu coûteuses : pas de calibration PBKDF2 pendant les tests."""
+    monkeypatch.setattr(credentials, "hash_iterations", lambda: FAST_ITERATIONS)
+    credentials._dummy_hash.cache_clear()
+    yield
+    credentials._dummy_hash.cache_clear()
+
+
+def test_hash_password_is_salted_and_verifiable():
+    first, second = hash_password("secret123"), hash_password("secret123")
+
+    assert first != second
+    assert first.startswith(f"pbkdf2_sha256${FAST_ITERATIONS}$")
+    assert verify_password("secret123", first)
+    assert not verify_password("secret124", first)
+
+
+@pytest.mark.parametrize("encoded", ["", "plain-text", "pbkdf2_sha256$x$salt$digest", "pbkdf2_sha256$1000$%%$%%",
+                                     hash_password("secret123", iterations=1000).replace("pbkdf2_sha256", "md5")])
+def test_verify_password_rejects_malformed_or_foreign_hashes(encoded):
+    assert not verify_password("secret123", encoded)
+
+
+def test_needs_rehash(monkeypatch):
+    current = hash_password("secret123")
+    monkeypatch.setattr(credentials, "hash_iterations", lambda: FAST_ITERATIONS * 4)
+
+    assert needs_rehash(current)
+    assert not needs_rehash(hash_password("secret123"))
+    assert needs_rehash("malformed")
+
+
+def test_authenticate():
+    store = MemoryCredentialStore()
+    assert register(store, "user@example.com", "secret123")
+    assert not register(store, "user@example.com", "other456")
+
+    assert authenticate(store, "user@example.com", "secret123")
+    assert not authenticate(store, "user@example.com", "wrong")
+    assert not authenticate(store, "nobody@example.com", "secret123")
+
+
+def test_authenticate_upgrades_weak_hash(monkeypatch):
+    store = MemoryCredentialStore()
+    store.add_user("user@example.com", hash_password("secret123", iterations=FAST_ITERATIONS))
+    monkeypatch.setattr(credentials, "hash_iterations", lambda: FAST_ITERATIONS * 4)
+
+    assert authenticate(store, "user@example.com", "secret123")
+    assert store.get_hash("user@example.com").startswith(f"pbkdf2_sha256${FAST_ITERATIONS * 4}$")
+
+
+def test_token_round_trip():
+    assert verify_token(issue_token("user@example.com")) == "user@example.com"
+
+
+def test_expired_token_is_rejected(monkeypatch):
+    token = issue_token("user@example.com", ttl=60)
+    now = time.time()
+    monkeypatch.setattr(session_tokens.time, "time", lambda: now + 61)
+
+    assert verify_token(token) is None
+
+
+def test_forged_token_is_rejected():
+    payload, signature = issue_token("user@example.com").split(".")
+    other_payload, _ = issue_token("admin@example.com").split(".")
+
+    assert verify_token(f"{other_payload}.{signature}") is None
+    assert verify_token(f"{payload}.{signature[:-2]}AA") is None
+
+
+def test_token_signed_with_another_key_is_rejected(monkeypatch):
+    token = issue_token("user@example.com")
+    monkeypatch.setattr(session_tokens, "_secret_key", lambda: b"another-key")
+
+    assert verify_token(token) is None
+
+
+@pytest.mark.parametrize("token", [None, "", "abc", "a.b.c", "!!!.###", "é.é"])
+def test_malformed_token_is_rejected(token):
+    assert verify_token(token) is None
+
+
+def test_missing_secret_is_logged(monkeypatch, caplog):
+    monkeypatch.setattr(session_tokens, "config_value", lambda *args: None)
+    session_tokens._secret_key.cache_clear()
+    try:
+        with caplog.at_level("WARNING", logger="fraud_app.session_tokens"):
+            session_tokens._secret_key()
+    finally:
+        session_tokens._secret_key.cache_clear()
+
+    assert "FRAUD_AUTH_SECRET" in caplog.text
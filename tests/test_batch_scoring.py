@@ -0,0 +1,110 @@
+import gc
+import io
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import FEATURE_COLUMNS, make_transaction
+from utils import batch_scoring
+from utils.batch_scoring import BatchValidationError, ResultFile, purge_results, score_upload, validate_chunk
+
+
+@pytest.fixture(autouse=True)
+def results_dir(tmp_path, monkeypatch):
+    directory = tmp_path / "results"
+    monkeypatch.setattr(batch_scoring, "RESULTS_DIR", str(directory))
+    # Modèle factice : fraude si le montant dépasse 100
+    monkeypatch.setattr(batch_scoring, "score_frame", lambda df, local=False: (
+        (df['Amount'] > 100).to_numpy().astype(np.int64), None, 'local'))
+    return directory
+
+
+def upload(content, name="transactions.csv"):
+    """Fichier déposé tel que le fournit st.file_uploader (nom, taille, lecture)."""
+    data = content.encode() if isinstance(content, str) else content
+    uploaded = io.BytesIO(data)
+    uploaded.name = name
+    uploaded.size = len(data)
+    return uploaded
+
+
+def transactions_csv(rows):
+    return pd.DataFrame(rows).to_csv(index=False)
+
+
+def test_validate_chunk_rejects_missing_columns():
+    chunk = pd.DataFrame([make_transaction()]).drop(columns=['V3', 'Amount'])
+
+    with pytest.raises(BatchValidationError, match="V3, Amount"):
+        validate_chunk(chunk)
+
+
+def test_validate_chunk_flags_non_numeric_and_non_finite_values():
+    chunk = pd.DataFrame([make_transaction(), make_transaction(V1="abc", Amount=""), make_transaction(V2=np.inf)])
+
+    features, valid, invalid_columns = validate_chunk(chunk)
+
+    assert valid.tolist() == [True, False, False]
+    assert invalid_columns.tolist() == ['', 'V1, Amount', 'V2']
+    assert (features.dtypes == np.float64).all()
+    assert list(features.columns) == FEATURE_COLUMNS
+
+
+def test_score_upload_writes_results_and_reports_rejected_rows(results_dir):
+    rows = [make_transaction(Amount=50.0), make_transaction(Amount=500.0, Class=1), make_transaction(V4="n/a")]
+
+    summary, errors, result = score_upload(upload(transactions_csv(rows)))
+
+    assert summary["Transactions notées"] == "2"
+    assert summary["Lignes rejetées (schéma)"] == "1"
+    assert summary["Fraudes prédites"] == "1"
+    assert errors == [{'Ligne': 3, 'Colonnes invalides': 'V4'}]
+    assert os.path.dirname(result.path) == str(results_dir)
+    written = pd.read_csv(result.path)
+    assert written['row'].tolist() == [1, 2, 3]
+    assert written['prediction'].tolist()[:2] == [0, 1] and pd.isna(written['prediction'][2])
+
+
+@pytest.mark.parametrize("content, name, message", [
+    ("a,b\n1,2\n", "transactions.xlsx", "Format non pris en charge"),
+    ("Time,Amount\n1,2\n", "transactions.csv", "Colonnes manquantes"),
+    (",".join(FEATURE_COLUMNS) + "\n", "transactions.csv", "aucune transaction"),
+])
+def test_unusable_upload_raises_and_leaves_no_result_file(results_dir, content, name, message):
+    with pytest.raises(BatchValidationError, match=message):
+        score_upload(upload(content, name))
+
+    assert os.listdir(results_dir) == []
+
+
+def test_result_file_is_removed_by_discard_or_garbage_collection(results_dir):
+    _, _, first = score_upload(upload(transactions_csv([make_transaction()])))
+    _, _, second = score_upload(upload(transactions_csv([make_transaction()])))
+    first_path, second_path = first.path, second.path
+
+    first.discard()
+    del second
+    gc.collect()
+
+    assert not os.path.exists(first_path) and not first.available
+    assert not os.path.exists(second_path)
+
+
+def test_purge_results_removes_expired_then_oldest_files(tmp_path):
+    paths = []
+    for age in (100, 50, 40, 30, 20):
+        path = tmp_path / f"scoring_{age}.csv.gz"
+        path.write_bytes(b"")
+        os.utime(path, (0, path.stat().st_mtime - age))
+        paths.append(path)
+
+    purge_results(str(tmp_path), max_age=60, max_files=3)
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["scoring_20.csv.gz", "scoring_30.csv.gz", "scoring_40.csv.gz"]
+
+
+def test_purge_results_ignores_a_missing_directory(tmp_path):
+    purge_results(str(tmp_path / "absent"))
+    assert ResultFile(str(tmp_path / "absent.csv.gz")).available is False
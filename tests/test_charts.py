@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.charts import MAX_HISTOGRAM_BINS, histogram_bins, lttb, sample_keep_all
+
+
+def test_histogram_bins_matches_numpy_and_drops_non_finite():
+    values = np.array([0.5, 1.5, 1.7, np.nan, np.inf, 9.0])
+
+    edges, counts = histogram_bins(values, bins=4, value_range=(0, 10))
+
+    np.testing.assert_array_equal(edges, np.linspace(0, 10, 5))
+    assert counts.tolist() == [3, 0, 0, 1]
+
+
+def test_histogram_bins_is_capped_and_handles_empty_input():
+    edges, counts = histogram_bins(np.arange(10_000), bins=10 * MAX_HISTOGRAM_BINS)
+    empty_edges, empty_counts = histogram_bins([])
+
+    assert len(counts) == MAX_HISTOGRAM_BINS
+    assert counts.sum() == 10_000
+    assert len(empty_edges) == len(empty_counts) + 1
+
+
+@pytest.mark.parametrize("n, n_out", [(1000, 500), (1000, 3), (101, 100), (5000, 37)])
+def test_lttb_keeps_endpoints_and_returns_exactly_n_out_points(n, n_out):
+    rng = np.random.default_rng(n_out)
+    x = np.arange(n, dtype=float)
+    y = rng.normal(size=n).cumsum()
+
+    sx, sy = lttb(x, y, n_out=n_out)
+
+    assert len(sx) == len(sy) == n_out
+    assert (sx[0], sy[0]) == (x[0], y[0])
+    assert (sx[-1], sy[-1]) == (x[-1], y[-1])
+    assert (np.diff(sx) > 0).all()
+    # chaque point retenu est un point d'origine
+    np.testing.assert_array_equal(sy, y[sx.astype(int)])
+
+
+def test_lttb_keeps_an_isolated_peak():
+    x = np.arange(1000, dtype=float)
+    y = np.zeros(1000)
+    y[437] = 50.0
+
+    _, sy = lttb(x, y, n_out=20)
+
+    assert sy.max() == 50.0
+
+
+def test_lttb_returns_short_series_unchanged():
+    x, y = np.arange(10.0), np.arange(10.0) ** 2
+
+    sx, sy = lttb(x, y, n_out=50)
+
+    np.testing.assert_array_equal(sx, x)
+    np.testing.assert_array_equal(sy, y)
+
+
+def test_sample_keep_all_keeps_every_fraud_within_budget():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'Amount': rng.uniform(size=10_000), 'Class': (rng.random(10_000) < 0.02).astype(int)})
+
+    sample = sample_keep_all(df, max_points=1000)
+
+    assert len(sample) == 1000
+    assert (sample['Class'] == 1).sum() == (df['Class'] == 1).sum()
+    assert sample.index.is_monotonic_increasing
+    assert sample.index.equals(sample_keep_all(df, max_points=1000).index)
+
+
+def test_sample_keep_all_leaves_small_frames_and_missing_column_alone():
+    df = pd.DataFrame({'Amount': np.arange(50.0)})
+
+    assert sample_keep_all(df, max_points=100) is df
+    assert len(sample_keep_all(df, max_points=10)) == 10
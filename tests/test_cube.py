@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.cube import AmountCube
+from utils.data_loader import AMOUNT_CATEGORY_BINS, AMOUNT_CATEGORY_LABELS
+
+
+@pytest.fixture(scope="module")
+def frame():
+    """Jeu synthétique : montants fins (< 1000 $), tranches logarithmiques et valeurs exactes aux bornes."""
+    rng = np.random.default_rng(7)
+    n = 5000
+    amounts = np.concatenate([rng.uniform(0, 1200, n - 200), rng.uniform(1000, 25000, 150),
+                              np.repeat([0.0, 10.0, 50.0, 100.0, 500.0], 10)])
+    return pd.DataFrame({
+        'Hour': rng.integers(0, 24, n),
+        'Amount': amounts,
+        'Class': (rng.random(n) < 0.1).astype(int),
+        'Predicted_Class': (rng.random(n) < 0.12).astype(int),
+    })
+
+
+@pytest.fixture(scope="module")
+def cube(frame):
+    return AmountCube.from_arrays(frame['Hour'], frame['Amount'], frame['Class'], frame['Predicted_Class'])
+
+
+def select(frame, fraud_class=None, amount_min=None, amount_max=None, hour_min=0, hour_max=23):
+    """Filtre de référence : masques pandas, montants dans [amount_min, amount_max)."""
+    mask = frame['Hour'].between(hour_min, hour_max)
+    if fraud_class is not None:
+        mask &= frame['Class'] == fraud_class
+    if amount_min is not None:
+        mask &= frame['Amount'] >= amount_min
+    if amount_max is not None:
+        mask &= frame['Amount'] < amount_max
+    return frame[mask]
+
+
+FILTERS = [
+    {},
+    {'fraud_class': 1},
+    {'fraud_class': 0, 'amount_min': 50.0, 'amount_max': 100.0},
+    {'amount_min': 100.0, 'amount_max': 500.0, 'hour_min': 8, 'hour_max': 17},
+    {'amount_max': 50.0, 'hour_min': 23},
+    {'amount_min': 500.0},
+    {'amount_min': 7.0, 'amount_max': 8.0, 'fraud_class': 1, 'hour_min': 3, 'hour_max': 3},
+]
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_kpis_match_pandas_masks(frame, cube, filters):
+    expected = select(frame, **filters)
+    frauds = expected[expected['Class'] == 1]
+    tp = int((frauds['Predicted_Class'] == 1).sum())
+    fp = int(((expected['Class'] == 0) & (expected['Predicted_Class'] == 1)).sum())
+
+    kpis = cube.query(**filters).kpis()
+
+    assert kpis['total_transactions'] == len(expected)
+    assert kpis['total_fraud_transactions'] == len(frauds)
+    assert kpis['total_fraud_amount'] == pytest.approx(frauds['Amount'].sum())
+    assert kpis['true_positives'] == tp
+    assert kpis['false_positives'] == fp
+    assert kpis['recall'] == pytest.approx(tp / len(frauds) if len(frauds) else 0)
+    assert kpis['precision'] == pytest.approx(tp / (tp + fp) if tp + fp else 0)
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_by_hour_matches_groupby(frame, cube, filters):
+    expected = select(frame, **filters).groupby(['Hour', 'Class']).size().reset_index(name='Count')
+
+    result = cube.query(**filters).by_hour()
+
+    assert result.astype(int).values.tolist() == expected.astype(int).values.tolist()
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_by_amount_category_matches_cut(frame, cube, filters):
+    expected = select(frame, **filters).assign(Amount_Category=lambda df: pd.cut(
+        df['Amount'], bins=AMOUNT_CATEGORY_BINS, labels=AMOUNT_CATEGORY_LABELS, right=False))
+    grouped = expected.groupby(['Amount_Category', 'Class'], observed=False)['Amount'].agg(['size', 'sum'])
+
+    for row in cube.query(**filters).by_amount_category().itertuples():
+        key = (row.Amount_Category, row.Class)
+        count, amount = grouped.loc[key] if key in grouped.index else (0, 0.0)
+        assert row.Count == count
+        assert row.Amount == pytest.approx(amount)
+
+
+def test_amount_histogram_preserves_counts(frame, cube):
+    query = cube.query(amount_max=1000.0)
+
+    edges, counts = query.amount_histogram(max_bins=50)
+
+    assert len(edges) == counts.shape[0] + 1 <= 51
+    assert edges[0] == 0.0 and edges[-1] == 1000.0
+    assert counts.sum() == (frame['Amount'] < 1000.0).sum()
+    assert counts[:, 1].sum() == ((frame['Amount'] < 1000.0) & (frame['Class'] == 1)).sum()
+
+
+def test_empty_amount_range(cube):
+    assert cube.query(amount_min=100.0, amount_max=100.0).kpis()['total_transactions'] == 0
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import data_loader
+from utils.data_loader import FEATURE_COLUMNS, read_dataset, read_only_frame
+
+
+@pytest.fixture
+def dataset(tmp_path, monkeypatch):
+    rng = np.random.default_rng(3)
+    n = 200
+    df = pd.DataFrame(rng.normal(size=(n, len(FEATURE_COLUMNS))), columns=FEATURE_COLUMNS)
+    df['Time'] = rng.uniform(0, 172800, n)
+    df['Amount'] = rng.uniform(0, 2000, n)
+    df['Class'] = (rng.random(n) < 0.1).astype(int)
+    path = tmp_path / "creditcard_cleaned.csv"
+    df.to_csv(path, index=False)
+    monkeypatch.setattr(data_loader, "DATA_PATH", str(path))
+    return df
+
+
+def test_full_read_uses_the_compact_schema(dataset):
+    df = read_dataset()
+
+    assert list(df.columns) == data_loader.ALL_COLUMNS
+    assert (df[FEATURE_COLUMNS].dtypes == np.float32).all()
+    assert df['Class'].dtype == np.uint8
+    assert df['Hour'].dtype == np.uint8
+    np.testing.assert_allclose(df['Amount'], dataset['Amount'], rtol=1e-6)
+
+
+def test_derived_columns_only_read_their_source(dataset, monkeypatch):
+    read_columns = []
+    read_csv = pd.read_csv
+
+    def spy(*args, usecols=None, **kwargs):
+        read_columns.append(list(usecols))
+        return read_csv(*args, usecols=usecols, **kwargs)
+
+    monkeypatch.setattr(data_loader.pd, "read_csv", spy)
+    df = read_dataset(columns=('Hour', 'Class', 'Amount_Category'))
+
+    assert read_columns == [['Time', 'Amount', 'Class']]
+    assert list(df.columns) == ['Hour', 'Class', 'Amount_Category']
+    assert df['Hour'].tolist() == ((dataset['Time'].astype(np.float32) // 3600) % 24).astype(int).tolist()
+    expected_categories = pd.cut(dataset['Amount'].astype(np.float32), bins=data_loader.AMOUNT_CATEGORY_BINS,
+                                 labels=data_loader.AMOUNT_CATEGORY_LABELS)
+    assert df['Amount_Category'].astype(str).tolist() == expected_categories.astype(str).tolist()
+
+
+def test_unknown_column_is_rejected(dataset):
+    with pytest.raises(ValueError, match="Colonnes inconnues"):
+        read_dataset(columns=['Amount', 'Merchant'])
+
+
+def test_read_only_frame_rejects_in_place_writes(dataset):
+    frame = read_only_frame(read_dataset(columns=['Amount', 'Amount_Category']))
+
+    with pytest.raises(ValueError):
+        frame['Amount'].to_numpy()[0] = 0.0
+    copy = frame[frame['Amount'] > 100].copy()
+    copy['Amount'] = 0.0
+    assert (frame['Amount'] > 0).any()
+    assert isinstance(frame['Amount_Category'].dtype, pd.CategoricalDtype)
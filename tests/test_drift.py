@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from api.drift import (DriftMonitor, SCORE_COLUMN, binned_ks, build_baseline, population_stability_index)
+from conftest import FEATURE_COLUMNS
+
+BUCKET = 60
+
+
+@pytest.fixture
+def reference():
+    rng = np.random.default_rng(0)
+    return rng.normal(size=(5000, len(FEATURE_COLUMNS))), rng.uniform(size=5000)
+
+
+@pytest.fixture
+def monitor(reference):
+    features, scores = reference
+    return DriftMonitor(build_baseline(features, scores), bucket_seconds=BUCKET, n_buckets=10)
+
+
+def test_psi_and_ks_of_known_distributions():
+    expected = np.array([0.5, 0.5])
+    actual = np.array([0.8, 0.2])
+
+    assert population_stability_index(expected, expected) == 0
+    assert population_stability_index(expected, actual) == pytest.approx(0.3 * np.log(1.6) - 0.3 * np.log(0.4))
+    assert binned_ks(expected, actual) == pytest.approx(0.3)
+
+
+def test_bucket_counts_match_searchsorted(monitor):
+    batch = np.random.default_rng(1).normal(size=(300, len(FEATURE_COLUMNS)))
+
+    monitor.observe(batch, now=0)
+    counts = monitor.window_counts(now=0)
+
+    for j, column in enumerate(monitor.columns):
+        if column == SCORE_COLUMN:
+            continue
+        bins = np.searchsorted(monitor.edges[j], batch[:, FEATURE_COLUMNS.index(column)], side="right")
+        expected = np.bincount(bins, minlength=counts.shape[1])
+        np.testing.assert_array_equal(counts[j], expected)
+
+
+def test_same_distribution_is_stable_and_shift_is_detected(monitor):
+    rng = np.random.default_rng(2)
+    stable = rng.normal(size=(2000, len(FEATURE_COLUMNS)))
+    shifted = stable.copy()
+    shifted[:, FEATURE_COLUMNS.index("Amount")] += 2.0
+
+    monitor.observe(stable, now=0)
+    monitor.observe_scores(rng.uniform(size=2000), now=0)
+    stable_report = monitor.report(now=0)
+    monitor.observe(shifted, now=BUCKET * 20)
+    shifted_report = monitor.report(window_seconds=BUCKET, now=BUCKET * 20)
+
+    assert stable_report["sufficient_data"]
+    assert stable_report["drifting_features"] == []
+    assert stable_report["score"]["status"] == "ok"
+    assert shifted_report["drifting_features"] == ["Amount"]
+    assert shifted_report["features"]["Amount"]["ks"] > 0.5
+    assert shifted_report["score"] is None
+
+
+def test_window_sums_recent_buckets_and_ring_slots_are_reused(monitor):
+    one = np.zeros((1, len(FEATURE_COLUMNS)))
+
+    for minute in range(3):
+        monitor.observe(np.repeat(one, minute + 1, axis=0), now=minute * BUCKET)
+
+    assert monitor.report(window_seconds=BUCKET, now=2 * BUCKET)["n_observations"] == 3
+    assert monitor.report(window_seconds=2 * BUCKET, now=2 * BUCKET)["n_observations"] == 5
+    assert monitor.report(now=2 * BUCKET)["n_observations"] == 6
+    # 10 buckets plus tard, le slot de la minute 0 est réutilisé et remis à zéro
+    monitor.observe(np.repeat(one, 4, axis=0), now=10 * BUCKET)
+    assert monitor.report(now=10 * BUCKET)["n_observations"] == 2 + 3 + 4
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from api.feature_store import FEATURE_STORE_EVICTIONS, FEATURE_STORE_TTL, WINDOWS, FeatureStore
+
+
+def naive_features(events, now):
+    """Agrégats recalculés à partir de toutes les transactions : buckets de la fenêtre courante."""
+    features = {}
+    for name, width, size in WINDOWS:
+        amounts = [a for t, a in events if t // width > now // width - size and t <= now]
+        features[f"tx_count_{name}"] = len(amounts)
+        features[f"amount_sum_{name}"] = round(sum(amounts), 2)
+        features[f"amount_max_{name}"] = max(amounts, default=0.0)
+    return features
+
+
+def test_windows_match_naive_aggregates():
+    rng = np.random.default_rng(0)
+    store = FeatureStore()
+    events = []
+    now = 1_000_000.0
+    for gap, amount in zip(rng.exponential(600, 400), rng.uniform(1, 500, 400)):
+        now += gap
+        events.append((now, float(amount)))
+        features = store.update("card", float(amount), now=now)
+        expected = naive_features(events, now)
+
+        for key, value in expected.items():
+            assert features[key] == pytest.approx(value, abs=1e-6), key
+
+
+def test_lookup_reads_without_recording():
+    store = FeatureStore()
+    store.update("card", 100.0, now=0)
+    store.update("card", 40.0, now=30)
+
+    at_30 = store.lookup("card", now=30)
+    at_90 = store.lookup("card", now=90)
+
+    assert at_30["tx_count_1m"] == 2 and at_30["amount_max_1m"] == 100.0
+    assert at_90["tx_count_1m"] == 0 and at_90["tx_count_1h"] == 2
+    assert store.lookup("card", now=90)["tx_count_1h"] == 2
+    assert store.lookup("unknown", now=90) is None
+
+
+def test_inactive_entities_expire_after_ttl():
+    store = FeatureStore()
+    before = FEATURE_STORE_EVICTIONS.value(reason="ttl")
+    store.update("old", 10.0, now=0)
+
+    assert store.lookup("old", now=FEATURE_STORE_TTL + 1) is None
+    store.update("new", 10.0, now=FEATURE_STORE_TTL + 1)
+
+    assert len(store) == 1
+    assert FEATURE_STORE_EVICTIONS.value(reason="ttl") == before + 1
+
+
+def test_least_recently_seen_entity_is_evicted_at_capacity():
+    store = FeatureStore(max_entities=2)
+    before = FEATURE_STORE_EVICTIONS.value(reason="capacity")
+    store.update("a", 1.0, now=0)
+    store.update("b", 1.0, now=1)
+    store.update("a", 1.0, now=2)
+    store.update("c", 1.0, now=3)
+
+    assert store.lookup("b", now=3) is None
+    assert store.lookup("a", now=3)["tx_count_1m"] == 2
+    assert len(store) == 2
+    assert FEATURE_STORE_EVICTIONS.value(reason="capacity") == before + 1
@@ -0,0 +1,112 @@
+import pandas as pd
+import pytest
+
+from api import main
+from api.alert_store import make_alert
+from conftest import make_transaction
+
+
+@pytest.fixture
+def feedback_file(tmp_path, monkeypatch):
+    path = tmp_path / "feedback_data.csv"
+    monkeypatch.setattr(main, "FEEDBACK_FILE", str(path))
+    return path
+
+
+@pytest.fixture
+def alerts(client):
+    """Deux alertes en file (identifiants a1 et a2), file vidée après le test."""
+    main.ALERT_STORE.clear()
+    queued = [make_alert(make_transaction(Time=1.0, Amount=10.0), 0.9, alert_id="a1"),
+              make_alert(make_transaction(Time=2.0, Amount=20.0), 0.8, alert_id="a2")]
+    main.ALERT_STORE.add(queued)
+    yield queued
+    main.ALERT_STORE.clear()
+
+
+def queued_ids():
+    return {alert["alert_id"] for alert in main.ALERT_STORE.list()}
+
+
+def test_bulk_feedback_resolves_known_ids_and_reports_unknown(client, alerts, feedback_file):
+    tp_before = main.PERFORMANCE_TRACKER.all_time.tp
+    response = client.post("/alerts/feedback", json={"labels": [
+        {"alert_id": "a1", "user_feedback": 1},
+        {"alert_id": "missing", "user_feedback": 0},
+    ]})
+
+    assert response.status_code == 200
+    assert response.json()["resolved"] == 1
+    assert response.json()["unknown_ids"] == ["missing"]
+    assert queued_ids() == {"a2"}
+    written = pd.read_csv(feedback_file)
+    assert list(written.columns) == main.TRANSACTION_FIELDS + ["model_prediction", "user_feedback"]
+    assert written[["Time", "model_prediction", "user_feedback"]].values.tolist() == [[1.0, 1, 1]]
+    assert main.PERFORMANCE_TRACKER.all_time.tp == tp_before + 1
+
+
+def test_bulk_feedback_with_only_unknown_ids_writes_nothing(client, alerts, feedback_file):
+    response = client.post("/alerts/feedback", json={"labels": [{"alert_id": "missing", "user_feedback": 1}]})
+
+    assert response.json()["resolved"] == 0
+    assert queued_ids() == {"a1", "a2"}
+    assert not feedback_file.exists()
+
+
+def test_bulk_feedback_without_labels(client, alerts):
+    response = client.post("/alerts/feedback", json={"labels": []})
+
+    assert response.status_code == 200
+    assert response.json()["resolved"] == 0
+
+
+def test_bulk_feedback_write_failure_keeps_alerts_queued(client, alerts, feedback_file, monkeypatch):
+    def failing_to_csv(*args, **kwargs):
+        raise OSError("disque plein")
+
+    monkeypatch.setattr(pd.DataFrame, "to_csv", failing_to_csv)
+    response = client.post("/alerts/feedback", json={"labels": [
+        {"alert_id": "a1", "user_feedback": 1},
+        {"alert_id": "a2", "user_feedback": 0},
+    ]})
+
+    assert response.status_code == 500
+    assert queued_ids() == {"a1", "a2"}
+
+
+def test_single_alert_feedback_removes_matching_alert(client, alerts, feedback_file):
+    transaction = make_transaction(Time=2.0, Amount=20.0, entity_id="card-1")
+    response = client.post("/alert", json={"transaction": transaction, "model_prediction": 1, "user_feedback": 0})
+
+    assert response.status_code == 200
+    assert queued_ids() == {"a1"}
+    written = pd.read_csv(feedback_file)
+    assert "entity_id" not in written.columns
+    assert written[["Amount", "user_feedback"]].values.tolist() == [[20.0, 0]]
+
+
+def test_single_alert_feedback_write_failure_keeps_alert_queued(client, alerts, feedback_file, monkeypatch):
+    def failing_to_csv(*args, **kwargs):
+        raise OSError("disque plein")
+
+    monkeypatch.setattr(pd.DataFrame, "to_csv", failing_to_csv)
+    transaction = make_transaction(Time=1.0, Amount=10.0)
+    response = client.post("/alert", json={"transaction": transaction, "model_prediction": 1, "user_feedback": 1})
+
+    assert response.status_code == 500
+    assert queued_ids() == {"a1", "a2"}
+
+
+def test_single_alert_feedback_removes_alert_inside_the_write_lock(client, alerts, feedback_file, monkeypatch):
+    held = []
+    remove_matching = main.ALERT_STORE.remove_matching
+
+    def checked_remove_matching(*args):
+        held.append(main.FEEDBACK_LOCK.locked())
+        return remove_matching(*args)
+
+    monkeypatch.setattr(main.ALERT_STORE, "remove_matching", checked_remove_matching)
+    transaction = make_transaction(Time=1.0, Amount=10.0)
+    client.post("/alert", json={"transaction": transaction, "model_prediction": 1, "user_feedback": 1})
+
+    assert held == [True]
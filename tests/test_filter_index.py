@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.filter_index import FilterIndex
+
+
+@pytest.fixture(scope="module")
+def frame():
+    rng = np.random.default_rng(11)
+    n = 3001  # Pas un multiple de 8 : dernier octet des bitmaps incomplet
+    return pd.DataFrame({
+        'Amount': np.round(rng.exponential(90, n), 2),
+        'Hour': rng.integers(0, 24, n).astype(np.uint8),
+        'Class': (rng.random(n) < 0.05).astype(np.uint8),
+    })
+
+
+@pytest.fixture(scope="module")
+def index(frame):
+    return FilterIndex.from_frame(frame)
+
+
+def expected_rows(frame, fraud_class=None, amount_min=None, amount_max=None, hour_min=0, hour_max=23):
+    mask = frame['Hour'].between(hour_min, hour_max)
+    if fraud_class is not None:
+        mask &= frame['Class'] == fraud_class
+    if amount_min is not None:
+        mask &= frame['Amount'] >= amount_min
+    if amount_max is not None:
+        mask &= frame['Amount'] < amount_max
+    return np.flatnonzero(mask.to_numpy())
+
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {'fraud_class': 1},
+    {'fraud_class': 0, 'hour_min': 22, 'hour_max': 23},
+    {'amount_min': 50.0, 'amount_max': 100.0},
+    {'amount_min': 12.34, 'amount_max': 12.35},
+    {'amount_max': 10.0, 'fraud_class': 1, 'hour_min': 0, 'hour_max': 5},
+    {'amount_min': 500.0, 'hour_min': 12, 'hour_max': 12},
+    {'amount_min': 1e9},
+])
+def test_select_matches_pandas_masks(frame, index, filters):
+    expected = expected_rows(frame, **filters)
+
+    assert index.select(**filters).tolist() == expected.tolist()
+    assert sorted(index.select(preserve_order=False, **filters).tolist()) == expected.tolist()
+    assert index.count(**filters) == len(expected)
+
+
+def test_amount_bounds_are_half_open(frame, index):
+    amount = float(frame['Amount'].iloc[0])
+    rows = index.select(amount_min=amount, amount_max=amount + 0.001)
+
+    assert 0 in rows
+    assert 0 not in index.select(amount_max=amount)
@@ -0,0 +1,37 @@
+import uuid
+
+import pytest
+
+from api import security
+from api.metrics import REQUEST_LATENCY, REQUESTS
+
+
+def series_count():
+    return len(REQUESTS._values), len(REQUEST_LATENCY._series)
+
+
+@pytest.mark.parametrize("auth", [False, True])
+def test_unrouted_requests_do_not_create_label_series(client, monkeypatch, auth):
+    if auth:
+        monkeypatch.setattr(security, "KEY_CACHE", security.KeyCache(keys_file=None, keys_env="tests:secret"))
+    # Une série par code de statut et méthode, créée par la première sonde
+    client.get(f"/{uuid.uuid4().hex}")
+    client.post(f"/{uuid.uuid4().hex}")
+    client.request("BREW", f"/{uuid.uuid4().hex}")
+    client.put("/predict")
+    before = series_count()
+
+    for _ in range(20):
+        client.get(f"/{uuid.uuid4().hex}/{uuid.uuid4().hex}")
+        client.post(f"/{uuid.uuid4().hex}", json={})
+        client.request("BREW", f"/{uuid.uuid4().hex}")
+    client.put("/predict")
+
+    assert series_count() == before
+
+
+def test_unrouted_requests_are_labelled_unmatched(client):
+    before = REQUESTS.value(endpoint="unmatched", method="OTHER", status="404")
+    client.request("BREW", f"/{uuid.uuid4().hex}")
+
+    assert REQUESTS.value(endpoint="unmatched", method="OTHER", status="404") == before + 1
@@ -0,0 +1,32 @@
+from api.performance import WindowStats
+
+
+def test_ratios_are_defined_from_alert_feedback_only():
+    stats = WindowStats()
+    stats.update(prediction=1, truth=1, score=0.9)
+    stats.update(prediction=1, truth=0, score=0.7)
+
+    summary = stats.summary()
+
+    assert summary["precision"] == 0.5
+    assert summary["recall"] == 1.0
+    assert summary["false_positive_rate"] == 1.0
+    assert summary["reviewed_non_alerts"] == 0
+
+
+def test_ratios_with_reviewed_non_alerts():
+    stats = WindowStats(tp=3, fp=1, tn=9, fn=1)
+
+    summary = stats.summary()
+
+    assert summary["recall"] == 0.75
+    assert summary["false_positive_rate"] == 0.1
+    assert summary["reviewed_non_alerts"] == 10
+
+
+def test_ratios_without_denominator_are_none():
+    summary = WindowStats().summary()
+
+    assert summary["precision"] is None
+    assert summary["recall"] is None
+    assert summary["false_positive_rate"] is None
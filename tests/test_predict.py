@@ -0,0 +1,72 @@
+import pytest
+
+from conftest import make_transaction
+
+
+def test_predict_single_transaction(client, transaction):
+    response = client.post("/predict", json=transaction)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["prediction"] in (0, 1)
+    assert 0.0 <= body["probability"] <= 1.0
+    assert body["confidence"] in ("Haute", "Moyenne", "Basse")
+
+
+def test_predict_with_entity_returns_velocity(client, transaction):
+    response = client.post("/predict", json={**transaction, "entity_id": "card-tests"})
+
+    assert response.status_code == 200
+    assert "velocity" in response.json()
+
+
+def test_predict_batch_returns_one_score_per_transaction(client):
+    transactions = [make_transaction(Amount=float(i)) for i in range(5)]
+    response = client.post("/predict_batch", json={"transactions": transactions})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body["predictions"]) == len(body["probabilities"]) == 5
+
+
+def test_predict_batch_matches_single_predictions(client):
+    transactions = [make_transaction(V14=-float(i), Amount=float(10 * i)) for i in range(3)]
+    batch = client.post("/predict_batch", json={"transactions": transactions}).json()
+
+    for i, transaction in enumerate(transactions):
+        single = client.post("/predict", json=transaction).json()
+        assert single["probability"] == pytest.approx(batch["probabilities"][i], rel=1e-5)
+
+
+def test_predict_batch_spanning_several_chunks(client, monkeypatch):
+    from api import lanes
+
+    monkeypatch.setattr(lanes, "BULK_CHUNK_ROWS", 3)
+    waits_before = lanes.LANE_QUEUE_WAIT.snapshot(lane="bulk")[0]
+    transactions = [make_transaction(Amount=float(i)) for i in range(10)]
+    response = client.post("/predict_batch", json={"transactions": transactions})
+
+    assert response.status_code == 200
+    assert len(response.json()["predictions"]) == 10
+    # Validation du corps + 4 tranches de 3 lignes au plus
+    assert sum(lanes.LANE_QUEUE_WAIT.snapshot(lane="bulk")[0]) - sum(waits_before) == 5
+
+
+def test_predict_batch_empty(client):
+    response = client.post("/predict_batch", json={"transactions": []})
+
+    assert response.status_code == 200
+    assert response.json() == {"predictions": [], "probabilities": []}
+
+
+def test_predict_batch_invalid_field(client):
+    response = client.post("/predict_batch", json={"transactions": [make_transaction(V3="abc")]})
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "transactions", 0, "V3"]
+
+
+def test_predict_batch_invalid_json(client):
+    response = client.post("/predict_batch", content=b"{not json", headers={"Content-Type": "application/json"})
+
+    assert response.status_code == 422
@@ -0,0 +1,78 @@
+import itertools
+
+import pytest
+import streamlit as st
+
+from utils.prefetch import SESSION_KEY, invalidate, prefetch
+
+
+@pytest.fixture(autouse=True)
+def session():
+    st.session_state.pop(SESSION_KEY, None)
+    yield
+    st.session_state.pop(SESSION_KEY, None)
+
+
+def counting_tasks():
+    counter = itertools.count(1)
+    return {"alerts": lambda: next(counter)}
+
+
+def age(slot, seconds):
+    """Vieillit les résultats mémorisés d'une page de `seconds` secondes."""
+    stored = st.session_state[SESSION_KEY][slot]
+    for name, (stamp, value) in stored.items():
+        stored[name] = (stamp - seconds, value)
+
+
+def test_results_and_errors_are_returned_by_task_name():
+    results, errors = prefetch({"ok": lambda: 42, "ko": lambda: 1 / 0})
+
+    assert results == {"ok": 42}
+    assert isinstance(errors["ko"], ZeroDivisionError)
+
+
+def test_slot_results_are_reused_until_ttl_expires():
+    tasks = counting_tasks()
+
+    assert prefetch(tasks, slot="page", ttl=60)[0] == {"alerts": 1}
+    assert prefetch(tasks, slot="page", ttl=60)[0] == {"alerts": 1}
+    age("page", 61)
+    assert prefetch(tasks, slot="page", ttl=60)[0] == {"alerts": 2}
+
+
+def test_without_slot_tasks_always_run():
+    tasks = counting_tasks()
+
+    prefetch(tasks)
+
+    assert prefetch(tasks)[0] == {"alerts": 2}
+
+
+def test_failed_tasks_are_not_stored():
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ConnectionError("API indisponible")
+        return "ok"
+
+    _, errors = prefetch({"health": flaky}, slot="page")
+    results, retry_errors = prefetch({"health": flaky}, slot="page")
+
+    assert "health" in errors
+    assert results == {"health": "ok"} and retry_errors == {}
+
+
+def test_invalidate_forgets_only_its_slot():
+    tasks = counting_tasks()
+    other = counting_tasks()
+    prefetch(tasks, slot="alerts")
+    prefetch(other, slot="dashboard")
+
+    invalidate("alerts")
+    invalidate("unknown")
+
+    assert prefetch(tasks, slot="alerts")[0] == {"alerts": 2}
+    assert prefetch(other, slot="dashboard")[0] == {"alerts": 1}
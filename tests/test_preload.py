@@ -0,0 +1,44 @@
+import os
+
+import pandas as pd
+
+from api import main
+from conftest import FEATURE_COLUMNS, ROOT, make_transaction
+
+
+def write_dataset(path, n_rows):
+    pd.DataFrame([{**make_transaction(Time=float(i)), "Class": i % 2} for i in range(n_rows)]).to_csv(path, index=False)
+
+
+def test_historical_data_path_does_not_depend_on_working_directory():
+    assert main.HISTORICAL_DATA_FILE == os.path.join(ROOT, "app", "data", "creditcard_cleaned.csv")
+
+
+def test_historical_sample_is_loaded(tmp_path):
+    path = tmp_path / "history.csv"
+    write_dataset(path, 25)
+
+    df = main.load_historical_data_df(str(path))
+
+    assert len(df) == 25
+    assert list(df.columns) == FEATURE_COLUMNS + ["Class"]
+
+
+def test_unreadable_historical_data_gives_empty_frame(tmp_path):
+    path = tmp_path / "history.csv"
+    path.write_text("version https://git-lfs.github.com/spec/v1\n")
+
+    assert main.load_historical_data_df(str(path)).empty
+    assert main.load_historical_data_df(str(tmp_path / "missing.csv")).empty
+
+
+def test_preload_reports_what_was_not_loaded(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "HISTORICAL_DF", None)
+    monkeypatch.setattr(main, "HISTORICAL_DATA_FILE", str(tmp_path / "missing.csv"))
+    assert any("historique" in item for item in main.preload_shared_state())
+
+    write_dataset(tmp_path / "history.csv", 5)
+    monkeypatch.setattr(main, "HISTORICAL_DATA_FILE", str(tmp_path / "history.csv"))
+    missing = main.preload_shared_state()
+    assert not any("historique" in item for item in missing)
+    assert "modèle" not in missing
@@ -0,0 +1,47 @@
+import os
+
+import pytest
+
+from api import profiling
+
+
+@pytest.fixture
+def admin_headers(monkeypatch):
+    monkeypatch.setattr(profiling, "ADMIN_TOKEN", "profile-secret")
+    return {"X-Profile-Token": "profile-secret"}
+
+
+def profile_artifact(response):
+    """Nom de l'artefact annoncé dans Server-Timing (None si absent)."""
+    for part in response.headers["server-timing"].split(", "):
+        if part.startswith("profile;desc="):
+            return part[len('profile;desc="'):-1]
+    return None
+
+
+def test_admin_request_is_profiled(client, admin_headers, transaction):
+    response = client.post("/predict", json=transaction, headers=admin_headers)
+
+    assert response.status_code == 200
+    artifact = profile_artifact(response)
+    assert artifact is not None
+    assert os.path.exists(os.path.join(profiling.PROFILE_DIR, artifact))
+    assert "inference;dur=" in response.headers["server-timing"]
+    assert not profiling.PROFILE_LOCK.locked()
+
+
+def test_request_is_not_profiled_while_another_profile_runs(client, admin_headers, transaction):
+    assert profiling.PROFILE_LOCK.acquire(blocking=False)
+    try:
+        response = client.post("/predict", json=transaction, headers=admin_headers)
+    finally:
+        profiling.PROFILE_LOCK.release()
+
+    assert response.status_code == 200
+    assert profile_artifact(response) == "busy"
+
+
+def test_unprofiled_endpoint_has_no_server_timing(client, admin_headers):
+    response = client.get("/health", headers=admin_headers)
+
+    assert "server-timing" not in response.headers
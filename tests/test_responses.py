@@ -0,0 +1,122 @@
+import io
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from api import main, responses, security
+from conftest import make_transaction
+
+
+def test_large_json_response_is_compressed(client):
+    payload = {"transactions": [make_transaction() for _ in range(2000)]}
+    response = client.post("/predict_batch", json=payload, headers={"Accept-Encoding": "gzip"})
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert len(response.json()["predictions"]) == 2000
+
+
+def test_small_response_is_not_compressed(client):
+    response = client.get("/health", headers={"Accept-Encoding": "gzip"})
+
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+
+
+def test_response_is_not_compressed_without_accept_encoding(client):
+    payload = {"transactions": [make_transaction() for _ in range(2000)]}
+    response = client.post("/predict_batch", json=payload, headers={"Accept-Encoding": "identity"})
+
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+
+
+def test_rate_limited_response_is_still_compressed(client, monkeypatch):
+    monkeypatch.setattr(security, "KEY_CACHE", security.KeyCache(keys_file=None, keys_env="tests:secret"))
+    payload = {"transactions": [make_transaction() for _ in range(2000)]}
+    response = client.post("/predict_batch", json=payload,
+                           headers={"Accept-Encoding": "gzip", "X-API-Key": "secret"})
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["ratelimit-policy"].startswith('"requests"')
+
+
+def test_gzip_request_body_is_decoded(client):
+    import gzip
+    import json
+
+    body = gzip.compress(json.dumps({"transactions": [make_transaction()] * 3}).encode("utf-8"))
+    response = client.post("/predict_batch", content=body,
+                           headers={"Content-Type": "application/json", "Content-Encoding": "gzip"})
+
+    assert response.status_code == 200
+    assert len(response.json()["predictions"]) == 3
+
+
+@pytest.fixture
+def historical(monkeypatch):
+    df = pd.DataFrame([make_transaction(Time=float(i), Amount=i + 0.5) for i in range(50)]).astype("float32")
+    df["Class"] = np.arange(50, dtype="uint8") % 2
+    monkeypatch.setattr(main, "HISTORICAL_DF", df)
+    return df
+
+
+def test_split_and_records_shapes_hold_the_same_rows(client, historical):
+    records = client.get("/historical_data").json()
+    split = client.get("/historical_data", params={"orient": "split"}).json()
+
+    from_records = pd.DataFrame(records["data"])
+    from_split = pd.DataFrame(split["data"], columns=split.get("columns"))
+    assert split["columns"] == list(historical.columns)
+    # La matrice de "split" est d'un seul type : Class y est un flottant (1.0)
+    pd.testing.assert_frame_equal(from_records, from_split, check_dtype=False)
+    assert from_split["Amount"].tolist() == historical["Amount"].astype(float).tolist()
+
+
+def test_numpy_arrays_are_serialized_as_json_lists():
+    body = responses.dumps({"values": np.array([[1.5, 2.0]], dtype=np.float32), "n": np.int64(3)})
+
+    assert json.loads(body) == {"values": [[1.5, 2.0]], "n": 3}
+
+
+@pytest.mark.skipif(not responses.PYARROW_EXISTS, reason="pyarrow non installé")
+@pytest.mark.parametrize("accept, media_type", [
+    (responses.ARROW_MEDIA_TYPE, responses.ARROW_MEDIA_TYPE),
+    (responses.PARQUET_MEDIA_TYPE, responses.PARQUET_MEDIA_TYPE),
+    (f"application/json, {responses.ARROW_MEDIA_TYPE};q=0.5", "application/json"),
+    (f"application/json;q=0.5, {responses.PARQUET_MEDIA_TYPE}", responses.PARQUET_MEDIA_TYPE),
+])
+def test_batch_response_format_is_negotiated(client, accept, media_type):
+    payload = {"transactions": [make_transaction(Amount=float(i)) for i in range(2000)]}
+    reference = client.post("/predict_batch", json=payload).json()
+
+    response = client.post("/predict_batch", json=payload, headers={"Accept": accept, "Accept-Encoding": "gzip"})
+
+    assert response.headers["content-type"].startswith(media_type)
+    assert "Accept" in response.headers["vary"]
+    if media_type == "application/json":
+        assert response.json() == reference
+        return
+    assert "content-encoding" not in response.headers  # Déjà compressé (zstd)
+    if media_type == responses.ARROW_MEDIA_TYPE:
+        import pyarrow as pa
+        table = pa.ipc.open_stream(response.content).read_all()
+    else:
+        import pyarrow.parquet as pq
+        table = pq.read_table(io.BytesIO(response.content))
+    assert table.column("prediction").to_pylist() == reference["predictions"]
+    assert table.column("probability").to_pylist() == pytest.approx(reference["probabilities"])
+
+
+@pytest.mark.skipif(not responses.PYARROW_EXISTS, reason="pyarrow non installé")
+def test_historical_data_as_arrow(client, historical):
+    import pyarrow as pa
+
+    response = client.get("/historical_data", headers={"Accept": responses.ARROW_MEDIA_TYPE})
+
+    frame = pa.ipc.open_stream(response.content).read_all().to_pandas()
+    pd.testing.assert_frame_equal(frame, historical.reset_index(drop=True))
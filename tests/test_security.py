@@ -0,0 +1,115 @@
+import json
+
+import pytest
+
+from api import security
+from conftest import make_transaction
+
+
+@pytest.fixture
+def keys(monkeypatch):
+    """Authentification activée pour un client 'tests' (clé 'secret', quotas par défaut)."""
+    cache = security.KeyCache(keys_file=None, keys_env="tests:secret")
+    monkeypatch.setattr(security, "KEY_CACHE", cache)
+    return cache
+
+
+def write_keys(tmp_path, clients):
+    path = tmp_path / "keys.json"
+    path.write_text(json.dumps({"clients": clients}))
+    return str(path)
+
+
+def test_missing_or_unknown_key_is_rejected(client, keys, transaction):
+    missing = client.post("/predict", json=transaction)
+    invalid = client.post("/predict", json=transaction, headers={"X-API-Key": "wrong"})
+
+    assert missing.status_code == invalid.status_code == 401
+    assert missing.headers["www-authenticate"] == "Bearer"
+
+
+def test_public_paths_stay_open(client, keys):
+    assert client.get("/health").status_code == 200
+
+
+def test_valid_key_gets_rate_limit_headers(client, keys, transaction):
+    response = client.post("/predict", json=transaction, headers={"Authorization": "Bearer secret"})
+
+    assert response.status_code == 200
+    assert '"rows"' in response.headers["ratelimit-policy"]
+    assert response.headers["ratelimit"].startswith('"requests";r=')
+
+
+def test_request_quota_exhausted_returns_429(client, monkeypatch, transaction):
+    cache = security.KeyCache(keys_file=None, keys_env="tests:secret")
+    cache.lookup("secret").requests = security.TokenBucket(1, 1 / 60)
+    monkeypatch.setattr(security, "KEY_CACHE", cache)
+
+    first = client.post("/predict", json=transaction, headers={"X-API-Key": "secret"})
+    second = client.post("/predict", json=transaction, headers={"X-API-Key": "secret"})
+
+    assert first.status_code == 200
+    assert second.status_code == 429
+    assert int(second.headers["retry-after"]) > 0
+
+
+def test_batch_over_row_capacity_returns_413(client, keys):
+    keys.lookup("secret").rows = security.TokenBucket(5, 5 / 60)
+    payload = {"transactions": [make_transaction() for _ in range(6)]}
+
+    response = client.post("/predict_batch", json=payload, headers={"X-API-Key": "secret"})
+
+    assert response.status_code == 413
+
+
+def test_oversized_body_is_rejected_before_parsing(client, keys, monkeypatch):
+    keys.lookup("secret").rows = security.TokenBucket(1, 1 / 60)
+    parsed = []
+    monkeypatch.setattr("api.main.parse_batch_body", lambda body: parsed.append(body))
+    body = b'{"transactions": []}' + b" " * (security.MAX_ROW_BYTES + 1)
+
+    response = client.post("/predict_batch", content=body,
+                           headers={"X-API-Key": "secret", "Content-Type": "application/json"})
+
+    assert response.status_code == 413
+    assert parsed == []
+
+
+def test_row_bucket_holds_a_maximal_batch_with_several_workers(monkeypatch):
+    monkeypatch.setattr(security, "WORKERS", 8)
+    monkeypatch.setattr(security, "MAX_BATCH_ROWS", 5000)
+
+    assert security.Client("big", rows_per_minute=8000).rows.capacity == 5000
+    assert security.Client("small", rows_per_minute=1000).rows.capacity == 1000
+    assert security.Client("huge", rows_per_minute=80000).rows.capacity == 10000
+
+
+def test_keys_file_is_loaded(tmp_path):
+    path = write_keys(tmp_path, [{"name": "partner", "key_sha256": security.key_digest("k1"),
+                                  "rows_per_minute": 1000}])
+
+    partner = security.KeyCache(keys_file=path, keys_env="").lookup("k1")
+
+    assert partner.name == "partner"
+    assert partner.rows_per_minute == 1000
+
+
+@pytest.mark.parametrize("entry, message", [
+    ({"name": "a", "key_sha256": "0" * 64, "rows_per_min": 10}, "rows_per_min"),
+    ({"name": "a", "key_sha256": "0" * 64, "requests_per_minute": 0}, "requests_per_minute"),
+    ({"name": "a", "key_sha256": "0" * 64, "rows_per_minute": "1000"}, "rows_per_minute"),
+    ({"name": "", "key_sha256": "0" * 64}, "name"),
+    ({"name": "a", "key_sha256": "not-a-digest"}, "key_sha256"),
+    ({"name": "a"}, "key_sha256"),
+])
+def test_invalid_keys_file_raises_clear_error(tmp_path, entry, message):
+    path = write_keys(tmp_path, [entry])
+
+    with pytest.raises(ValueError, match=message) as error:
+        security.KeyCache(keys_file=path, keys_env="")
+    assert "client n°1" in str(error.value)
+
+
+def test_invalid_keys_env_raises_clear_error():
+    with pytest.raises(ValueError, match="nom:clé"):
+        security.KeyCache(keys_file=None, keys_env="only-a-name")
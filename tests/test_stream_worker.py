@@ -0,0 +1,34 @@
+import pytest
+
+from conftest import ROOT, make_transaction
+
+
+@pytest.fixture
+def scorer(tmp_path, monkeypatch):
+    from api.stream_worker import Scorer
+
+    monkeypatch.chdir(ROOT)  # Chemins du modèle relatifs à la racine du dépôt
+    scorer = Scorer(str(tmp_path / "alerts.db"))
+    yield scorer
+    scorer.close()
+
+
+def test_invalid_records_are_counted_not_fatal(scorer):
+    records = [
+        make_transaction(),
+        make_transaction(V3="abc"),
+        make_transaction(Amount=[1, 2]),
+        make_transaction(V1=None),
+        make_transaction(V2="1.5"),  # Texte numérique : converti
+    ]
+
+    scorer.score(records, [f"id{i}" for i in range(len(records))])
+
+    assert scorer.invalid == 3
+    assert scorer.rows == 2
+
+
+def test_batch_of_only_invalid_records(scorer):
+    assert scorer.score([make_transaction(Time="x")], ["id0"]) == 0
+    assert scorer.invalid == 1
+    assert scorer.rows == 0